@@ -1,206 +1,278 @@
-
 import streamlit as st
-import requests
 import random
 import os
-import backup_service
-import smtplib
-from email.mime.text import MIMEText
+import re
+import sys
+import time
+import uuid
+import address_index
+import address_service
+import district_service
+import duplicate_filter
+import geocode_cache
+import http_client
+import image_assets
+import metrics
+import models
+import outbox_service
+import session_memory
+import stats_service
+import tracing
+import warmup
+import worker_client
 from datetime import datetime
+# address_search_refresh() writes the searchbox's own session state, using
+# its private option helpers. Both are internals of the version pinned in
+# requirements.txt; tests/test_step_one.py checks them.
+from streamlit_searchbox import _list_to_options_js, _list_to_options_py, st_searchbox
 
-# --- CONFIGURATION ---
-# These keys are now securely loaded from your secrets.toml file
-GEOCODIO_API_KEY = st.secrets["GEOCODIO_API_KEY"]
-EMAIL_ADDRESS = "the.80.percent.bill@gmail.com"
-EMAIL_PASSWORD = st.secrets["EMAIL_PASSWORD"]
-WORKER_BASE_URL = st.secrets["WORKER_BASE_URL"].rstrip("/")
+# mail_service (smtplib, email) and backup_service (gspread) are imported
+# where they are first needed, so a cold start only pays for what the first
+# render uses. warmup.start() loads them in the background right after.
 
+# --- CONFIGURATION ---
 DONATION_LINK = "https://www.buymeacoffee.com/80percentbill"
+THEME_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "theme.css")
+
+# How long "Verify and Sign" waits for the Worker's answer. After that the
+# pledge stays queued in the local outbox and the user moves on. Skipped
+# entirely while the Worker's circuit breaker is open.
+PLEDGE_CONFIRM_SECONDS = 2
+
+# Address autocomplete: the searchbox waits this long after the last
+# keystroke before asking the server, so fast typing sends one query.
+ADDRESS_SEARCHBOX = "address_searchbox"
+ADDRESS_DEBOUNCE_MS = 300
+
+@st.cache_resource
+def theme_css():
+    # Read and minified once per process; every full rerun re-sends it.
+    with open(THEME_CSS_PATH, encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,])\s*", r"\1", css)
+    return f"<style>{css.strip()}</style>"
 
 # --- SMART ASSET LOADER ---
-def find_image(options):
-    for img in options:
-        if os.path.exists(img):
-            return img
-    return None
-
-LOGO_IMG = find_image(["Gemini_Generated_Image_1dkkh41dkkh41dkk.jpg", "logo.jpg", "logo.png"])
-BANNER_IMG = find_image(["banner.jpg", "banner.png"])
+# Resolved once per process to a static WebP URL (see image_assets.py).
+LOGO_IMG = image_assets.load("logo")
+BANNER_IMG = image_assets.load("banner")
 
 # --- HELPER FUNCTIONS ---
-def get_osm_addresses(search_term):
-    if not search_term: 
-        return []
-    url = "https://nominatim.openstreetmap.org/search"
-    headers = {"User-Agent": "The80PercentPledge/1.0"}
-    params = {"q": search_term, "format": "json", "limit": 5, "countrycodes": "us", "addressdetails": 1}
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=6)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        return []
-    return []
-
-def get_district(address):
-    if not address: 
-        return None, None
-    url = "https://api.geocod.io/v1.7/geocode"
-    params = {"q": address, "fields": "cd", "api_key": GEOCODIO_API_KEY}
-    try:
-        response = requests.get(url, params=params, timeout=8)
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                data = results[0]
-                if "congressional_districts" in data.get("fields", {}):
-                    dist_data = data["fields"]["congressional_districts"][0]
-                    state = data.get("address_components", {}).get("state")
-                    dist_num = dist_data.get("district_number")
-                    rep_name = "Vacant"
-                    for leg in dist_data.get("current_legislators", []):
-                        if leg.get("type") == "representative":
-                            rep = leg.get("bio", {})
-                            rep_name = f"{rep.get('first_name','')} {rep.get('last_name','')}".strip()
-                            break
-                    return f"{state}-{dist_num}", rep_name
-    except:
-        return None, None
-    return None, None
-
 def is_duplicate(email):
-    # Duplicate protection is now enforced by the database (unique email).
-    # The Worker returns HTTP 409 if the email already exists.
-    return False
-
-def send_email_code(to_email):
-    code = str(random.randint(1000, 9999))
+    # Fast local prefilter only (see duplicate_filter.py). False means "not
+    # known here"; the Worker's unique-email check (HTTP 409) stays the
+    # authority for every pledge that gets through.
+    return duplicate_filter.contains(email)
+
+@tracing.traced()
+def send_email_code(to_email, code=None, resend=False):
+    # Returns straight away; the mail scheduler sends in the background and
+    # step 2 shows the delivery status when it lands. Resends go out at low
+    # priority: they wait for spare capacity instead of competing with first
+    # codes for new signers.
+    import mail_service
+
+    code = code or str(random.randint(1000, 9999))
+    ticket = mail_service.send_message(
+        to_email,
+        "Verification Code - The 80% Pledge",
+        f"Your 80% Pledge verification code is: {code}",
+        priority=mail_service.LOW if resend else mail_service.HIGH,
+    )
+    return code, ticket
+
+def _post_signup(payload):
+    payload = dict(payload)
+    key = payload.pop("idempotency_key", None) or uuid.uuid4().hex
+    result = worker_client.signup(payload, key)
+    if result in ("ok", "duplicate"):
+        duplicate_filter.add(payload.get("email"))
+    if result == "ok":
+        stats_service.record_signup(payload.get("district"))
+    return result
+
+@tracing.traced()
+def save_pledge(name, email, district, rep_name, submission_key=None, address=""):
+    # 1) Backup vault write runs in the background and only gets logged;
+    #    a slow Sheets call never holds up the success screen.
     try:
-        msg = MIMEText(f"Your 80% Pledge verification code is: {code}")
-        msg['Subject'] = "Verification Code - The 80% Pledge"
-        msg['From'] = f"The 80% Pledge <{EMAIL_ADDRESS}>"
-        msg['To'] = to_email
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_ADDRESS, to_email, msg.as_string())
-        return code
-    except Exception as e:
-        # SILENT FAILURE: Return None so the app knows to skip verification
-        print(f"Email failed (likely limit hit): {e}")
-        return None
-
-def save_pledge(name, email, district, rep_name):
-    # 1) Always write to the backup vault first (never blocks the user)
-    try:
-        backup_service.save_to_vault(name, email, district, rep_name)
+        import backup_service
+        with tracing.span("vault submit"):
+            backup_service.save_to_vault_async(name, email, district, rep_name, address)
     except Exception:
         pass
 
-    # 2) Save to Nile via Cloudflare Worker
-    payload = {
-        "name": name,
-        "email": email,
-        "district": district,
-        "rep_name": rep_name,
-    }
-
+    # 2) Commit to the local outbox. Once this returns the pledge survives a
+    #    Worker outage; the drainer delivers it to Nile in batches. The
+    #    submission key makes a double-clicked submit the same pledge.
     try:
-        r = requests.post(f"{WORKER_BASE_URL}/signup", json=payload, timeout=10)
-        if r.status_code == 200:
-            return "ok"
-        if r.status_code == 409:
-            return "duplicate"
-        return "error"
-    except Exception:
-        return "error"
+        with tracing.span("outbox enqueue"):
+            pledge_id = outbox_service.enqueue(name, email, district, rep_name, submission_key)
+    except Exception as e:
+        print(f"❌ OUTBOX FAILURE: {e}")
+        result = _post_signup(
+            {"name": name, "email": email, "district": district, "rep_name": rep_name, "idempotency_key": submission_key}
+        )
+        return result if result in ("ok", "duplicate") else "error"
+
+    # 3) Give the Worker a moment so duplicates are still reported up front,
+    #    unless it is known to be down: then the user moves on immediately.
+    outbox_service.start_drainer(_post_signup, worker_client.breaker.available)
+    if not worker_client.breaker.available():
+        return "queued"
+    with tracing.span("outbox wait_for_result"):
+        result = outbox_service.wait_for_result(pledge_id, PLEDGE_CONFIRM_SECONDS)
+    if result in ("ok", "duplicate"):
+        return result
+    return "queued"
 
 # --- THE APP UI ---
 
 st.set_page_config(page_title="The 80% Bill", page_icon="🇺🇸", layout="wide")
 
+# ?profile=1 records this run's spans and draws a waterfall at the bottom.
+tracing.begin("script run")
+
 # --- CUSTOM THEME (FRESH START) ---
-st.markdown("""
-<style>
-    /* 1. FORCE LIGHT MODE BACKGROUND */
-    [data-testid="stAppViewContainer"] {
-        background-color: #F9F7F2;
-    }
-    [data-testid="stHeader"] {
-        background-color: #F9F7F2; 
-    }
-
-    /* 2. TEXT COLORS */
-    h1, h2, h3, h4, h5, h6, p, li, label, .stMarkdown {
-        color: #0C2340 !important;
-    }
-
-    /* 3. INPUT FIELDS */
-    input, textarea, select {
-        background-color: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid #ccc !important;
-        caret-color: #000000 !important;
-    }
-    ::placeholder {
-        color: #666666 !important;
-        opacity: 1;
-    }
-
-    /* 4. BUTTONS */
-    button {
-        background-color: #0C2340 !important;
-        border: none !important;
-        transition: background-color 0.3s ease;
-    }
-    button * {
-        color: #ffffff !important;
-    }
-    button:hover {
-        background-color: #BF0A30 !important;
-    }
-    
-    /* 5. SIDEBAR */
-    [data-testid="stSidebar"] {
-        background-color: #0C2340 !important;
-    }
-    [data-testid="stSidebar"] h1, [data-testid="stSidebar"] h2, [data-testid="stSidebar"] h3,
-    [data-testid="stSidebar"] p, [data-testid="stSidebar"] label, [data-testid="stSidebar"] .stMarkdown {
-        color: #ffffff !important;
-    }
-    [data-testid="stSidebar"] [data-testid="stLinkButton"] {
-        background-color: #FFDD00 !important;
-        color: #000000 !important;
-    }
-    [data-testid="stSidebar"] [data-testid="stLinkButton"] p {
-        color: #000000 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+with tracing.span("theme css"):
+    st.markdown(theme_css(), unsafe_allow_html=True)
+
+with tracing.span("background services"):
+    # Pick up anything a previous process left in the outbox.
+    outbox_service.start_drainer(_post_signup, worker_client.breaker.available)
+    metrics.start_exporter()
+    stats_service.start_poller()
+
+    # Open upstream connections and load lookup tables once per process, off
+    # the first render's critical path.
+    warmup.start(worker_client.base_url())
 
 # --- Session State Setup ---
 if "step" not in st.session_state:
     st.session_state.step = 1
-if "name" not in st.session_state:
-    st.session_state.name = ""
-if "email" not in st.session_state:
-    st.session_state.email = ""
-if "address" not in st.session_state:
-    st.session_state.address = ""
-if "district" not in st.session_state:
-    st.session_state.district = ""
-if "rep" not in st.session_state:
-    st.session_state.rep = ""
+if "pledge" not in st.session_state:
+    st.session_state.pledge = None
 if "verification_code" not in st.session_state:
     st.session_state.verification_code = None
-if "address_suggestions" not in st.session_state:
-    st.session_state.address_suggestions = []
+if "email_ticket" not in st.session_state:
+    st.session_state.email_ticket = None
+if "email_resent" not in st.session_state:
+    st.session_state.email_resent = False
+if "email_delivery" not in st.session_state:
+    st.session_state.email_delivery = None
+if "pledge_delivery" not in st.session_state:
+    st.session_state.pledge_delivery = None
 if "selected_address" not in st.session_state:
     st.session_state.selected_address = ""
+if "address_search_pending" not in st.session_state:
+    st.session_state.address_search_pending = None
+if "search_session_id" not in st.session_state:
+    st.session_state.search_session_id = uuid.uuid4().hex
+if "funnel_reached" not in st.session_state:
+    st.session_state.funnel_reached = set()
+
+# Count each session once per step of the signup funnel.
+funnel_stage = f"step{st.session_state.step}"
+if funnel_stage not in st.session_state.funnel_reached:
+    st.session_state.funnel_reached.add(funnel_stage)
+    metrics.funnel(funnel_stage)
+
+def server_stats():
+    # The admin panel's process-wide stats, only rendered on request.
+    polls = stats_service.poll_stats()
+    fetched_at = stats_service.snapshot()["fetched_at"]
+    age = f"{time.time() - fetched_at:.0f}s ago" if fetched_at else "never"
+    st.caption(
+        f"Stats poller: {polls['polls']} polls ({polls['not_modified']} not modified), "
+        f"{polls['errors']} errors, last fetched {age}"
+    )
+    dupes = duplicate_filter.filter_stats()
+    st.caption(
+        f"Duplicate filter: {dupes['known']:,} known emails ({dupes['bytes'] / 1e6:.1f} MB), "
+        f"{dupes['rejected']} of {dupes['checks']} checks rejected"
+        + ("" if dupes["loaded"] else ", still loading")
+    )
+    circuit = worker_client.breaker.snapshot()
+    st.caption(
+        f"Worker circuit: {circuit['state']} ({circuit['failures']} consecutive failures, "
+        f"{circuit['short_circuited']} calls failed fast)"
+    )
+
+    # Walks every live session's state, so only for whoever holds the
+    # profiling token (?profile=<PROFILE_TOKEN>).
+    if tracing.enabled() and st.button("Memory report"):
+        with st.spinner("Measuring session state..."):
+            memory = session_memory.report(st.session_state.to_dict())
+        st.caption(
+            f"Session state ({memory['scope']}): {memory['sessions']} sessions, "
+            f"{memory['total_bytes'] / 1e6:.2f} MB total, {memory['mean_bytes'] / 1e3:.1f} kB mean, "
+            f"{memory['max_bytes'] / 1e3:.1f} kB max"
+            + (f", {memory['skipped']} skipped while busy" if memory["skipped"] else "")
+            + f"; about {memory['mean_bytes'] * 1000 / 1e6:.1f} MB per 1,000 visitors"
+        )
+        st.caption(
+            f"This session: {memory['current_bytes'] / 1e3:.1f} kB, mostly "
+            + ", ".join(f"{key} {size / 1e3:.1f} kB" for key, size in memory["current_top"])
+        )
+
+    stats = address_service.cache_stats()
+    st.caption(
+        f"Address cache: {stats['hits']} hits, {stats['prefix_hits']} prefix hits, "
+        f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+        f"{stats['entries']} entries, {stats['rate_limited']} rate-limited, "
+        f"{stats['coalesced']} coalesced, {stats['superseded']} dropped as stale"
+    )
+    offline = address_index.index_stats()
+    st.caption(
+        f"Address index: {offline['addresses']:,} addresses ({offline['bytes'] / 1e6:.1f} MB mapped), "
+        f"{offline['hits']} of {offline['queries']} queries answered offline"
+        if offline["loaded"] else "Address index: not deployed (every search goes to Nominatim)"
+    )
+    lookups = district_service.lookup_stats()
+    st.caption(
+        f"District lookups: {lookups['offline']} offline, {lookups['geocodio']} via Geocodio "
+        f"({lookups['ambiguous']} near a boundary, {lookups['outside_index']} outside the index, {lookups['coalesced']} coalesced), index {'loaded' if lookups['index_loaded'] else 'not deployed'}, "
+        f"roster {lookups['roster_generated'] or 'not deployed'}"
+    )
+    cache = geocode_cache.cache_stats()
+    size = f"{cache['entries']} entries, {cache['bytes'] / 1e6:.1f} MB" if cache["entries"] is not None else "unavailable"
+    st.caption(
+        f"Geocode cache: {cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['misses']} misses, "
+        f"{cache['stale']} stale), {size}, {cache['evicted']} evicted"
+    )
+    if "mail_service" not in sys.modules:
+        st.caption("Mail: not loaded yet")
+    else:
+        import mail_service
+        mail = mail_service.mail_stats()
+        st.caption(
+            f"Mail: {mail['sent']} sent, {mail['failed']} failed ({mail['refused']} refused), {mail['delayed']} delayed, "
+            f"{mail['queued']} queued, {mail['logins']} SMTP logins"
+        )
+        for transport in mail_service.transport_capacity():
+            cooling = " (cooling down)" if transport["cooling_down"] else ""
+            st.caption(f"• {transport['name']}: {transport['remaining']}/{transport['daily_quota']} sends left in 24h{cooling}")
+
+    snapshot = metrics.snapshot()
+    st.caption("Dependencies (recent p50 / p95 / p99):")
+    for dependency, dep in snapshot["dependencies"].items():
+        st.caption(
+            f"• {dependency}: {dep['p50_ms']:.0f} / {dep['p95_ms']:.0f} / {dep['p99_ms']:.0f} ms, "
+            f"{dep['count']} calls, {dep['error']} errors, {dep['timeout']} timeouts"
+        )
+    funnel = snapshot["funnel"]
+    conversion = funnel["step3"] / funnel["step1"] if funnel["step1"] else 0.0
+    st.caption(
+        f"Funnel: {funnel['step1']} → {funnel['step2']} → {funnel['step3']} sessions ({conversion:.0%} reach step 3)"
+    )
+    st.download_button("Download metrics", metrics.prometheus_text, file_name="metrics.prom", mime="text/plain")
 
 # --- SIDEBAR ---
-with st.sidebar:
+with st.sidebar, tracing.span("sidebar"):
     if LOGO_IMG:
-        st.image(LOGO_IMG, use_container_width=True)
+        st.image(LOGO_IMG, width="stretch")
     else:
         st.header("🇺🇸 The 80% Bill")
     st.divider()
@@ -212,74 +284,184 @@ with st.sidebar:
     with st.expander("Admin Access"):
         if st.button("Check Backend"):
             try:
-                r = requests.get(f"{WORKER_BASE_URL}/stats", timeout=8)
-                if r.status_code == 200:
-                    data = r.json()
-                    st.success(f"Backend OK. Total Signatures: {data.get('total_signups', 0)}")
-                else:
-                    st.error(f"Backend error: {r.status_code} {r.text}")
-            except Exception as e:
+                data = worker_client.get_stats()
+                st.success(f"Backend OK. Total Signatures: {data.get('total_signups', 0)}")
+            except http_client.HttpError as e:
                 st.error(f"Backend error: {e}")
+        # Off by default: the expander's body runs on every rerun even when
+        # collapsed, and these stats cost SQLite queries and metric sorts.
+        if st.toggle("Show server stats"):
+            server_stats()
 
 # --- MAIN APP ---
-if BANNER_IMG:
-    st.image(BANNER_IMG, use_container_width=True)
+with tracing.span("banner"):
+    if BANNER_IMG:
+        st.image(BANNER_IMG, width="stretch")
 
 st.title("The 80% Pledge")
 st.write("Sign the pledge. Your district is calculated from your address and saved to a stable backend.")
 
-# --- STEP 1: FORM ---
-if st.session_state.step == 1:
-    st.subheader("Step 1: Enter your info")
-
-    name = st.text_input("Full Name", value=st.session_state.name)
-    email_input = st.text_input("Email", value=st.session_state.email)
+# --- LIVE COUNTER ---
+# Reads the process-wide snapshot kept fresh by stats_service's poller, so
+# sessions never call the Worker for it.
+@st.fragment(run_every=stats_service.POLL_SECONDS)
+def live_counter():
+    counts = stats_service.snapshot()
+    if counts["total"] is None:
+        return
+    st.metric("Signatures so far", f"{counts['total']:,}")
+    district = st.session_state.pledge.district if st.session_state.pledge else None
+    if district and district in counts["districts"]:
+        st.caption(f"{counts['districts'][district]:,} of them from {district}")
+    if counts["districts"]:
+        with st.expander("Signatures by district"):
+            top = sorted(counts["districts"].items(), key=lambda item: item[1], reverse=True)[:15]
+            st.markdown("\n".join(f"- **{code}**: {n:,}" for code, n in top))
+
+live_counter()
 
-    address_search = st.text_input("Start typing your home address", value=st.session_state.address)
+# --- STEP 1: FORM ---
+# Steps 1 and 2 are fragments: typing an address or a code only re-runs the
+# step itself, not the theme CSS, sidebar, admin panel and banner. Moving
+# between steps uses st.rerun(), which re-runs the whole page.
+def search_addresses(term):
+    # Called by the searchbox once typing pauses. Returns (label, suggestion)
+    # pairs; a lookup still running after a second shows "Searching..."
+    # and address_search_refresh() fills the list in once it lands.
+    with tracing.span("address search"):
+        results = address_service.search(term, st.session_state.search_session_id)
+    if results is None:
+        st.session_state.address_search_pending = term
+        return []
+    st.session_state.address_search_pending = None
+    return [(r.display_name, r) for r in results]
+
+@st.fragment(run_every=1)
+def address_search_refresh():
+    # Only rendered while a slow lookup is pending. Once it lands, its
+    # results go straight into the searchbox's options and the page reruns
+    # to show them. Re-running the searchbox's own search step instead would
+    # make it ask for a fragment-scoped rerun, which fails in a full run; and
+    # a fragment-scoped rerun from here would only redraw this fragment.
+    term = st.session_state.address_search_pending
+    if term and address_service.search_done(term):
+        st.session_state.address_search_pending = None
+        box = st.session_state[ADDRESS_SEARCHBOX]
+        if box.get("search") == term:   # not typed over since
+            options = [(r.display_name, r) for r in address_service.cached(term) or []]
+            box["options_js"] = _list_to_options_js(options)
+            box["options_py"] = _list_to_options_py(options)
+        st.rerun()
 
-    if address_search and len(address_search) >= 4:
-        st.session_state.address_suggestions = get_osm_addresses(address_search)
+@st.fragment
+@tracing.traced("step 1 form")
+def step_one_form():
+    st.subheader("Step 1: Enter your info")
 
-    if st.session_state.address_suggestions:
-        labels = [a.get("display_name", "") for a in st.session_state.address_suggestions]
-        st.session_state.selected_address = st.selectbox("Select your address", [""] + labels)
+    pledge = st.session_state.pledge
+    name = st.text_input("Full Name", value=pledge.name if pledge else "")
+    email_input = st.text_input("Email", value=pledge.email if pledge else "")
+
+    picked = st_searchbox(
+        search_addresses,
+        key=ADDRESS_SEARCHBOX,
+        label="Home address",
+        placeholder="Start typing your home address",
+        debounce=ADDRESS_DEBOUNCE_MS,
+        rerun_scope="fragment",
+    )
+    st.session_state.selected_address = picked.display_name if picked else ""
+    if st.session_state.address_search_pending:
+        st.caption("🔎 Searching...")
+        address_search_refresh()
+
+    with st.expander("Know your district? Enter it instead"):
+        manual_district = st.text_input("District Code", placeholder="e.g. NY-14")
 
     if st.button("Continue"):
-        if not st.session_state.selected_address:
+        if not st.session_state.selected_address and not manual_district:
             st.error("Please select your address from the suggestions.")
+        elif is_duplicate(email_input.strip().lower()):
+            # Known signer: no verification email, no Worker call.
+            st.error(f"❌ '{email_input.strip().lower()}' has already signed.")
         else:
-            dist, rep = get_district(st.session_state.selected_address)
-            if not dist:
+            if st.session_state.selected_address:
+                with tracing.span("get_district"):
+                    dist, rep = district_service.get_district(st.session_state.selected_address, picked.lat, picked.lon)
+            else:
+                with tracing.span("resolve_manual_district"):
+                    dist, rep = district_service.resolve_manual_district(manual_district)
+
+            if not dist and not st.session_state.selected_address:
+                st.error(f"'{manual_district.strip()}' is not a district we know. Use your state and district number, e.g. NY-14 or AK-AL.")
+            elif not dist:
                 st.error("Could not determine district. Try a slightly different address.")
             else:
-                st.session_state.name = name
-                st.session_state.email = email_input
-                st.session_state.address = st.session_state.selected_address
-                st.session_state.district = dist
-                st.session_state.rep = rep
-
-                # If email fails, skip verification automatically
-                st.session_state.verification_code = send_email_code(email_input.strip().lower())
+                # One submission key per pledge attempt: resubmits of it are deduplicated.
+                st.session_state.pledge = models.Pledge(
+                    name, email_input.strip().lower(), st.session_state.selected_address, dist, rep, uuid.uuid4().hex
+                )
+
+                # If email fails, step 2 skips verification automatically
+                st.session_state.verification_code, st.session_state.email_ticket = send_email_code(email_input.strip().lower())
+                st.session_state.email_delivery = None
                 st.session_state.step = 2
                 st.rerun()
 
 # --- STEP 2: VERIFY OR SAVE ---
-if st.session_state.step == 2:
+@st.fragment(run_every=1)
+def email_delivery_status():
+    # Polls the mail scheduler until the ticket is sent or failed. The
+    # outcome is kept in session state: later ticks skip the scheduler, and
+    # the next full rerun shows it without this fragment. No st.rerun()
+    # here, which would drop a "Verify and Sign" click in the same run.
+    import mail_service
+
+    if st.session_state.email_delivery is None:
+        delivery = mail_service.status(st.session_state.email_ticket)
+        if delivery == mail_service.FAILED and not st.session_state.email_resent:
+            # SILENT FAILURE: drop the code so the app skips verification
+            st.session_state.verification_code = None
+            st.rerun()
+        elif delivery in (mail_service.SENT, mail_service.FAILED):
+            st.session_state.email_delivery = delivery
+        elif delivery == mail_service.DELAYED:
+            st.caption("📧 Email is busy right now; your code will arrive shortly.")
+            return
+        else:
+            st.caption("📧 Sending your code...")
+            return
+    email_delivery_caption()
+
+def email_delivery_caption():
+    import mail_service
+
+    if st.session_state.email_delivery == mail_service.SENT:
+        st.caption(f"📧 Code sent to {st.session_state.pledge.email}")
+    else:
+        st.caption("📧 Could not resend right now. Use the code from your first email.")
+
+@st.fragment
+@tracing.traced("step 2 verify")
+def step_two_verify():
     st.subheader("Step 2: Verify (if email sends)")
 
-    st.write(f"District: **{st.session_state.district}**")
-    st.write(f"Representative: **{st.session_state.rep}**")
+    pledge = st.session_state.pledge
+    st.write(f"District: **{pledge.district}**")
+    st.write(f"Representative: **{pledge.rep}**")
 
     if st.session_state.verification_code is None:
         st.info("Email verification is temporarily unavailable. Saving immediately.")
-        clean_email = st.session_state.email.strip().lower()
+        clean_email = pledge.email
 
-        if st.session_state.name and clean_email and "@" in clean_email:
-            result = save_pledge(st.session_state.name, clean_email, st.session_state.district, st.session_state.rep)
+        if pledge.name and clean_email and "@" in clean_email:
+            result = save_pledge(
+                pledge.name, clean_email, pledge.district, pledge.rep, pledge.submission_key, pledge.address
+            )
 
             if result == "duplicate":
                 st.error(f"❌ '{clean_email}' has already signed.")
-            elif result == "ok":
+            elif result in ("ok", "queued"):
                 st.session_state.step = 3
                 st.rerun()
             else:
@@ -287,16 +469,22 @@ if st.session_state.step == 2:
         else:
             st.error("Invalid name/email.")
     else:
+        if st.session_state.email_delivery is None:
+            email_delivery_status()
+        else:
+            email_delivery_caption()
         user_code = st.text_input("Enter the 4-digit code sent to your email")
 
         if st.button("Verify and Sign"):
             if user_code == st.session_state.verification_code:
-                clean_email = st.session_state.email.strip().lower()
-                result = save_pledge(st.session_state.name, clean_email, st.session_state.district, st.session_state.rep)
+                clean_email = pledge.email
+                result = save_pledge(
+                    pledge.name, clean_email, pledge.district, pledge.rep, pledge.submission_key, pledge.address
+                )
 
                 if result == "duplicate":
                     st.error(f"❌ '{clean_email}' has already signed.")
-                elif result == "ok":
+                elif result in ("ok", "queued"):
                     st.session_state.step = 3
                     st.rerun()
                 else:
@@ -304,23 +492,64 @@ if st.session_state.step == 2:
             else:
                 st.error("Wrong code. Try again.")
 
+        if st.button("Resend code"):
+            _, st.session_state.email_ticket = send_email_code(
+                pledge.email, st.session_state.verification_code, resend=True
+            )
+            st.session_state.email_delivery = None
+            st.session_state.email_resent = True
+            st.rerun()
+
+if st.session_state.step == 1:
+    step_one_form()
+
+if st.session_state.step == 2:
+    step_two_verify()
+
 # --- STEP 3: SUCCESS ---
+@st.fragment(run_every=3)
+def pledge_delivery_status():
+    # Polls the outbox while the pledge is still waiting there. Once it is
+    # settled the status is kept in session state, later ticks skip SQLite,
+    # and the next full rerun leaves this fragment out.
+    if st.session_state.pledge_delivery is None:
+        status = outbox_service.status_for_email(st.session_state.pledge.email)
+        if status == outbox_service.PENDING:
+            st.caption("⏳ Your signature is saved and being recorded...")
+            return
+        st.session_state.pledge_delivery = status
+    pledge_delivery_note()
+
+def pledge_delivery_note():
+    if st.session_state.pledge_delivery == outbox_service.DUPLICATE:
+        st.warning("This email had already signed, so your earlier signature stands.")
+
 if st.session_state.step == 3:
-    st.success("✅ You signed the pledge. Thank you.")
-    st.write(f"District: **{st.session_state.district}**")
-    st.write(f"Representative: **{st.session_state.rep}**")
-
-    if st.button("Sign another"):
-        st.session_state.step = 1
-        st.session_state.name = ""
-        st.session_state.email = ""
-        st.session_state.address = ""
-        st.session_state.district = ""
-        st.session_state.rep = ""
-        st.session_state.verification_code = None
-        st.session_state.address_suggestions = []
-        st.session_state.selected_address = ""
-        st.rerun()
+    with tracing.span("step 3"):
+        st.success("✅ You signed the pledge. Thank you.")
+        st.write(f"District: **{st.session_state.pledge.district}**")
+        st.write(f"Representative: **{st.session_state.pledge.rep}**")
+        if st.session_state.pledge_delivery is None:
+            pledge_delivery_status()
+        else:
+            pledge_delivery_note()
+
+        if st.button("Sign another"):
+            st.session_state.step = 1
+            st.session_state.pledge = None
+            st.session_state.verification_code = None
+            st.session_state.email_ticket = None
+            st.session_state.email_resent = False
+            st.session_state.email_delivery = None
+            st.session_state.pledge_delivery = None
+            st.session_state.selected_address = ""
+            st.session_state.pop(ADDRESS_SEARCHBOX, None)
+            st.session_state.funnel_reached = set()
+            st.rerun()
+
+tracing.end()
+tracing.render_waterfall()
+
 # import streamlit as st
 # import requests
 # import pandas as pd
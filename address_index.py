@@ -0,0 +1,118 @@
+import mmap
+import os
+import sys
+import threading
+import time
+
+# Offline address suggestions from a prebuilt, memory-mapped prefix index.
+#
+# scripts/build_address_index.py turns a bulk address file (OpenAddresses)
+# into data/address_index.bin: a header, an array of record offsets in
+# normalized-address order, then the records. A lookup binary-searches the
+# offsets for the typed prefix and reads the next few records straight out
+# of the mapping. Nothing is parsed at load time, and every process on the
+# host shares the same pages through the OS page cache.
+#
+# Matches are by prefix of the address as written in the source file, and
+# equal prefixes come back in alphabetical order (typing the city narrows
+# them). The index is optional: without the file, or on a miss,
+# address_service asks Nominatim as before.
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "address_index.bin")
+MAGIC = b"ADDRIDX1"
+HEADER_SIZE = 24          # magic, record count (u64), data offset (u64)
+FIELD_SEP = b"\x1f"       # key \x1f display name \x1f lat \x1f lon \n
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+_stats = {"queries": 0, "hits": 0, "load_ms": None}
+_stats_lock = threading.Lock()
+
+
+def _count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+class AddressIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != MAGIC:
+            raise ValueError(f"{path} is not an address index")
+        # Offsets are written little-endian and read in place as native u64s.
+        if sys.byteorder != "little":
+            raise ValueError("address index needs a little-endian host")
+        self.count = int.from_bytes(self._map[8:16], "little")
+        self._data = int.from_bytes(self._map[16:24], "little")
+        self._offsets = memoryview(self._map)[HEADER_SIZE:HEADER_SIZE + 8 * self.count].cast("Q")
+        self.bytes = len(self._map)
+
+    def _key(self, i):
+        start = self._data + self._offsets[i]
+        return self._map[start:self._map.find(FIELD_SEP, start)]
+
+    def _record(self, i):
+        start = self._data + self._offsets[i]
+        line = self._map[start:self._map.find(b"\n", start)]
+        # (display_name, lat, lon), the fields of address_service.Suggestion.
+        return tuple(line.decode("utf-8").split("\x1f")[1:])
+
+    def suggest(self, prefix, limit):
+        # First `limit` records whose key starts with `prefix` (normalized).
+        wanted = prefix.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < wanted:
+                lo = mid + 1
+            else:
+                hi = mid
+        results = []
+        while lo < self.count and len(results) < limit and self._key(lo).startswith(wanted):
+            results.append(self._record(lo))
+            lo += 1
+        return results
+
+
+def load(path=INDEX_PATH):
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            if os.path.exists(path):
+                start = time.perf_counter()
+                try:
+                    _index = AddressIndex(path)
+                    with _stats_lock:
+                        _stats["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    print(f"✅ Address index mapped: {_index.count:,} addresses ({_index.bytes / 1e6:.1f} MB)")
+                except Exception as e:
+                    print(f"❌ ADDRESS INDEX FAILURE: {e}")
+                    _index = None
+            _index_loaded = True
+    return _index
+
+
+def suggest(key, limit):
+    # `key` is already normalized (address_service.normalize_query).
+    index = load()
+    if index is None:
+        return []
+    _count("queries")
+    results = index.suggest(key, limit)
+    if results:
+        _count("hits")
+    return results
+
+
+def index_stats():
+    index = load()
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["loaded"] = index is not None
+    stats["addresses"] = index.count if index else 0
+    stats["bytes"] = index.bytes if index else 0
+    return stats
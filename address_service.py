@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import address_index
+import http_client
+from rate_limit import TokenBucket
+from singleflight import SingleFlight
+
+# Address autocomplete via OpenStreetMap Nominatim.
+#
+# Streamlit reruns the whole script on every widget change, so the same query
+# arrives many times per session. Everything here is process-wide: one cache
+# and one rate limiter shared by every session, which is what Nominatim's
+# usage policy (max 1 request/second per application) actually counts.
+# Concurrent misses for the same query share one upstream request.
+#
+# search() is the as-you-type entry point. Lookups run on a small pool and
+# each session only ever wants its newest query: a lookup still queued for
+# a Nominatim slot when every session that asked for it has typed something
+# newer is dropped without being sent, and a keystroke's rerun waits at most
+# SEARCH_WAIT_SECONDS before showing "searching" instead of blocking.
+#
+# When data/address_index.bin is deployed (see address_index.py), queries it
+# can answer never reach the cache or Nominatim at all.
+
+# Overridable so scripts/load_test.py can point us at a local stand-in.
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+RESULT_LIMIT = 5
+
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_MAX_ENTRIES = 5000
+RATE_PER_SECOND = 1.0
+RATE_WAIT_SECONDS = 2.0   # longest a rerun will queue for an upstream slot
+MIN_QUERY_CHARS = 4
+SEARCH_WAIT_SECONDS = 1.0
+SEARCH_WORKERS = 4
+MAX_TRACKED_SESSIONS = 10000
+
+# All we keep of a Nominatim result. The rest of its JSON (address details,
+# bounding box, licence text) was never read, yet sat in the shared cache
+# and in every session's searchbox state.
+Suggestion = namedtuple("Suggestion", "display_name lat lon")
+
+_limiter = TokenBucket(RATE_PER_SECOND, capacity=1)
+_cache = OrderedDict()    # normalized query -> (expires_at, results)
+_cache_lock = threading.Lock()
+_flight = SingleFlight()
+_stats = {"hits": 0, "prefix_hits": 0, "misses": 0, "rate_limited": 0, "errors": 0, "superseded": 0}
+
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="address-search")
+_latest = OrderedDict()   # session id -> the query that session is waiting on
+_wanted = Counter()       # query -> sessions waiting on it
+_pending = {}             # query -> Future of its lookup
+_search_lock = threading.Lock()
+
+
+def normalize_query(search_term):
+    return " ".join(search_term.lower().replace(",", " ").split())
+
+
+def _cache_get(key, now):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < now:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return entry[1]
+
+
+def _cache_put(key, results, now):
+    _cache[key] = (now + CACHE_TTL_SECONDS, results)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def _matches(result, words):
+    haystack = normalize_query(result.display_name).split()
+    return all(any(h.startswith(w) for h in haystack) for w in words)
+
+
+def _from_prefix(key, now):
+    # If a shorter query of whole leading words came back with fewer than
+    # RESULT_LIMIT results, that list was complete; narrowing it locally is
+    # as good as asking Nominatim again. A prefix that cuts a word ("123
+    # mai") doesn't count: Nominatim matches whole words, so its answer
+    # says nothing about "123 main".
+    words = key.split()
+    for n in range(len(words) - 1, 0, -1):
+        prefix = " ".join(words[:n])
+        if len(prefix) < MIN_QUERY_CHARS:
+            break
+        cached = _cache_get(prefix, now)
+        if cached is None or len(cached) >= RESULT_LIMIT:
+            continue
+        narrowed = [r for r in cached if _matches(r, words)]
+        if narrowed:
+            return narrowed
+    return None
+
+
+def _fetch(search_term):
+    params = {"q": search_term, "format": "json", "limit": RESULT_LIMIT, "countrycodes": "us"}
+    try:
+        results = http_client.get_json("nominatim", NOMINATIM_URL, params=params)
+    except http_client.HttpError as e:
+        print(f"⚠️ Address search failed: {e}")
+        return None
+    return [Suggestion(r.get("display_name", ""), r.get("lat"), r.get("lon")) for r in results]
+
+
+def _lookup_cached(key):
+    offline = address_index.suggest(key, RESULT_LIMIT)
+    if offline:
+        return [Suggestion._make(r) for r in offline]
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache_get(key, now)
+        if cached is not None:
+            _stats["hits"] += 1
+            return cached
+        narrowed = _from_prefix(key, now)
+        if narrowed is not None:
+            _stats["prefix_hits"] += 1
+            return narrowed
+        _stats["misses"] += 1
+    return None
+
+
+def get_osm_addresses(search_term):
+    if not search_term:
+        return []
+    key = normalize_query(search_term)
+    if not key:
+        return []
+
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    return _flight.do(key, lambda: _fetch_and_cache(key, search_term))
+
+
+def _want(session_id, key):
+    with _search_lock:
+        previous = _latest.pop(session_id, None)
+        if previous is not None:
+            _wanted[previous] -= 1
+            if _wanted[previous] <= 0:
+                del _wanted[previous]
+        _latest[session_id] = key
+        _wanted[key] += 1
+        while len(_latest) > MAX_TRACKED_SESSIONS:
+            _, dropped = _latest.popitem(last=False)
+            _wanted[dropped] -= 1
+            if _wanted[dropped] <= 0:
+                del _wanted[dropped]
+
+
+def _abandoned(key):
+    return _wanted.get(key, 0) <= 0
+
+
+def _lookup_future(key, search_term):
+    with _search_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        future = _pending[key] = _search_pool.submit(
+            _flight.do, key, lambda: _fetch_and_cache(key, search_term, cancelled=lambda: _abandoned(key))
+        )
+    # Outside the lock: a lookup that already finished runs this right here.
+    future.add_done_callback(lambda _: _forget_pending(key, future))
+    return future
+
+
+def _forget_pending(key, future):
+    with _search_lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+
+
+def search(search_term, session_id, timeout=SEARCH_WAIT_SECONDS):
+    # Returns suggestions, or None if the lookup is still running after
+    # `timeout`; it carries on in the background and lands in the cache.
+    key = normalize_query(search_term or "")
+    if len(key) < MIN_QUERY_CHARS:
+        return []
+    _want(session_id, key)
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    try:
+        return _lookup_future(key, search_term).result(timeout)
+    except FutureTimeout:
+        return None
+
+
+def cached(search_term):
+    # What search() can answer right now without a lookup, or None.
+    key = normalize_query(search_term or "")
+    return _lookup_cached(key) if len(key) >= MIN_QUERY_CHARS else None
+
+
+def search_done(search_term):
+    # True once no lookup for this query is in flight any more.
+    with _search_lock:
+        return normalize_query(search_term or "") not in _pending
+
+
+def _fetch_and_cache(key, search_term, cancelled=None):
+    if not _limiter.acquire(RATE_WAIT_SECONDS, cancelled):
+        with _cache_lock:
+            if cancelled is not None and cancelled():
+                _stats["superseded"] += 1
+            else:
+                _stats["rate_limited"] += 1
+        return []
+
+    results = _fetch(search_term)
+    if results is None:
+        with _cache_lock:
+            _stats["errors"] += 1
+        return []
+    with _cache_lock:
+        _cache_put(key, results, time.monotonic())
+    return results
+
+
+def cache_stats():
+    with _cache_lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+    stats["coalesced"] = _flight.stats()["coalesced"]
+    lookups = stats["hits"] + stats["prefix_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["hits"] + stats["prefix_hits"]) / lookups if lookups else 0.0
+    return stats
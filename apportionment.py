@@ -0,0 +1,25 @@
+# Every House seat in the current apportionment, by district code.
+#
+# Shared by scripts/refresh_roster.py, which writes one roster entry per
+# seat, and district_service.py, which falls back to it to check typed
+# district codes when no roster is deployed.
+
+# Seats per state from the 2020 census apportionment. Single-seat states are
+# at-large and numbered 0, like Geocodio does.
+APPORTIONMENT = {
+    "AL": 7, "AK": 1, "AZ": 9, "AR": 4, "CA": 52, "CO": 8, "CT": 5, "DE": 1, "FL": 28, "GA": 14,
+    "HI": 2, "ID": 2, "IL": 17, "IN": 9, "IA": 4, "KS": 4, "KY": 6, "LA": 6, "ME": 2, "MD": 8,
+    "MA": 9, "MI": 13, "MN": 8, "MS": 4, "MO": 8, "MT": 2, "NE": 3, "NV": 4, "NH": 2, "NJ": 12,
+    "NM": 3, "NY": 26, "NC": 14, "ND": 1, "OH": 15, "OK": 5, "OR": 6, "PA": 17, "RI": 2, "SC": 7,
+    "SD": 1, "TN": 9, "TX": 38, "UT": 4, "VT": 1, "VA": 11, "WA": 10, "WV": 2, "WI": 8, "WY": 1,
+}
+# Non-voting delegates. The Census boundary files number these 98.
+DELEGATES = ["AS", "DC", "GU", "MP", "PR", "VI"]
+
+
+def all_seats():
+    seats = []
+    for state, count in APPORTIONMENT.items():
+        seats.extend([f"{state}-0"] if count == 1 else [f"{state}-{n}" for n in range(1, count + 1)])
+    seats.extend(f"{state}-98" for state in DELEGATES)
+    return seats
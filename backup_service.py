@@ -1,31 +1,100 @@
+import threading
+import time
 import streamlit as st
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from streamlit_gsheets import GSheetsConnection
 
-def save_to_vault(name, email, district, rep_name):
+import metrics
+
+VAULT_WORKSHEET = "Sheet1"
+# Address is what scripts/regeocode_pledges.py re-geocodes after redistricting.
+VAULT_COLUMNS = ["Timestamp", "Name", "Email", "District", "Rep", "Address"]
+
+# One worksheet handle per process. Opening it costs an auth + metadata round
+# trip, so we do it once and reuse it for every pledge.
+_worksheet = None
+_worksheet_lock = threading.Lock()
+
+# Background vault writes. Kept small so a burst of signups can't blow
+# through the Sheets API write quota.
+_vault_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vault")
+
+
+def _open_vault_worksheet(vault_url):
+    import gspread
+
+    creds = dict(st.secrets["connections"]["gsheets"])
+    for key in ("spreadsheet", "worksheet"):
+        creds.pop(key, None)
+    client = gspread.service_account_from_dict(creds)
+    worksheet = client.open_by_url(vault_url).worksheet(VAULT_WORKSHEET)
+
+    # A brand new vault has no header row yet; write it once. A vault from
+    # before the Address column just gets the new heading.
+    header = worksheet.row_values(1)
+    if not header:
+        worksheet.append_row(VAULT_COLUMNS, value_input_option="RAW")
+    elif header == VAULT_COLUMNS[:-1]:
+        worksheet.update_cell(1, len(VAULT_COLUMNS), VAULT_COLUMNS[-1])
+    return worksheet
+
+
+def get_vault_worksheet():
+    global _worksheet
+    if _worksheet is not None:
+        return _worksheet
     vault_url = st.secrets.get("BACKUP_URL")
     if not vault_url:
-        print("⚠️ BACKUP_URL not set in secrets - skipping backup")
-        return False
+        return None
+    with _worksheet_lock:
+        if _worksheet is None:
+            with metrics.timed("sheets_open"):
+                _worksheet = _open_vault_worksheet(vault_url)
+    return _worksheet
+
+
+def vault_row(name, email, district, rep_name, address=""):
+    return [datetime.now().strftime("%Y-%m-%d %H:%M:%S"), name, email, district, rep_name, address or ""]
+
+
+def save_to_vault(name, email, district, rep_name, worksheet=None, address=""):
+    # Append-only: one pledge is one `values.append` call, no matter how big
+    # the vault is. Sheets applies appends atomically, so two overlapping
+    # signups can no longer overwrite each other's row.
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        existing_data = conn.read(spreadsheet=vault_url, worksheet="Sheet1", ttl=0)
-        
-        new_row = pd.DataFrame([{
-            "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Name": name,
-            "Email": email,
-            "District": district,
-            "Rep": rep_name
-        }])
-        
-        if existing_data is None: updated_df = new_row
-        else: updated_df = pd.concat([existing_data, new_row], ignore_index=True)
-
-        conn.update(spreadsheet=vault_url, worksheet="Sheet1", data=updated_df)
+        if worksheet is None:
+            worksheet = get_vault_worksheet()
+        if worksheet is None:
+            print("⚠️ BACKUP_URL not set in secrets - skipping backup")
+            return False
+
+        with metrics.timed("sheets_vault"):
+            worksheet.append_row(
+                vault_row(name, email, district, rep_name, address),
+                value_input_option="RAW",
+                insert_data_option="INSERT_ROWS",
+                table_range="A1",
+            )
         print("✅ Backup Saved.")
         return True
     except Exception as e:
         print(f"❌ VAULT FAILURE: {e}")
         return False
+
+
+def _log_vault_result(future, started):
+    elapsed = time.monotonic() - started
+    if future.exception() is not None:
+        print(f"❌ VAULT FAILURE after {elapsed:.2f}s: {future.exception()}")
+    elif not future.result():
+        print(f"⚠️ Vault write did not complete ({elapsed:.2f}s)")
+    else:
+        print(f"🕒 Vault write finished in {elapsed:.2f}s")
+
+
+def save_to_vault_async(name, email, district, rep_name, address=""):
+    # Fire-and-forget: the user's result never waits on the vault.
+    started = time.monotonic()
+    future = _vault_pool.submit(save_to_vault, name, email, district, rep_name, address=address)
+    future.add_done_callback(lambda f: _log_vault_result(f, started))
+    return future
@@ -0,0 +1,302 @@
+import json
+import math
+import os
+import re
+import threading
+
+import streamlit as st
+
+import geocode_cache
+import http_client
+from apportionment import all_seats
+from singleflight import SingleFlight
+
+# Congressional district lookup.
+#
+# Nominatim already gives us lat/lon for every suggestion, so we first try an
+# offline point-in-polygon lookup against a grid index built by
+# scripts/build_district_index.py. Geocodio is only called when the point is
+# on or near a boundary, outside the index, or the index isn't deployed.
+# Representatives come from the roster built by scripts/refresh_roster.py.
+# Geocodio answers are kept in geocode_cache (on disk, shared by every
+# process) and concurrent lookups for the same address share one request.
+
+# Overridable so scripts/load_test.py can point us at a local stand-in.
+GEOCODIO_URL = os.environ.get("GEOCODIO_URL", "https://api.geocod.io/v1.7/geocode")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DISTRICT_INDEX_PATH = os.path.join(DATA_DIR, "district_index.json")
+ROSTER_PATH = os.path.join(DATA_DIR, "roster.json")
+
+# A point closer than this (in degrees, roughly 50 m) to a district edge is
+# treated as ambiguous and sent to Geocodio.
+BOUNDARY_EPSILON = 0.0005
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+_roster = None
+_roster_loaded = False
+_roster_lock = threading.Lock()
+
+# Reps learned from Geocodio answers; only used when no roster is deployed.
+_rep_by_district = {}
+# Without a roster, typed district codes are checked against the apportionment.
+_known_seats = frozenset(all_seats())
+_stats = {"offline": 0, "ambiguous": 0, "outside_index": 0, "geocodio": 0, "errors": 0}
+_stats_lock = threading.Lock()
+_flight = SingleFlight()
+
+
+def _count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+def _prepare_ring(ring):
+    xs = tuple(float(p[0]) for p in ring)
+    ys = tuple(float(p[1]) for p in ring)
+    return (min(xs), min(ys), max(xs), max(ys), xs, ys)
+
+
+def load_index(path=DISTRICT_INDEX_PATH):
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            if os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        raw = json.load(f)
+                    _index = {
+                        "version": raw.get("version"),
+                        "cell_size": raw["cell_size"],
+                        "cells": raw["cells"],
+                        "districts": {
+                            code: [_prepare_ring(r) for r in rings] for code, rings in raw["districts"].items()
+                        },
+                    }
+                    print(f"✅ District index loaded: {len(_index['districts'])} districts")
+                except Exception as e:
+                    print(f"❌ DISTRICT INDEX FAILURE: {e}")
+                    _index = None
+            _index_loaded = True
+    return _index
+
+
+def index_version():
+    index = load_index()
+    return index["version"] if index else None
+
+
+def load_roster(path=ROSTER_PATH):
+    global _roster, _roster_loaded
+    if _roster_loaded:
+        return _roster
+    with _roster_lock:
+        if not _roster_loaded:
+            if os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        _roster = json.load(f)
+                    print(f"✅ Roster loaded: {len(_roster['districts'])} seats ({_roster.get('generated')})")
+                except Exception as e:
+                    print(f"❌ ROSTER FAILURE: {e}")
+                    _roster = None
+            _roster_loaded = True
+    return _roster
+
+
+def normalize_district_code(code):
+    # "ny-07", "NY 7" and "NY-7" all mean the same seat; "AK-AL" (at large)
+    # is "AK-0", the way Geocodio numbers it.
+    match = re.fullmatch(r"\s*([A-Za-z]{2})\s*-?\s*(\d{1,2}|AL)\s*", code or "", re.IGNORECASE)
+    if not match:
+        return None
+    number = match.group(2).upper()
+    return f"{match.group(1).upper()}-{0 if number == 'AL' else int(number)}"
+
+
+def _sole_seat(state):
+    # The one seat of an at-large state ("AK-0") or a delegate ("DC-98"), if
+    # the roster (or, without one, the apportionment) has it.
+    roster = load_roster()
+    seats = roster["districts"] if roster is not None else _known_seats
+    for code in (f"{state}-0", f"{state}-98"):
+        if code in seats:
+            return code
+    return None
+
+
+def lookup_rep(code):
+    roster = load_roster()
+    if roster is not None:
+        return roster["districts"].get(code)
+    return _rep_by_district.get(code)
+
+
+def resolve_manual_district(code):
+    # For people who type their district instead of an address. Seats the
+    # roster (or, without one, the apportionment) doesn't have are rejected.
+    # A single-seat state is found however it is written: "AK", "AK-AL",
+    # "AK-1", "AK-01", "DC".
+    text = (code or "").strip().upper()
+    if re.fullmatch(r"[A-Z]{2}", text):
+        code = _sole_seat(text)
+    else:
+        code = normalize_district_code(text)
+        if code is not None and code.split("-")[1] in ("0", "1", "98"):
+            code = _sole_seat(code.split("-")[0]) or code
+    if code is None:
+        return None, None
+    roster = load_roster()
+    if code not in (roster["districts"] if roster is not None else _known_seats):
+        return None, None
+    return code, lookup_rep(code) or "Unknown"
+
+
+def _contains(rings, x, y):
+    # Even-odd rule over every ring of the district, so holes and
+    # multi-part districts both work without knowing which ring is which.
+    inside = False
+    for min_x, min_y, max_x, max_y, xs, ys in rings:
+        if x < min_x or x > max_x or y < min_y or y > max_y:
+            continue
+        j = len(xs) - 1
+        for i in range(len(xs)):
+            if (ys[i] > y) != (ys[j] > y) and x < (xs[j] - xs[i]) * (y - ys[i]) / (ys[j] - ys[i]) + xs[i]:
+                inside = not inside
+            j = i
+    return inside
+
+
+def lookup_point(lat, lon):
+    # Returns a district code like "NY-14", or None when the index can't
+    # answer with certainty.
+    return _locate(lat, lon)[0]
+
+
+def _locate(lat, lon):
+    # Returns (code, None) or (None, why): "outside_index" when no district
+    # covers the point, "ambiguous" when it sits on or near an edge.
+    index = load_index()
+    if index is None:
+        return None, None
+    size = index["cell_size"]
+    cell = index["cells"].get(f"{math.floor(lon / size)},{math.floor(lat / size)}")
+    if cell is None:
+        return None, "outside_index"
+    if isinstance(cell, str):
+        return cell, None
+
+    districts = index["districts"]
+    hits = [code for code in cell if _contains(districts[code], lon, lat)]
+    if not hits:
+        return None, "outside_index"
+    if len(hits) > 1:
+        return None, "ambiguous"
+    rings = districts[hits[0]]
+    e = BOUNDARY_EPSILON
+    for dx, dy in ((e, 0), (-e, 0), (0, e), (0, -e)):
+        if not _contains(rings, lon + dx, lat + dy):
+            return None, "ambiguous"
+    return hits[0], None
+
+
+def parse_geocodio_results(results):
+    # Shared by the single lookup below and scripts/regeocode_pledges.py.
+    if results:
+        data = results[0]
+        if "congressional_districts" in data.get("fields", {}):
+            dist_data = data["fields"]["congressional_districts"][0]
+            state = data.get("address_components", {}).get("state")
+            dist_num = dist_data.get("district_number")
+            rep_name = "Vacant"
+            for leg in dist_data.get("current_legislators", []):
+                if leg.get("type") == "representative":
+                    rep = leg.get("bio", {})
+                    rep_name = f"{rep.get('first_name','')} {rep.get('last_name','')}".strip()
+                    break
+            return f"{state}-{dist_num}", rep_name
+    return None, None
+
+
+def _address_key(address):
+    return geocode_cache.canonical_address(address)
+
+
+def _geocodio_district(address):
+    try:
+        params = {"q": address, "fields": "cd", "api_key": st.secrets["GEOCODIO_API_KEY"]}
+    except Exception:
+        print("⚠️ GEOCODIO_API_KEY not set in secrets - skipping district lookup")
+        return None, None
+    try:
+        data = http_client.get_json("geocodio", GEOCODIO_URL, params=params)
+        return parse_geocodio_results(data.get("results", []))
+    except http_client.HttpError as e:
+        print(f"⚠️ District lookup failed: {e}")
+        _count("errors")
+        return None, None
+
+
+def get_district(address, lat=None, lon=None):
+    if not address:
+        return None, None
+
+    code = None
+    if lat is not None and lon is not None:
+        try:
+            code, why = _locate(float(lat), float(lon))
+        except (TypeError, ValueError):
+            code, why = None, None
+        rep_name = lookup_rep(code) if code else None
+        if rep_name is not None:
+            _count("offline")
+            return code, rep_name
+        if why:
+            _count(why)
+
+    generation = cache_generation()
+    cached = geocode_cache.get(address, generation)
+    if cached is not None:
+        dist, rep_name = cached
+    else:
+        dist, rep_name = _flight.do(_address_key(address), lambda: _geocodio_and_cache(address, generation))
+    if dist:
+        # The roster is the single source of truth for vacancies and
+        # special elections; Geocodio's legislator list is only a fallback.
+        _rep_by_district[dist] = rep_name
+        rep_name = lookup_rep(dist) or rep_name
+    if code:
+        # The index placed the point but no roster names its rep: Geocodio
+        # was only asked for the rep, the district stays the index's.
+        if dist != code:
+            rep_name = lookup_rep(code) or "Unknown"
+        return code, rep_name
+    return dist, rep_name
+
+
+def cache_generation():
+    # District answers are valid for one Congress and one index build.
+    return f"{geocode_cache.current_congress()}:{index_version() or '-'}"
+
+
+def _geocodio_and_cache(address, generation):
+    # Only the single-flight leader gets here, so followers aren't counted.
+    _count("geocodio")
+    dist, rep_name = _geocodio_district(address)
+    if dist:
+        geocode_cache.put(address, dist, rep_name, generation)
+    return dist, rep_name
+
+
+def lookup_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["coalesced"] = _flight.stats()["coalesced"]
+    stats["index_loaded"] = load_index() is not None
+    roster = load_roster()
+    stats["roster_generated"] = roster.get("generated") if roster else None
+    return stats
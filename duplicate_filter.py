@@ -0,0 +1,98 @@
+import hashlib
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import outbox_service
+
+# Emails we already know have signed, kept in memory so "Continue" can turn
+# a repeat signer away before we spend a verification email and a Worker
+# round trip on them. Only signups the Worker confirmed go in: the vault is
+# written before the Worker answers, so an email there may be a pledge that
+# never landed.
+#
+# Each email is stored as a 64-bit hash: one sorted array for everything
+# loaded at boot (8 bytes per signer, ~8 MB for a million) plus a small set
+# for signups since, folded into the array once it grows. Lookups take no
+# lock. A hit is trusted: a false one needs a 64-bit hash collision. A miss
+# proves nothing (the filter may still be loading, or the pledge came in on
+# another instance), so the Worker's unique-email check still decides every
+# pledge that gets through.
+
+MERGE_AT = 4096   # recent hashes kept in the set before folding into the array
+
+_sorted = array("Q")
+_recent = set()
+_lock = threading.Lock()
+_loaded = False
+_stats = {"known": 0, "checks": 0, "rejected": 0, "load_ms": None}
+
+
+def _hash(email):
+    digest = hashlib.blake2b(email.strip().lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _merge_locked():
+    global _sorted
+    _sorted = array("Q", heapq.merge(_sorted, sorted(_recent)))
+    _recent.clear()
+
+
+def add(email):
+    if not email:
+        return
+    h = _hash(email)
+    with _lock:
+        if contains_hash(h):
+            return
+        _recent.add(h)
+        _stats["known"] += 1
+        if len(_recent) >= MERGE_AT:
+            _merge_locked()
+
+
+def contains_hash(h):
+    current = _sorted
+    i = bisect_left(current, h)
+    return (i < len(current) and current[i] == h) or h in _recent
+
+
+def contains(email):
+    found = bool(email) and contains_hash(_hash(email))
+    with _lock:
+        _stats["checks"] += 1
+        if found:
+            _stats["rejected"] += 1
+    return found
+
+
+def load():
+    # Bootstraps from the local outbox: pledges the Worker accepted or
+    # already had. Signups recorded while this runs stay in the recent set
+    # and survive the swap.
+    global _sorted, _loaded
+    start = time.perf_counter()
+    hashes = {_hash(e) for e in outbox_service.signed_emails()}
+    loaded = array("Q", sorted(hashes))
+    with _lock:
+        # Recent signups may already have been folded into the old array.
+        _recent.update(h for h in _sorted if h not in hashes)
+        _recent.difference_update(hashes)
+        _sorted = loaded
+        _merge_locked()
+        _stats["known"] = len(_sorted)
+        _stats["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        _loaded = True
+    print(f"✅ Duplicate filter loaded {len(loaded)} signed emails in {_stats['load_ms']} ms")
+    return len(loaded)
+
+
+def filter_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["loaded"] = _loaded
+    stats["bytes"] = _sorted.itemsize * len(_sorted)
+    return stats
@@ -0,0 +1,185 @@
+import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Disk-backed cache of address -> district lookups.
+#
+# Lives in SQLite (WAL mode) next to the app, so it survives restarts and
+# redeploys and is shared by every worker process on the host. Entries are
+# stamped with a "generation": the current Congress plus the district index
+# version. A new Congress (new maps, new reps) or a rebuilt index makes every
+# older entry a miss. Representatives are always re-read from the roster by
+# the caller, so a mid-term special election doesn't need an invalidation.
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geocode_cache.db")
+
+MAX_ENTRIES = 100000                  # ~15 MB on disk
+MAX_AGE_SECONDS = 90 * 24 * 60 * 60   # backstop for bad answers within a Congress
+EVICT_CHECK_EVERY = 200               # puts between size checks
+TOUCH_AFTER_SECONDS = 60 * 60         # last_used is only rewritten this often
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key TEXT PRIMARY KEY,
+    district TEXT NOT NULL,
+    rep_name TEXT,
+    generation TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode (last_used);
+"""
+
+_ABBREVIATIONS = {
+    "STREET": "ST", "AVENUE": "AVE", "ROAD": "RD", "DRIVE": "DR", "BOULEVARD": "BLVD",
+    "LANE": "LN", "COURT": "CT", "PLACE": "PL", "TERRACE": "TER", "PARKWAY": "PKWY",
+    "HIGHWAY": "HWY", "CIRCLE": "CIR", "APARTMENT": "APT", "SUITE": "STE",
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+_COUNTRY_SUFFIXES = (["UNITED", "STATES", "OF", "AMERICA"], ["UNITED", "STATES"], ["USA"], ["US"])
+
+_local = threading.local()
+_schema_path = None   # the cache file whose schema is known to exist
+_schema_lock = threading.Lock()
+_puts = 0
+_stats = {"hits": 0, "misses": 0, "stale": 0, "errors": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(stat, n=1):
+    with _stats_lock:
+        _stats[stat] += n
+
+
+def canonical_address(address):
+    # "123 Main Street, Springfield, IL, United States" and
+    # "123 main st springfield il" share a key.
+    words = re.sub(r"[^\w\s-]", " ", address.upper()).split()
+    for suffix in _COUNTRY_SUFFIXES:
+        if len(words) > len(suffix) and words[-len(suffix):] == suffix:
+            words = words[:-len(suffix)]
+            break
+    return " ".join(_ABBREVIATIONS.get(w, w) for w in words)
+
+
+def current_congress(today=None):
+    # The 1st Congress met in 1789; each one starts on January 3 of an odd year.
+    today = today or datetime.date.today()
+    year = today.year if today >= datetime.date(today.year, 1, 3) else today.year - 1
+    return (year - 1789) // 2 + 1
+
+
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != CACHE_PATH:
+        # busy timeout covers other processes holding the write lock
+        conn = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn, _local.path = conn, CACHE_PATH
+    _ensure_schema(conn, _local.path)
+    return conn
+
+
+def _ensure_schema(conn, path):
+    global _schema_path
+    if _schema_path == path:
+        return
+    with _schema_lock:
+        if _schema_path != path:
+            conn.executescript(_SCHEMA)
+            _schema_path = path
+
+
+def get(address, generation):
+    # Returns (district, rep_name) or None. Cache trouble is only ever a miss.
+    key = canonical_address(address)
+    if not key:
+        return None
+    now = time.time()
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT district, rep_name, generation, stored_at, last_used FROM geocode WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            _count("misses")
+            return None
+        district, rep_name, row_generation, stored_at, last_used = row
+        if row_generation != generation or now - stored_at > MAX_AGE_SECONDS:
+            _count("stale")
+            conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+            return None
+        if now - last_used > TOUCH_AFTER_SECONDS:
+            conn.execute("UPDATE geocode SET last_used = ? WHERE key = ?", (now, key))
+        _count("hits")
+        return district, rep_name
+    except sqlite3.Error as e:
+        print(f"⚠️ Geocode cache read failed: {e}")
+        _count("errors")
+        return None
+
+
+def put(address, district, rep_name, generation):
+    global _puts
+    key = canonical_address(address)
+    if not key or not district:
+        return
+    now = time.time()
+    try:
+        conn = _connect()
+        conn.execute(
+            "INSERT INTO geocode (key, district, rep_name, generation, stored_at, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET district = excluded.district, rep_name = excluded.rep_name, "
+            "generation = excluded.generation, stored_at = excluded.stored_at, last_used = excluded.last_used",
+            (key, district, rep_name, generation, now, now),
+        )
+        with _stats_lock:
+            _puts += 1
+            check = _puts % EVICT_CHECK_EVERY == 1
+        if check:
+            _evict(conn, generation, now)
+    except sqlite3.Error as e:
+        print(f"⚠️ Geocode cache write failed: {e}")
+        _count("errors")
+
+
+def _evict(conn, generation, now):
+    # Old generations go first, then least recently used down to 90% of
+    # MAX_ENTRIES so we don't evict again on the very next put.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        removed = conn.execute(
+            "DELETE FROM geocode WHERE generation != ? OR stored_at < ?", (generation, now - MAX_AGE_SECONDS)
+        ).rowcount
+        size = conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        if size > MAX_ENTRIES:
+            removed += conn.execute(
+                "DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY last_used LIMIT ?)",
+                (size - int(MAX_ENTRIES * 0.9),),
+            ).rowcount
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+    _count("evicted", removed)
+
+
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"] + stats["stale"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    try:
+        conn = _connect()
+        stats["entries"] = conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        stats["bytes"] = page_count * page_size
+    except sqlite3.Error:
+        stats["entries"] = stats["bytes"] = None
+    return stats
@@ -0,0 +1,114 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+import tracing
+
+# One process-wide HTTP client for every upstream we talk to.
+#
+# Each service gets its own requests.Session with a keep-alive connection
+# pool, so reruns and sessions reuse warm TCP+TLS connections instead of
+# handshaking on every call. Timeouts and retry policy live here, per
+# service, rather than being repeated at each call site.
+
+SERVICES = {
+    # urllib3 retries connection errors whatever the method, so the Worker
+    # gets none here: worker_client's retries and circuit breaker (and the
+    # outbox behind them) are the only retry loop for signups, and the
+    # stats poller simply tries again on its next tick.
+    "nominatim": {"timeout": 6, "retries": 0, "pool_size": 4, "headers": {"User-Agent": "The80PercentPledge/1.0"}},
+    "geocodio": {"timeout": 8, "retries": 2, "pool_size": 8, "headers": {}},
+    "worker": {"timeout": 10, "retries": 0, "pool_size": 16, "headers": {}},
+}
+
+RETRY_STATUSES = (502, 503, 504)
+
+
+class HttpError(Exception):
+    # `kind` is one of "timeout", "connection", "status" or "invalid" (the
+    # body wasn't the JSON we expected).
+    def __init__(self, service, kind, message, status=None):
+        super().__init__(f"{service} {kind}: {message}")
+        self.service = service
+        self.kind = kind
+        self.status = status
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session(service):
+    config = SERVICES[service]
+    retry = Retry(
+        total=config["retries"],
+        connect=config["retries"],
+        read=0,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        backoff_factor=0.3,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=config["pool_size"], max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(config["headers"])
+    return session
+
+
+def session_for(service):
+    session = _sessions.get(service)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(service)
+            if session is None:
+                session = _sessions[service] = _build_session(service)
+    return session
+
+
+def request(service, method, url, ok=(200,), metric=None, **kwargs):
+    # Returns the response when its status is in `ok`; raises HttpError
+    # for everything else, including network failures. Every call is
+    # recorded in metrics under `metric` (default: the service name).
+    kwargs.setdefault("timeout", SERVICES[service]["timeout"])
+    with tracing.span(f"http {metric or service}", method=method), metrics.timed(metric or service):
+        try:
+            response = session_for(service).request(method, url, **kwargs)
+        except requests.Timeout as e:
+            raise HttpError(service, "timeout", str(e)) from e
+        except requests.RequestException as e:
+            raise HttpError(service, "connection", str(e)) from e
+        if response.status_code not in ok:
+            raise HttpError(service, "status", f"HTTP {response.status_code} {response.text[:200]}", response.status_code)
+    return response
+
+
+def get(service, url, **kwargs):
+    return request(service, "GET", url, **kwargs)
+
+
+def post(service, url, **kwargs):
+    return request(service, "POST", url, **kwargs)
+
+
+def warm(service, url):
+    # Opens a pooled connection (TCP + TLS) ahead of the first real call.
+    # Any HTTP answer will do; only network failures are reported.
+    try:
+        session_for(service).head(url, timeout=SERVICES[service]["timeout"], allow_redirects=False)
+        return True
+    except requests.RequestException as e:
+        print(f"⚠️ Could not pre-open {service} connection: {e}")
+        return False
+
+
+def get_json(service, url, **kwargs):
+    response = get(service, url, **kwargs)
+    try:
+        return response.json()
+    except ValueError as e:
+        raise HttpError(service, "invalid", f"bad JSON: {e}", response.status_code) from e
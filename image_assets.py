@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+import threading
+
+# Logo and banner images.
+#
+# The originals are multi-megapixel JPG/PNG exports that st.image used to
+# read, hash and send on every rerun. scripts/build_images.py turns each slot
+# into a WebP resized to the width it is actually shown at (about 2x for
+# high-DPI phones) under static/img/. Those are served by Streamlit's static
+# file endpoint (server.enableStaticServing), so a rerun sends only the URL
+# and the browser fetches and caches the file once.
+#
+# Without a built variant the original is resized once per process and the
+# bytes are kept in memory. They're encoded in the original's format so
+# st.image passes them through instead of re-encoding on every rerun.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VARIANT_DIR = os.path.join(ROOT, "static", "img")
+STATIC_URL = "/app/static/img"
+WEBP_QUALITY = 80
+
+SLOTS = {
+    # The sidebar is ~300 CSS px wide; the wide-layout banner tops out ~1400
+    # (st.image downsizes anything wider than 1460 itself, on every rerun).
+    "logo": {"width": 600, "sources": ["Gemini_Generated_Image_1dkkh41dkkh41dkk.jpg", "logo.jpg", "logo.png"]},
+    "banner": {"width": 1400, "sources": ["banner.jpg", "banner.png"]},
+}
+
+_assets = {}     # slot -> static URL, bytes, or None if the slot has no image
+_assets_lock = threading.Lock()
+
+
+def find_source(slot):
+    for name in SLOTS[slot]["sources"]:
+        path = os.path.join(ROOT, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def variant_path(slot):
+    return os.path.join(VARIANT_DIR, f"{slot}.webp")
+
+
+def encode_variant(source_path, width, image_format="WEBP", quality=WEBP_QUALITY):
+    from PIL import Image
+
+    with Image.open(source_path) as img:
+        img = img.convert("RGBA" if "A" in img.getbands() and image_format != "JPEG" else "RGB")
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        if image_format == "WEBP":
+            img.save(out, "WEBP", quality=quality, method=6)
+        elif image_format == "JPEG":
+            img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            img.save(out, image_format, optimize=True)
+    return out.getvalue()
+
+
+def _load_uncached(slot):
+    source = find_source(slot)
+    variant = variant_path(slot)
+    if os.path.exists(variant) and (source is None or os.path.getmtime(variant) >= os.path.getmtime(source)):
+        with open(variant, "rb") as f:
+            version = hashlib.sha1(f.read()).hexdigest()[:10]
+        # The query string changes whenever the file does, so browsers can
+        # keep the old one cached without ever showing a stale image.
+        return f"{STATIC_URL}/{slot}.webp?v={version}"
+    if source is None:
+        return None
+    print(f"⚠️ No built variant for {slot}; run scripts/build_images.py. Resizing {os.path.basename(source)} in memory.")
+    try:
+        image_format = "PNG" if source.lower().endswith(".png") else "JPEG"
+        return encode_variant(source, SLOTS[slot]["width"], image_format)
+    except Exception as e:
+        print(f"⚠️ Could not resize {source}, sending the original: {e}")
+        with open(source, "rb") as f:
+            return f.read()
+
+
+def load(slot):
+    # Returns something st.image accepts: a static URL or encoded bytes.
+    if slot in _assets:
+        return _assets[slot]
+    with _assets_lock:
+        if slot not in _assets:
+            _assets[slot] = _load_uncached(slot)
+    return _assets[slot]
@@ -0,0 +1,443 @@
+import heapq
+import itertools
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from email.mime.text import MIMEText
+
+import streamlit as st
+
+import metrics
+
+# Outbound mail.
+#
+# A single scheduler thread drains a priority queue and spreads messages over
+# one or more SMTP transports (sender accounts or relays). Each transport keeps
+# a long-lived connection and a daily quota counted over a rolling 24 hours,
+# like Gmail counts it. Sends are logged in mail_sends.db, so the count
+# survives restarts and is shared by every process on the host; we stop
+# sending through an account before Gmail cuts it off, and a full account
+# just shifts traffic to the others. Callers get a ticket back immediately
+# and check its status later.
+#
+# Only a lack of capacity delays a message. An address the server refuses
+# fails at once without touching another account, and so does a message
+# every transport with capacity failed to send; neither is ever retried.
+#
+# Transports come from secrets:
+#
+#   [[mail_transports]]
+#   name = "gmail-2"
+#   host = "smtp.gmail.com"
+#   port = 465
+#   username = "another.sender@gmail.com"
+#   password = "app-password"
+#   daily_quota = 500
+#
+# Without any, the original Gmail account is used with EMAIL_PASSWORD.
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+EMAIL_ADDRESS = "the.80.percent.bill@gmail.com"
+SENDER_NAME = "The 80% Pledge"
+DEFAULT_DAILY_QUOTA = 500
+QUOTA_WINDOW_SECONDS = 24 * 60 * 60
+SEND_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mail_sends.db")
+
+# Gmail drops idle connections after a few minutes; past this we NOOP first.
+IDLE_CHECK_SECONDS = 60
+MAX_TRACKED_TICKETS = 10000
+
+# A transport that reports it is over quota is left alone for this long.
+QUOTA_COOLDOWN_SECONDS = 60 * 60
+# A first code that can't get a transport within this window fails, so the
+# user falls back to signing without verification instead of waiting.
+HIGH_PRIORITY_MAX_WAIT_SECONDS = 15
+
+# Priorities (lower goes first)
+HIGH = 0   # first verification code
+LOW = 1    # resends: delayed when capacity is short, never dropped for quota
+
+# Ticket states
+QUEUED = "queued"
+DELAYED = "delayed"
+SENT = "sent"
+FAILED = "failed"
+
+_heap = []               # (priority, not_before, seq, job)
+_heap_cond = threading.Condition()
+_seq = itertools.count()
+_status = OrderedDict()  # ticket -> state, oldest evicted first
+_status_lock = threading.Lock()
+_tickets = itertools.count(1)
+_worker = None
+_worker_lock = threading.Lock()
+_transports = None
+_stats = {"sent": 0, "failed": 0, "refused": 0, "delayed": 0, "logins": 0}
+_local = threading.local()
+
+
+def _count(stat):
+    with _status_lock:
+        _stats[stat] += 1
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def _is_refused(e):
+    # The server turned down this message or its address (550 no such user,
+    # 553 bad address, ...), not the account: another transport would only
+    # be refused too. Auth and sender problems belong to the transport.
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return True
+    return (
+        isinstance(e, smtplib.SMTPResponseException)
+        and not isinstance(e, (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused))
+        and 500 <= e.smtp_code < 600
+    )
+
+
+def _is_quota_error(e):
+    # Gmail: "550 5.4.5 Daily user sending limit exceeded" (or 421 4.7.0
+    # during bursts); most relays say "quota" somewhere.
+    text = str(e).lower()
+    return isinstance(e, smtplib.SMTPResponseException) and (
+        "5.4.5" in text or "quota" in text or "limit exceeded" in text
+    )
+
+
+class SmtpConnection:
+    def __init__(self, host, port, username, password, use_ssl=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.server = None
+        self.last_used = 0.0
+
+    def _open(self):
+        self.close()
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=20)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=20)
+        if self.password:
+            server.login(self.username, self.password)
+        _count("logins")
+        self.server = server
+
+    def _alive(self):
+        if self.server is None:
+            return False
+        if time.monotonic() - self.last_used < IDLE_CHECK_SECONDS:
+            return True
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def ensure_open(self):
+        if not self._alive():
+            self._open()
+
+    def send(self, to_email, message):
+        # One reconnect + re-login on a dropped or expired session, then give up.
+        for attempt in range(2):
+            if not self._alive():
+                self._open()
+            try:
+                self.server.sendmail(self.username, to_email, message)
+                self.last_used = time.monotonic()
+                return
+            except smtplib.SMTPResponseException as e:
+                if _is_quota_error(e):
+                    self.close()
+                    raise QuotaExceeded(str(e)) from e
+                if not isinstance(e, smtplib.SMTPSenderRefused) or attempt:
+                    raise
+                self.close()
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+        self.server = None
+
+
+def _log():
+    # One connection per thread: the scheduler writes, sessions read counts.
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != SEND_LOG_PATH:
+        conn = sqlite3.connect(SEND_LOG_PATH, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS sends (id INTEGER PRIMARY KEY, transport TEXT NOT NULL, sent_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sends_window ON sends (transport, sent_at)")
+        _local.conn, _local.path = conn, SEND_LOG_PATH
+    return conn
+
+
+class Transport:
+    def __init__(self, name, host, port, username, password, daily_quota, use_ssl=True):
+        self.name = name
+        self.sender = username
+        self.daily_quota = daily_quota
+        self.connection = SmtpConnection(host, port, username, password, use_ssl)
+        self.cooldown_until = 0.0
+
+    def remaining(self):
+        since = time.time() - QUOTA_WINDOW_SECONDS
+        sent = _log().execute("SELECT COUNT(*) FROM sends WHERE transport = ? AND sent_at > ?", (self.name, since)).fetchone()[0]
+        return max(0, self.daily_quota - sent)
+
+    def reserve(self):
+        # Counts a send against the window before it is attempted; returns the
+        # log row to release if nothing goes out, or None when the quota is used.
+        now = time.time()
+        conn = _log()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM sends WHERE transport = ? AND sent_at <= ?", (self.name, now - QUOTA_WINDOW_SECONDS))
+            sent = conn.execute("SELECT COUNT(*) FROM sends WHERE transport = ?", (self.name,)).fetchone()[0]
+            row = None
+            if sent < self.daily_quota:
+                row = conn.execute("INSERT INTO sends (transport, sent_at) VALUES (?, ?)", (self.name, now)).lastrowid
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def release(self, row):
+        _log().execute("DELETE FROM sends WHERE id = ?", (row,))
+
+    def seconds_until_available(self):
+        if self.remaining() > 0:
+            return 0.0
+        # Full: the next slot frees when the oldest send in the window ages out.
+        since = time.time() - QUOTA_WINDOW_SECONDS
+        oldest = _log().execute(
+            "SELECT MIN(sent_at) FROM sends WHERE transport = ? AND sent_at > ?", (self.name, since)
+        ).fetchone()[0]
+        return max(0.0, oldest - since) if oldest is not None else 0.0
+
+    def ready(self, now):
+        return now >= self.cooldown_until and self.remaining() >= 1
+
+    def cool_down(self, now):
+        self.cooldown_until = now + QUOTA_COOLDOWN_SECONDS
+
+
+def _load_transports():
+    configured = st.secrets.get("mail_transports", [])
+    if not configured:
+        configured = [{"name": "gmail", "username": EMAIL_ADDRESS, "password": st.secrets["EMAIL_PASSWORD"]}]
+    return [
+        Transport(
+            name=t.get("name", t["username"]),
+            host=t.get("host", SMTP_HOST),
+            port=int(t.get("port", SMTP_PORT)),
+            username=t["username"],
+            password=t.get("password", ""),
+            daily_quota=int(t.get("daily_quota", DEFAULT_DAILY_QUOTA)),
+            use_ssl=t.get("ssl", True),
+        )
+        for t in configured
+    ]
+
+
+def _set_status(ticket, state):
+    with _status_lock:
+        _status[ticket] = state
+        _status.move_to_end(ticket)
+        while len(_status) > MAX_TRACKED_TICKETS:
+            _status.popitem(last=False)
+
+
+def _push(priority, not_before, job):
+    with _heap_cond:
+        heapq.heappush(_heap, (priority, not_before, next(_seq), job))
+        _heap_cond.notify()
+
+
+def _pop_due():
+    # Highest priority first; within a priority, whatever is due soonest.
+    # The queue only ever holds a handful of delayed resends, so a scan is fine.
+    with _heap_cond:
+        while True:
+            now = time.monotonic()
+            due = [item for item in _heap if item[1] <= now]
+            if due:
+                item = min(due, key=lambda i: i[:3])
+                _heap.remove(item)
+                heapq.heapify(_heap)
+                return item
+            _heap_cond.wait(min(item[1] for item in _heap) - now if _heap else None)
+
+
+def _build_message(transport, to_email, subject, body):
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = f"{SENDER_NAME} <{transport.sender}>"
+    msg['To'] = to_email
+    return msg.as_string()
+
+
+def _deliver(job):
+    # Transports with the most remaining capacity go first, which spreads
+    # load across accounts. Returns SENT, FAILED (refused, or every transport
+    # that tried failed), or None when no transport has capacity right now.
+    now = time.monotonic()
+    ready = sorted((t for t in _transports if t.ready(now)), key=lambda t: t.remaining() / t.daily_quota, reverse=True)
+    failed = False
+    for transport in ready:
+        row = transport.reserve()
+        if row is None:
+            continue
+        try:
+            with metrics.timed("smtp"):
+                transport.connection.send(job["to"], _build_message(transport, job["to"], job["subject"], job["body"]))
+            return SENT
+        except QuotaExceeded as e:
+            # Gmail counts differently from us; trust it and rest the account.
+            print(f"⚠️ Mail transport {transport.name} hit its quota: {e}")
+            transport.cool_down(now)
+        except Exception as e:
+            # Nothing went out, so the send doesn't count against the quota.
+            transport.release(row)
+            if _is_refused(e):
+                print(f"Email to {job['to']} refused: {e}")
+                _count("refused")
+                return FAILED
+            if isinstance(e, smtplib.SMTPAuthenticationError):
+                transport.cool_down(now)
+            print(f"Email failed via {transport.name}: {e}")
+            failed = True
+    return FAILED if failed else None
+
+
+def _next_capacity_in(now):
+    return min(max(t.cooldown_until - now, t.seconds_until_available()) for t in _transports)
+
+
+def _open_connections():
+    global _transports
+    try:
+        if _transports is None:
+            _transports = _load_transports()
+    except Exception as e:
+        print(f"⚠️ Mail transports not configured: {e}")
+        return
+    for transport in _transports:
+        try:
+            transport.connection.ensure_open()
+        except Exception as e:
+            print(f"⚠️ Could not pre-open mail transport {transport.name}: {e}")
+
+
+def _schedule_forever():
+    global _transports
+    while True:
+        priority, _, _, job = _pop_due()
+        if job.get("warm_up"):
+            _open_connections()
+            continue
+        try:
+            if _transports is None:
+                _transports = _load_transports()
+            outcome = _deliver(job)
+            if outcome == SENT:
+                _count("sent")
+                _set_status(job["ticket"], SENT)
+                continue
+            if outcome == FAILED:
+                # SILENT FAILURE: the caller skips verification
+                _count("failed")
+                _set_status(job["ticket"], FAILED)
+                continue
+
+            now = time.monotonic()
+            retry_at = now + max(1.0, _next_capacity_in(now))
+            if priority == HIGH and retry_at - job["created"] > HIGH_PRIORITY_MAX_WAIT_SECONDS:
+                print("Email failed (no transport capacity)")
+                _count("failed")
+                _set_status(job["ticket"], FAILED)
+            else:
+                _count("delayed")
+                _set_status(job["ticket"], DELAYED)
+                _push(priority, retry_at, job)
+        except Exception as e:
+            print(f"Email failed: {e}")
+            _count("failed")
+            _set_status(job["ticket"], FAILED)
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_schedule_forever, name="mail-scheduler", daemon=True)
+            _worker.start()
+
+
+def send_message(to_email, subject, body, priority=HIGH):
+    ticket = next(_tickets)
+    if "@" not in (to_email or ""):
+        # No server would take it; don't spend a send finding that out.
+        _count("refused")
+        _count("failed")
+        _set_status(ticket, FAILED)
+        return ticket
+    _set_status(ticket, QUEUED)
+    _ensure_worker()
+    job = {"ticket": ticket, "to": to_email, "subject": subject, "body": body, "created": time.monotonic()}
+    _push(priority, 0.0, job)
+    return ticket
+
+
+def warm_up():
+    # Logs every transport in on the scheduler thread (the only one that
+    # touches the connections) so the first code doesn't wait on a login.
+    _ensure_worker()
+    _push(LOW, 0.0, {"warm_up": True})
+
+
+def status(ticket):
+    with _status_lock:
+        return _status.get(ticket)
+
+
+def mail_stats():
+    with _status_lock:
+        stats = dict(_stats)
+    with _heap_cond:
+        stats["queued"] = len(_heap)
+    return stats
+
+
+def transport_capacity():
+    if _transports is None:
+        return []
+    now = time.monotonic()
+    return [
+        {
+            "name": t.name,
+            "remaining": t.remaining(),
+            "daily_quota": t.daily_quota,
+            "cooling_down": now < t.cooldown_until,
+        }
+        for t in _transports
+    ]
@@ -0,0 +1,162 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# In-process metrics for every external dependency and the signup funnel.
+#
+# Each dependency call is recorded with its latency and outcome ("ok",
+# "error" or "timeout"). Latencies go into fixed Prometheus-style buckets
+# for export, plus a window of recent samples for the p50/p95/p99 shown in
+# the admin panel. A background thread rewrites metrics-<process>.prom every
+# EXPORT_INTERVAL_SECONDS in the Prometheus text format, ready for a
+# node_exporter textfile collector or a scrape sidecar. Each app process
+# writes its own file and labels its samples with process="...", so
+# several processes on one host don't overwrite each other's counters.
+
+PROCESS_LABEL = os.environ.get("METRICS_PROCESS") or str(os.getpid())
+METRICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"metrics-{PROCESS_LABEL}.prom")
+EXPORT_INTERVAL_SECONDS = 15
+RECENT_SAMPLES = 1000
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OUTCOMES = ("ok", "error", "timeout")
+FUNNEL_STAGES = ("step1", "step2", "step3")
+
+
+class _Dependency:
+    __slots__ = ("buckets", "total", "count", "outcomes", "recent")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)   # last one is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+_deps = {}
+_funnel = dict.fromkeys(FUNNEL_STAGES, 0)
+_lock = threading.Lock()
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def observe(dependency, seconds, outcome="ok"):
+    with _lock:
+        dep = _deps.get(dependency)
+        if dep is None:
+            dep = _deps[dependency] = _Dependency()
+        dep.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        dep.total += seconds
+        dep.count += 1
+        dep.outcomes[outcome] += 1
+        dep.recent.append(seconds)
+
+
+def outcome_for(error):
+    # http_client.HttpError carries kind="timeout"; sockets and smtplib
+    # raise TimeoutError (socket.timeout).
+    if getattr(error, "kind", None) == "timeout" or isinstance(error, TimeoutError):
+        return "timeout"
+    return "error"
+
+
+@contextmanager
+def timed(dependency):
+    # Records the block's latency; an exception is recorded and re-raised.
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        observe(dependency, time.perf_counter() - start, outcome_for(e))
+        raise
+    observe(dependency, time.perf_counter() - start)
+
+
+def funnel(stage):
+    with _lock:
+        _funnel[stage] += 1
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def snapshot():
+    # Per dependency: call counts by outcome and recent p50/p95/p99 in ms.
+    with _lock:
+        deps = {name: (dict(d.outcomes), d.count, sorted(d.recent)) for name, d in _deps.items()}
+        funnel_counts = dict(_funnel)
+    result = {}
+    for name, (outcomes, count, ordered) in sorted(deps.items()):
+        entry = {"count": count, **outcomes}
+        for q in (50, 95, 99):
+            value = _percentile(ordered, q / 100)
+            entry[f"p{q}_ms"] = value * 1000 if value is not None else None
+        result[name] = entry
+    return {"dependencies": result, "funnel": funnel_counts}
+
+
+def prometheus_text():
+    process = f'process="{PROCESS_LABEL}"'
+    lines = [
+        "# HELP pledge_dependency_seconds Latency of calls to external dependencies.",
+        "# TYPE pledge_dependency_seconds histogram",
+    ]
+    with _lock:
+        deps = sorted((name, list(d.buckets), d.total, d.count, dict(d.outcomes)) for name, d in _deps.items())
+        funnel_counts = dict(_funnel)
+    for name, buckets, total, count, _ in deps:
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), buckets):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'pledge_dependency_seconds_bucket{{{process},dependency="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'pledge_dependency_seconds_sum{{{process},dependency="{name}"}} {total:.6f}')
+        lines.append(f'pledge_dependency_seconds_count{{{process},dependency="{name}"}} {count}')
+    lines += [
+        "# HELP pledge_dependency_calls_total Calls to external dependencies by outcome.",
+        "# TYPE pledge_dependency_calls_total counter",
+    ]
+    for name, _, _, _, outcomes in deps:
+        for outcome, n in outcomes.items():
+            lines.append(f'pledge_dependency_calls_total{{{process},dependency="{name}",outcome="{outcome}"}} {n}')
+    lines += [
+        "# HELP pledge_funnel_sessions_total Sessions that reached each signup step.",
+        "# TYPE pledge_funnel_sessions_total counter",
+    ]
+    for stage, n in funnel_counts.items():
+        lines.append(f'pledge_funnel_sessions_total{{{process},stage="{stage}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path=METRICS_PATH):
+    # Written to a temp file and renamed so a scraper never reads half a file.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def _export_forever(path):
+    while True:
+        time.sleep(EXPORT_INTERVAL_SECONDS)
+        try:
+            write_prometheus_file(path)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics file: {e}")
+
+
+def start_exporter(path=METRICS_PATH):
+    global _exporter
+    if _exporter is not None and _exporter.is_alive():
+        return
+    with _exporter_lock:
+        if _exporter is None or not _exporter.is_alive():
+            _exporter = threading.Thread(target=_export_forever, args=(path,), name="metrics-exporter", daemon=True)
+            _exporter.start()
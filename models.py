@@ -0,0 +1,8 @@
+from collections import namedtuple
+
+# Small value types shared by the app and its services.
+
+# The pledge a session is signing, fixed when it leaves step 1: one small
+# tuple in session state instead of six separate entries. Defined outside
+# the script so every rerun sees the same class.
+Pledge = namedtuple("Pledge", "name email address district rep submission_key")
@@ -0,0 +1,271 @@
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Local durable queue for pledges. A pledge is safe once its INSERT has been
+# fsynced here; a background drainer pushes it to the Worker afterwards.
+OUTBOX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pledge_outbox.db")
+
+BATCH_SIZE = 25          # pledges sent to the Worker per drain pass
+LEASE_SECONDS = 30       # how long a claimed row is hidden from other drainers
+MAX_BACKOFF_SECONDS = 300
+MAX_ATTEMPTS = 20        # after this the row is parked as "failed" (the vault still has it)
+
+# Row states
+PENDING = "pending"
+OK = "ok"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    district TEXT,
+    rep_name TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_email ON outbox (email);
+"""
+
+# Columns added after the first release, applied to existing databases.
+_MIGRATIONS = [
+    ("idempotency_key", [
+        "ALTER TABLE outbox ADD COLUMN idempotency_key TEXT",
+        "UPDATE outbox SET idempotency_key = 'legacy-' || id WHERE idempotency_key IS NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS outbox_idempotency ON outbox (idempotency_key)",
+    ]),
+]
+
+_local = threading.local()
+_schema_path = None   # the outbox file whose schema is known to be current
+_schema_lock = threading.Lock()
+
+_wakeup = threading.Event()
+_changed = threading.Condition()
+_drainers = {}   # outbox path -> its drainer thread
+_drainer_lock = threading.Lock()
+
+
+def _connect():
+    # sqlite3 connections can't be shared across threads, so each thread
+    # (script runners, the drainer) gets its own.
+    # A drainer thread stays on the outbox it was started for.
+    path = getattr(_local, "pinned_path", None) or OUTBOX_PATH
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != path:
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        _local.conn, _local.path = conn, path
+    _ensure_schema(conn, _local.path)
+    return conn
+
+
+def _ensure_schema(conn, path):
+    global _schema_path
+    if _schema_path == path:
+        return
+    with _schema_lock:
+        if _schema_path != path:
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+            _schema_path = path
+
+
+def _migrate(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+    for column, statements in _MIGRATIONS:
+        if column in columns:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock.
+            if column not in {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def enqueue(name, email, district, rep_name, idempotency_key=None):
+    # Enqueueing the same idempotency_key twice (a double-clicked submit)
+    # returns the first row's id instead of queueing the pledge again.
+    now = time.time()
+    key = idempotency_key or uuid.uuid4().hex
+    conn = _connect()
+    cur = conn.execute(
+        "INSERT INTO outbox (name, email, district, rep_name, idempotency_key, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(idempotency_key) DO NOTHING",
+        (name, email, district, rep_name, key, now, now),
+    )
+    if cur.rowcount == 0:
+        return conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()[0]
+    _wakeup.set()
+    return cur.lastrowid
+
+
+def status(pledge_id):
+    row = _connect().execute("SELECT status FROM outbox WHERE id = ?", (pledge_id,)).fetchone()
+    return row[0] if row else None
+
+
+def status_for_email(email):
+    row = _connect().execute(
+        "SELECT status FROM outbox WHERE email = ? ORDER BY id DESC LIMIT 1", (email,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def wait_for_result(pledge_id, timeout):
+    # Gives the drainer a short window to deliver the Worker's answer so the
+    # common case (Worker healthy) can still report duplicates immediately.
+    deadline = time.monotonic() + timeout
+    with _changed:
+        while True:
+            current = status(pledge_id)
+            remaining = deadline - time.monotonic()
+            if current != PENDING or remaining <= 0:
+                return current
+            _changed.wait(min(remaining, 0.25))
+
+
+def signed_emails():
+    # Emails the Worker has confirmed as signed, whether by us or earlier.
+    rows = _connect().execute(
+        "SELECT DISTINCT email FROM outbox WHERE status IN (?, ?)", (OK, DUPLICATE)
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def counts():
+    rows = _connect().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    return dict(rows)
+
+
+def _claim_batch():
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT id, name, email, district, rep_name, attempts, idempotency_key FROM outbox "
+            "WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (PENDING, now, BATCH_SIZE),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+            [(now + LEASE_SECONDS, r[0]) for r in rows],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def _backoff(attempts):
+    return min(MAX_BACKOFF_SECONDS, 2 ** attempts) * random.uniform(0.5, 1.0)
+
+
+def _record(results):
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for pledge_id, attempts, result in results:
+            if result in (OK, DUPLICATE):
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                    (result, attempts, now, pledge_id),
+                )
+            elif attempts >= MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, attempts, result, now, pledge_id),
+                )
+                print(f"❌ OUTBOX: pledge {pledge_id} gave up after {attempts} attempts ({result})")
+            else:
+                conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                    (attempts, now + _backoff(attempts), result, now, pledge_id),
+                )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    with _changed:
+        _changed.notify_all()
+
+
+def _send_one(send, payload):
+    # One pledge's exception must not abort the rest of its batch, which
+    # would leave those rows leased with no attempt recorded.
+    try:
+        return send(payload)
+    except Exception as e:
+        return f"error: {e}"
+
+
+def _drain_batch(pool, send):
+    # One claim-send-record pass. Returns False when nothing was due.
+    batch = _claim_batch()
+    if not batch:
+        return False
+    payloads = [
+        {"name": name, "email": email, "district": district, "rep_name": rep_name, "idempotency_key": key}
+        for _, name, email, district, rep_name, _, key in batch
+    ]
+    sent = list(pool.map(functools.partial(_send_one, send), payloads))
+    _record([(row[0], row[5] + 1, result) for row, result in zip(batch, sent)])
+    return True
+
+
+def _drain_forever(send, ready, path):
+    _local.pinned_path = path
+    pool = ThreadPoolExecutor(max_workers=BATCH_SIZE, thread_name_prefix="outbox-send")
+    while True:
+        try:
+            if ready is not None and not ready():
+                # Don't burn attempts while the Worker is known to be down.
+                time.sleep(1.0)
+                continue
+            if not _drain_batch(pool, send):
+                _wakeup.wait(1.0)
+                _wakeup.clear()
+        except Exception as e:
+            print(f"❌ OUTBOX DRAINER: {e}")
+            time.sleep(1.0)
+
+
+def start_drainer(send, ready=None):
+    # `send(payload)` must return "ok", "duplicate" or an error string.
+    # `ready()`, if given, pauses draining while it returns False.
+    # Safe to call on every rerun; only the first call starts a thread.
+    # There is one drainer per outbox file, so tests and benchmarks that
+    # point OUTBOX_PATH at a throwaway file get their own.
+    path = OUTBOX_PATH
+    drainer = _drainers.get(path)
+    if drainer is not None and drainer.is_alive():
+        return
+    with _drainer_lock:
+        drainer = _drainers.get(path)
+        if drainer is None or not drainer.is_alive():
+            drainer = _drainers[path] = threading.Thread(
+                target=_drain_forever, args=(send, ready, path), name="outbox-drainer", daemon=True
+            )
+            drainer.start()
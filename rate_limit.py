@@ -0,0 +1,48 @@
+import threading
+import time
+
+# Token bucket for upstream rate limits, e.g. Nominatim's 1 request/second.
+# (SMTP daily quotas are a rolling 24-hour count instead; see mail_service.)
+
+CANCEL_POLL_SECONDS = 0.05
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, tokens=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else tokens
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout, cancelled=None):
+        # Blocks until a token is free or `timeout` runs out. A waiter books
+        # its slot under the lock (tokens may go negative: each waiter is one
+        # token further behind) and sleeps without it, so requests still go
+        # out in arrival order at `rate` per second and a waiter can give up
+        # without holding everyone else up. `cancelled()` is polled while
+        # waiting; once it returns True the booked token is handed back.
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > timeout:
+                return False
+            self.tokens -= 1
+        ready_at = now + wait
+        while True:
+            remaining = ready_at - time.monotonic()
+            if remaining <= 0:
+                return True
+            if cancelled is None:
+                time.sleep(remaining)
+            elif cancelled():
+                with self.lock:
+                    self.tokens += 1
+                return False
+            else:
+                time.sleep(min(remaining, CANCEL_POLL_SECONDS))
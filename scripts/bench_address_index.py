@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Measure the offline address index: size on disk, load time and query latency.
+Usage: python scripts/bench_address_index.py [--index data/address_index.bin | --synthetic 1000000] [--queries 20000]
+
+With --synthetic (the default when no --index is given) a throwaway index of
+made-up addresses is built first with scripts/build_address_index.py.
+
+Load time is measured in fresh processes (--loads of them), since a warm
+process never loads twice. The first is as cold as the page cache allows;
+the rest show what a second worker process pays once the pages are shared.
+Query latency is per suggest() call with the default result limit, for
+prefixes of real entries (hits) and for prefixes that aren't in the index
+(misses, the case that falls back to Nominatim).
+"""
+
+import argparse
+import csv
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import address_index
+import build_address_index
+from address_service import RESULT_LIMIT
+
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Park Blvd", "Washington St", "Lake Rd", "Hill Ct", "Elm St", "Pine Way"]
+CITIES = [("Springfield", "IL"), ("Columbus", "OH"), ("Austin", "TX"), ("Albany", "NY"), ("Salem", "OR"),
+          ("Madison", "WI"), ("Denver", "CO"), ("Raleigh", "NC"), ("Boise", "ID"), ("Dover", "DE")]
+
+
+def write_synthetic(path, count, rng):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["LON", "LAT", "NUMBER", "STREET", "UNIT", "CITY", "REGION", "POSTCODE"])
+        for i in range(count):
+            city, state = rng.choice(CITIES)
+            street = f"{rng.randrange(1, 400)} {rng.choice(STREETS)}" if rng.random() < 0.5 else rng.choice(STREETS)
+            writer.writerow([f"{rng.uniform(-124, -67):.6f}", f"{rng.uniform(25, 49):.6f}", rng.randrange(1, 20000),
+                             street.upper(), "", city.upper(), state, f"{rng.randrange(10000, 99999)}"])
+
+
+def time_load(path):
+    # Runs in a child process; prints milliseconds to map the file and answer one query.
+    start = time.perf_counter()
+    index = address_index.AddressIndex(path)
+    index.suggest("1", RESULT_LIMIT)
+    print((time.perf_counter() - start) * 1000)
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_queries(index, prefixes):
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.suggest(prefix, RESULT_LIMIT)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"p50_us": statistics.median(samples), "p99_us": percentile(samples, 0.99), "max_us": samples[-1]}
+
+
+def sample_prefixes(index, count, rng):
+    hits, misses = [], []
+    for _ in range(count):
+        key = index._key(rng.randrange(index.count)).decode("utf-8")
+        hits.append(key[:rng.randint(4, len(key))])
+        misses.append(key[:rng.randint(4, len(key))] + "zq")
+    return hits, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the offline address index.")
+    parser.add_argument("--index", type=Path, help="an index built by build_address_index.py")
+    parser.add_argument("--synthetic", type=int, default=1_000_000, help="addresses in the throwaway index")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--loads", type=int, default=3, help="fresh processes for the load time")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child-load", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_load:
+        time_load(args.child_load)
+        return
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.index
+        if path is None:
+            source = Path(workdir) / "addresses.csv"
+            path = Path(workdir) / "address_index.bin"
+            write_synthetic(source, args.synthetic, rng)
+            start = time.perf_counter()
+            count, _ = build_address_index.build([source], path)
+            print(f"Built {count:,} synthetic addresses in {time.perf_counter() - start:.1f}s")
+
+        index = address_index.AddressIndex(path)
+        print(f"size:   {index.bytes / 1e6:.1f} MB for {index.count:,} addresses ({index.bytes / index.count:.0f} bytes each)")
+
+        loads = [
+            float(subprocess.run([sys.executable, __file__, "--child-load", str(path)],
+                                 capture_output=True, text=True, check=True).stdout)
+            for _ in range(args.loads)
+        ]
+        print(f"load:   {', '.join(f'{ms:.2f}' for ms in loads)} ms (map + first query, fresh processes)")
+
+        hits, misses = sample_prefixes(index, args.queries, rng)
+        for label, prefixes in (("hit", hits), ("miss", misses)):
+            r = time_queries(index, prefixes)
+            print(f"{label}:{'':<{7 - len(label)}}p50 {r['p50_us']:.1f} µs  p99 {r['p99_us']:.1f} µs  max {r['max_us']:.1f} µs "
+                  f"over {len(prefixes):,} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure the per-call latency saved by http_client's warm keep-alive pools.
+Usage: python scripts/bench_http_client.py [--url https://nominatim.openstreetmap.org/status] [--calls 20]
+
+Without --url a throwaway local HTTP server is used, which only shows the TCP
+part of the saving. Point --url at a real HTTPS upstream to include TLS.
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+import http_client
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def timed(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples):
+    return f"p50 {statistics.median(samples):7.2f} ms   mean {statistics.fmean(samples):7.2f} ms   max {max(samples):7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold vs pooled HTTP calls.")
+    parser.add_argument("--url", help="upstream to call (default: local server)")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--service", default="nominatim", choices=sorted(http_client.SERVICES))
+    args = parser.parse_args()
+
+    url = args.url or local_server()
+    headers = http_client.SERVICES[args.service]["headers"]
+
+    # Cold: what the app used to do, a bare requests.get with a fresh connection.
+    cold = timed(lambda: requests.get(url, headers=headers, timeout=10), args.calls)
+
+    # Warm: the shared pooled session. The first call opens the connection.
+    http_client.get(args.service, url)
+    warm = timed(lambda: http_client.get(args.service, url), args.calls)
+
+    print(f"target: {url}")
+    print(f"cold  {summary(cold)}")
+    print(f"warm  {summary(warm)}")
+    print(f"saved {statistics.median(cold) - statistics.median(warm):.2f} ms per call (p50)")
+
+
+if __name__ == "__main__":
+    main()
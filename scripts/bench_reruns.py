@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Time the app's rerun paths headlessly and compare them with a saved baseline.
+Usage: python scripts/bench_reruns.py [--repeat 15] [--cold-runs 3] [--threshold 0.25] [--save-baseline]
+
+Runs 80percentapp.py through Streamlit's AppTest with every network call
+answered in-process (requests, SMTP and the vault sheet are stand-ins that
+return at once), so the numbers are the app's own work: script reruns,
+session state, save_pledge, get_district, the theme block and so on.
+
+Paths, each timed over --repeat fresh sessions (median and p90):
+  cold_render    first render in a brand new process (--cold-runs samples)
+  first_render   first render of a new session in a warm process
+  keystroke      typing into the step 1 name field
+  continue       the Continue handler through to step 2
+  verify         Verify and Sign through to step 3
+  sign_another   the Sign another reset back to step 1
+
+AppTest always reruns the whole script, even for a widget inside a
+fragment, so keystroke is the full-rerun cost; a browser pays less.
+
+Results are compared with benchmarks/rerun_baseline.json: a path fails when
+its median is more than --threshold (default 25%) and --min-delta-ms over the
+baseline, and the script exits 1. --save-baseline rewrites the file; do that
+on the same machine the comparison will run on.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import requests
+
+import fake_services
+
+APP_PATH = str(ROOT / "80percentapp.py")
+BASELINE_PATH = ROOT / "benchmarks" / "rerun_baseline.json"
+PATHS = ("cold_render", "first_render", "keystroke", "continue", "verify", "sign_another")
+SECRETS = {"WORKER_BASE_URL": "http://worker.bench", "EMAIL_PASSWORD": "x", "GEOCODIO_API_KEY": "x"}
+ADDRESS = "123 Main St, Springfield, IL"
+STEP3_WAIT_SECONDS = 5
+
+
+def _response(status, payload=None, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b"" if payload is None else json.dumps(payload).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+def fake_request(self, method, url, *args, **kwargs):
+    # Answers every upstream the app calls, without touching the network.
+    if method.upper() == "HEAD":
+        return _response(200)
+    if "/search" in url:
+        return _response(200, [{"display_name": ADDRESS, "lat": "39.80", "lon": "-89.65"}])
+    if "geocode" in url:
+        return _response(200, {"results": [{
+            "address_components": {"state": "IL"},
+            "fields": {"congressional_districts": [{
+                "district_number": 13,
+                "current_legislators": [{"type": "representative", "bio": {"first_name": "Nikki", "last_name": "Budzinski"}}],
+            }]},
+        }]})
+    if url.endswith("/signup"):
+        return _response(200, {"ok": True})
+    if url.endswith("/stats"):
+        return _response(200, {"total_signups": 1000}, {"ETag": '"1000"'})
+    return _response(404)
+
+
+def isolate(workdir):
+    # Network stand-ins plus throwaway on-disk state; returns the patches to stop.
+    import backup_service
+    import geocode_cache
+    import mail_service
+    import metrics
+    import outbox_service
+
+    outbox_service.OUTBOX_PATH = str(Path(workdir) / "pledge_outbox.db")
+    geocode_cache.CACHE_PATH = str(Path(workdir) / "geocode_cache.db")
+    mail_service.SEND_LOG_PATH = str(Path(workdir) / "mail_sends.db")
+    metrics.start_exporter(str(Path(workdir) / "metrics.prom"))
+    backup_service._worksheet = fake_services.FakeWorksheet(fake_services.Behavior())
+    patches = [mock.patch("requests.Session.request", fake_request), mock.patch("smtplib.SMTP_SSL")]
+    for p in patches:
+        p.start()
+    return patches
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def one_session(n):
+    # Walks one new session through every path; returns {path: ms}.
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.secrets.update(SECRETS)
+    sample = {"first_render": timed(at.run)}
+    sample["keystroke"] = timed(lambda: at.text_input[0].input(f"Bench Signer {n}").run())
+
+    at.text_input[1].input(f"bench{n}-{time.time_ns()}@example.com").run()
+    if not fake_services.pick_address(at, "123 Main"):
+        raise RuntimeError("no address suggestions")
+    button(at, "Continue").click()
+    sample["continue"] = timed(at.run)
+    if at.session_state.step != 2:
+        raise RuntimeError(f"Continue did not reach step 2: {[e.value for e in at.error]}")
+
+    def verify():
+        if at.session_state.verification_code is not None:
+            at.text_input[0].input(at.session_state.verification_code)
+            button(at, "Verify and Sign").click()
+        at.run()
+        deadline = time.monotonic() + STEP3_WAIT_SECONDS
+        while at.session_state.step != 3 and time.monotonic() < deadline:
+            at.run()
+    sample["verify"] = timed(verify)
+    if at.session_state.step != 3:
+        raise RuntimeError("Verify did not reach step 3")
+
+    button(at, "Sign another").click()
+    sample["sign_another"] = timed(at.run)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return sample
+
+
+def child_cold():
+    # A brand new process: the app imports its own modules on this render.
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as workdir:
+        isolate(workdir)
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        at.secrets.update(SECRETS)
+        return {"cold_render": timed(at.run)}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered), 2),
+        "p90_ms": round(ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))], 2),
+        "runs": len(ordered),
+    }
+
+
+def measure(repeat, cold_runs):
+    samples = {path: [] for path in PATHS}
+    for _ in range(cold_runs):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child-cold"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        # The app logs to stdout too; the result is the line we printed.
+        line = next(l for l in reversed(out.stdout.splitlines()) if l.startswith('{"cold_render"'))
+        samples["cold_render"].append(json.loads(line)["cold_render"])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        patches = isolate(workdir)
+        try:
+            one_session(-1)   # warm-up session, not counted
+            for n in range(repeat):
+                for path, ms in one_session(n).items():
+                    samples[path].append(ms)
+        finally:
+            for p in patches:
+                p.stop()
+    return {path: summarize(values) for path, values in samples.items() if values}
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    # Returns the paths that regressed, as printable lines.
+    regressions = []
+    print(f"{'path':<14}{'median ms':>11}{'p90 ms':>9}{'baseline':>10}{'change':>9}")
+    for path, r in results.items():
+        base = baseline.get("paths", {}).get(path, {}).get("median_ms")
+        change = f"{(r['median_ms'] - base) / base:+.0%}" if base else "-"
+        print(f"{path:<14}{r['median_ms']:>11.1f}{r['p90_ms']:>9.1f}{base if base else '-':>10}{change:>9}")
+        if base and r["median_ms"] > base * (1 + threshold) and r["median_ms"] - base > min_delta_ms:
+            regressions.append(f"{path}: {base:.1f} ms -> {r['median_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's rerun paths against a JSON baseline.")
+    parser.add_argument("--repeat", type=int, default=15, help="sessions timed per path")
+    parser.add_argument("--cold-runs", type=int, default=3, help="fresh processes for cold_render (0 to skip)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown over the baseline median")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore regressions smaller than this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--child-cold", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_cold:
+        print(json.dumps(child_cold()))
+        return
+
+    results = measure(args.repeat, args.cold_runs)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+
+    if args.save_baseline:
+        import streamlit
+
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "recorded": time.strftime("%Y-%m-%d"),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "paths": results,
+        }, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} path(s) regressed more than {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No path regressed more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
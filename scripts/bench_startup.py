@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start cost: module import time and time to first render.
+Usage: python scripts/bench_startup.py [--runs 3]
+
+Each run is a fresh Python process, so nothing is cached between runs. The
+first render goes through Streamlit's AppTest with placeholder secrets; no
+upstream is called while rendering step 1 (the warm-up thread starts in the
+background and its failures are ignored here).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_MODULES = ["http_client", "address_service", "district_service", "outbox_service", "warmup"]
+LAZY_MODULES = ["mail_service", "backup_service"]
+SECRETS = {"WORKER_BASE_URL": "http://127.0.0.1:9", "EMAIL_PASSWORD": "x", "GEOCODIO_API_KEY": "x"}
+
+
+def child_imports():
+    # Each module imported on its own, in dependency order.
+    result = {}
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+    result["import streamlit"] = (time.perf_counter() - start) * 1000
+    for name in APP_MODULES + LAZY_MODULES:
+        start = time.perf_counter()
+        __import__(name)
+        result[f"import {name}"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def child_render():
+    # What a cold container does: the app imports its own modules.
+    from streamlit.testing.v1 import AppTest
+
+    result = {}
+    at = AppTest.from_file(str(ROOT / "80percentapp.py"), default_timeout=60)
+    at.secrets.update(SECRETS)
+    start = time.perf_counter()
+    at.run()
+    result["first render"] = (time.perf_counter() - start) * 1000
+    result["lazy loaded at first render"] = [m for m in LAZY_MODULES if m in sys.modules]
+    start = time.perf_counter()
+    at.run()
+    result["second render"] = (time.perf_counter() - start) * 1000
+    if at.exception:
+        result["error"] = str(at.exception[0].message)
+    return result
+
+
+def fresh(mode):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time and time to first render.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=["imports", "render"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        sys.path.insert(0, str(ROOT))
+        print(json.dumps(child_imports() if args.child == "imports" else child_render()))
+        return
+
+    imports = [fresh("imports") for _ in range(args.runs)]
+    renders = [fresh("render") for _ in range(args.runs)]
+    errors = [r["error"] for r in renders if "error" in r]
+    if errors:
+        print(f"❌ App raised during render: {errors[0]}")
+        sys.exit(1)
+
+    print(f"median of {args.runs} fresh processes each")
+    for key in imports[0]:
+        note = "  (deferred, not on the first-render path)" if key.split()[-1] in LAZY_MODULES else ""
+        print(f"  {key:<26} {statistics.median(s[key] for s in imports):8.1f} ms{note}")
+    for key in ("first render", "second render"):
+        print(f"  {key:<26} {statistics.median(r[key] for r in renders):8.1f} ms")
+    loaded = sorted({m for r in renders for m in r["lazy loaded at first render"]})
+    if loaded:
+        print(f"⚠️ Loaded during the first render (should be deferred): {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
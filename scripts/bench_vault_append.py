@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-pledge vault latency as the vault grows.
+Usage: python scripts/bench_vault_append.py [--pledges 50] [--sizes 100,1000,10000,100000]
+
+Runs against a local stand-in for the Google Sheets backend, so no secrets or
+network are needed. The stand-in serializes exactly what would go over the
+wire, which is what makes the old read-and-rewrite path O(N) per pledge.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+import backup_service
+
+
+class LocalSheet:
+    """In-memory worksheet that charges for every cell it transfers."""
+
+    def __init__(self, existing_rows):
+        self.rows = [list(backup_service.VAULT_COLUMNS)]
+        self.rows.extend(
+            ["2025-01-01 00:00:00", f"Signer {i}", f"signer{i}@example.com", "NY-7", "Nydia Velázquez"]
+            for i in range(existing_rows)
+        )
+        self.cells_transferred = 0
+
+    def _wire(self, rows):
+        self.cells_transferred += sum(len(r) for r in rows)
+        return json.loads(json.dumps(rows))
+
+    # gspread-style append (what backup_service uses now)
+    def append_row(self, values, **kwargs):
+        self.rows.extend(self._wire([values]))
+
+    # GSheetsConnection-style read/update (what backup_service used to do)
+    def read(self, **kwargs):
+        rows = self._wire(self.rows)
+        return pd.DataFrame(rows[1:], columns=rows[0])
+
+    def update(self, data, **kwargs):
+        rows = [list(data.columns)] + data.astype(str).values.tolist()
+        self.rows = self._wire(rows)
+
+
+def legacy_save(sheet, name, email, district, rep_name):
+    existing = sheet.read(worksheet=backup_service.VAULT_WORKSHEET, ttl=0)
+    new_row = pd.DataFrame([dict(zip(backup_service.VAULT_COLUMNS, backup_service.vault_row(name, email, district, rep_name)))])
+    sheet.update(worksheet=backup_service.VAULT_WORKSHEET, data=pd.concat([existing, new_row], ignore_index=True))
+
+
+def append_save(sheet, name, email, district, rep_name):
+    backup_service.save_to_vault(name, email, district, rep_name, worksheet=sheet)
+
+
+def time_pledges(save, existing_rows, pledges):
+    sheet = LocalSheet(existing_rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for i in range(pledges):
+            save(sheet, f"New {i}", f"new{i}@example.com", "NY-14", "Alexandria Ocasio-Cortez")
+        elapsed = time.perf_counter() - start
+    assert len(sheet.rows) == existing_rows + pledges + 1
+    return elapsed / pledges * 1000, sheet.cells_transferred / pledges
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pledges", type=int, default=50, help="pledges to time at each vault size")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma-separated existing row counts")
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the append path")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"{'rows':>8}  {'append ms/pledge':>17}  {'cells/pledge':>12}  {'legacy ms/pledge':>17}  {'cells/pledge':>12}")
+    for n in sizes:
+        append_ms, append_cells = time_pledges(append_save, n, args.pledges)
+        if args.skip_legacy:
+            print(f"{n:>8}  {append_ms:>17.3f}  {append_cells:>12.0f}")
+            continue
+        legacy_ms, legacy_cells = time_pledges(legacy_save, n, args.pledges)
+        print(f"{n:>8}  {append_ms:>17.3f}  {append_cells:>12.0f}  {legacy_ms:>17.3f}  {legacy_cells:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Build the offline address suggestion index used by address_index.py.
+Usage: python scripts/build_address_index.py path/to/addresses.csv [more files ...] [--state IL] [--chunk-rows 1000000] [--out data/address_index.bin]
+
+Input is OpenAddresses data: the CSV layout (LON, LAT, NUMBER, STREET, UNIT,
+CITY, REGION, POSTCODE columns) or the GeoJSON-lines layout (one Feature per
+line with the same fields, lowercase, under "properties"). Files may be
+gzipped. Per-county files often leave REGION empty; --state fills it in.
+
+Rows are sorted by their normalized address with an external merge sort
+(--chunk-rows at a time in memory), so a national file doesn't need the RAM
+to hold it. Repeated addresses are kept once. The index is written next to
+--out and renamed over it at the end, so running app processes keep the
+file they already mapped.
+"""
+
+import argparse
+import csv
+import gzip
+import heapq
+import io
+import json
+import os
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from address_index import FIELD_SEP, HEADER_SIZE, INDEX_PATH, MAGIC
+from address_service import normalize_query
+
+FIELDS = ("lon", "lat", "number", "street", "unit", "city", "region", "postcode")
+
+
+def _open(path):
+    if str(path).endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_rows(path):
+    # Yields dicts with FIELDS as keys, whichever layout the file uses.
+    with _open(path) as f:
+        if ".geojson" in str(path):
+            for line in f:
+                if line.strip():
+                    feature = json.loads(line)
+                    props = feature.get("properties") or {}
+                    coords = (feature.get("geometry") or {}).get("coordinates") or (None, None)
+                    yield dict(props, lon=coords[0], lat=coords[1])
+        else:
+            for row in csv.DictReader(f):
+                yield {k.lower(): v for k, v in row.items()}
+
+
+def _tidy(value):
+    value = " ".join(str(value or "").split())
+    # OpenAddresses is mostly upper case; "MAIN ST" reads better as "Main St".
+    return value.title() if value.isupper() else value
+
+
+def record_line(row, default_state=""):
+    # One index record, or None for rows without a house number, street or point.
+    number, street = _tidy(row.get("number")), _tidy(row.get("street"))
+    try:
+        lat, lon = float(row.get("lat")), float(row.get("lon"))
+    except (TypeError, ValueError):
+        return None
+    if not number or not street:
+        return None
+    unit, city = _tidy(row.get("unit")), _tidy(row.get("city"))
+    state = " ".join(str(row.get("region") or default_state).split()).upper()
+    postcode = " ".join(str(row.get("postcode") or "").split())
+
+    display_name = f"{number} {street}" + (f" {unit}" if unit else "")
+    display_name += "".join(f", {part}" for part in (city, state) if part)
+    if postcode:
+        display_name += f" {postcode}"
+    key = normalize_query(display_name)
+    # normalize_query strips the separator bytes, so a key sorts before its extensions.
+    return f"{key}\x1f{display_name}\x1f{lat:.6f}\x1f{lon:.6f}\n".encode("utf-8")
+
+
+def _write_chunk(lines, workdir):
+    lines.sort()
+    chunk = tempfile.NamedTemporaryFile("wb", dir=workdir, delete=False, suffix=".chunk")
+    with chunk:
+        chunk.writelines(lines)
+    return chunk.name
+
+
+def build(paths, out, default_state="", chunk_rows=1_000_000):
+    # Returns (addresses written, rows skipped).
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=out.parent, prefix=".address-index-") as workdir:
+        chunks, lines, skipped = [], [], 0
+        for path in paths:
+            for row in read_rows(path):
+                line = record_line(row, default_state)
+                if line is None:
+                    skipped += 1
+                    continue
+                lines.append(line)
+                if len(lines) >= chunk_rows:
+                    chunks.append(_write_chunk(lines, workdir))
+                    lines = []
+        if lines:
+            chunks.append(_write_chunk(lines, workdir))
+
+        # Merge the sorted chunks into the record section, one offset per key.
+        data_path = os.path.join(workdir, "records")
+        offsets = array("Q")
+        files = [open(c, "rb") for c in chunks]
+        try:
+            with open(data_path, "wb") as data:
+                position, previous = 0, None
+                for line in heapq.merge(*files):
+                    key = line[:line.index(FIELD_SEP)]
+                    if key == previous:
+                        continue
+                    previous = key
+                    offsets.append(position)
+                    data.write(line)
+                    position += len(line)
+        finally:
+            for f in files:
+                f.close()
+
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        tmp = out.with_name(out.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(offsets).to_bytes(8, "little"))
+            f.write((HEADER_SIZE + 8 * len(offsets)).to_bytes(8, "little"))
+            offsets.tofile(f)
+            with open(data_path, "rb") as data:
+                while block := data.read(1 << 20):
+                    f.write(block)
+        os.replace(tmp, out)
+    return len(offsets), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline address suggestion index.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="OpenAddresses .csv or .geojson files (optionally .gz)")
+    parser.add_argument("--state", default="", help="state code for rows without REGION, e.g. IL")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="rows sorted in memory at a time")
+    parser.add_argument("--out", type=Path, default=Path(INDEX_PATH))
+    args = parser.parse_args()
+
+    missing = [str(p) for p in args.inputs if not p.exists()]
+    if missing:
+        print(f"Error: {', '.join(missing)} not found")
+        sys.exit(1)
+    count, skipped = build(args.inputs, args.out, args.state.upper(), args.chunk_rows)
+    size = args.out.stat().st_size
+    print(f"Wrote {args.out}: {count:,} addresses, {size / 1e6:.1f} MB ({size / max(count, 1):.0f} bytes each), "
+          f"{skipped:,} rows skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Build the offline congressional district index used by district_service.py.
+Usage: python scripts/build_district_index.py path/to/districts.geojson [--cell-size 0.1] [--margin 0.0005] [--out data/district_index.json]
+
+Input is the Census cartographic boundary file for the current Congress,
+converted to GeoJSON, e.g.:
+
+    ogr2ogr -f GeoJSON -t_srs EPSG:4326 districts.geojson cb_2024_us_cd119_500k.shp
+
+The output is a grid over the map. A cell that no district edge touches is
+stored as a single district code and answers lookups with no geometry work.
+A cell an edge passes through stores its candidate districts, which are
+resolved with a point-in-polygon test at lookup time.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+STATE_FIPS = {
+    "01": "AL", "02": "AK", "04": "AZ", "05": "AR", "06": "CA", "08": "CO", "09": "CT", "10": "DE",
+    "11": "DC", "12": "FL", "13": "GA", "15": "HI", "16": "ID", "17": "IL", "18": "IN", "19": "IA",
+    "20": "KS", "21": "KY", "22": "LA", "23": "ME", "24": "MD", "25": "MA", "26": "MI", "27": "MN",
+    "28": "MS", "29": "MO", "30": "MT", "31": "NE", "32": "NV", "33": "NH", "34": "NJ", "35": "NM",
+    "36": "NY", "37": "NC", "38": "ND", "39": "OH", "40": "OK", "41": "OR", "42": "PA", "44": "RI",
+    "45": "SC", "46": "SD", "47": "TN", "48": "TX", "49": "UT", "50": "VT", "51": "VA", "53": "WA",
+    "54": "WV", "55": "WI", "56": "WY", "60": "AS", "66": "GU", "69": "MP", "72": "PR", "78": "VI",
+}
+
+
+def district_code(props):
+    # Census uses "00" for at-large seats and "98" for non-voting delegates;
+    # Geocodio reports the same numbers, so int() keeps codes identical
+    # to what get_district has always stored (e.g. "NY-7").
+    cd_key = next((k for k in props if re.fullmatch(r"CD\d+FP", k)), None)
+    state = STATE_FIPS.get(props.get("STATEFP"))
+    if cd_key is None or state is None or not props[cd_key].isdigit():
+        return None
+    return f"{state}-{int(props[cd_key])}"
+
+
+def feature_rings(geometry):
+    if geometry["type"] == "Polygon":
+        return [ring for ring in geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+
+def mark_boundary_cells(rings, size, margin, code, boundary):
+    # Conservative: every cell an edge's bounding box (grown by `margin`)
+    # overlaps is a boundary cell, so points near an edge always get the
+    # exact test and the ambiguity check in district_service.
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            for ix in range(math.floor((min(x1, x2) - margin) / size), math.floor((max(x1, x2) + margin) / size) + 1):
+                for iy in range(math.floor((min(y1, y2) - margin) / size), math.floor((max(y1, y2) + margin) / size) + 1):
+                    boundary[(ix, iy)].add(code)
+
+
+def mark_interior_cells(rings, size, code, interior):
+    # Scanline fill at each cell row's center line, even-odd over all rings.
+    crossings = defaultdict(list)
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if y1 == y2:
+                continue
+            lo, hi = min(y1, y2), max(y1, y2)
+            for iy in range(math.ceil(lo / size - 0.5), math.floor(hi / size - 0.5) + 1):
+                yc = (iy + 0.5) * size
+                if lo <= yc < hi:
+                    crossings[iy].append(x1 + (yc - y1) * (x2 - x1) / (y2 - y1))
+    for iy, xs in crossings.items():
+        xs.sort()
+        for xa, xb in zip(xs[0::2], xs[1::2]):
+            for ix in range(math.ceil(xa / size - 0.5), math.floor(xb / size - 0.5) + 1):
+                interior[(ix, iy)] = code
+
+
+def build(features, size, margin):
+    boundary = defaultdict(set)
+    interior = {}
+    districts = {}
+    for feature in features:
+        code = district_code(feature.get("properties", {}))
+        rings = [[(float(x), float(y)) for x, y, *_ in ring] for ring in feature_rings(feature["geometry"])]
+        if code is None or not rings:
+            continue
+        districts.setdefault(code, []).extend(rings)
+        mark_boundary_cells(rings, size, margin, code, boundary)
+        mark_interior_cells(rings, size, code, interior)
+
+    cells = {}
+    for key, code in interior.items():
+        if key not in boundary:
+            cells[f"{key[0]},{key[1]}"] = code
+    for key, codes in boundary.items():
+        cells[f"{key[0]},{key[1]}"] = sorted(codes)
+
+    rounded = {
+        code: [[[round(x, 6), round(y, 6)] for x, y in ring] for ring in rings]
+        for code, rings in districts.items()
+    }
+    return cells, rounded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline congressional district index.")
+    parser.add_argument("geojson", type=Path, help="district boundaries as a GeoJSON FeatureCollection")
+    parser.add_argument("--cell-size", type=float, default=0.1, help="grid cell size in degrees (default 0.1)")
+    parser.add_argument("--margin", type=float, default=0.0005, help="edge margin in degrees; match BOUNDARY_EPSILON")
+    parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent.parent / "data" / "district_index.json")
+    args = parser.parse_args()
+
+    if not args.geojson.exists():
+        print(f"Error: File not found: {args.geojson}")
+        sys.exit(1)
+
+    raw = args.geojson.read_bytes()
+    features = json.loads(raw)["features"]
+    cells, districts = build(features, args.cell_size, args.margin)
+
+    index = {
+        # Changes whenever the boundary file does; caches key off this.
+        "version": hashlib.sha256(raw).hexdigest()[:16],
+        "source": args.geojson.name,
+        "cell_size": args.cell_size,
+        "cells": cells,
+        "districts": districts,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(index, separators=(",", ":")))
+
+    solid = sum(1 for v in cells.values() if isinstance(v, str))
+    print(f"Wrote {args.out}: {len(districts)} districts, {len(cells)} cells ({solid} single-district)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Build the resized WebP variants of the logo and banner into static/img/.
+Usage: python scripts/build_images.py [--quality 80]
+
+Commit the output. The app serves these instead of the full-size originals;
+without them it converts the originals itself once per process.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import image_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build WebP image variants for the app.")
+    parser.add_argument("--quality", type=int, default=image_assets.WEBP_QUALITY, help="WebP quality (0-100)")
+    args = parser.parse_args()
+
+    os.makedirs(image_assets.VARIANT_DIR, exist_ok=True)
+    built = 0
+    for slot, config in image_assets.SLOTS.items():
+        source = image_assets.find_source(slot)
+        if source is None:
+            print(f"⚠️ No source image for {slot} (looked for {', '.join(config['sources'])})")
+            continue
+        data = image_assets.encode_variant(source, config["width"], quality=args.quality)
+        target = image_assets.variant_path(slot)
+        with open(target, "wb") as f:
+            f.write(data)
+        before = os.path.getsize(source)
+        print(
+            f"✅ {slot}: {os.path.basename(source)} {before / 1024:.0f} KB -> "
+            f"{os.path.relpath(target, image_assets.ROOT)} {len(data) / 1024:.0f} KB ({len(data) / before:.0%})"
+        )
+        built += 1
+    if not built:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for every service the pledge flow calls, for load testing.
+Usage: python scripts/fake_services.py [--port 8900] [--smtp-port 8925] [--latency worker=80,smtp=150] [--errors worker=0.02]
+
+One HTTP server answers as Nominatim (/search), Geocodio (/v1.7/geocode) and
+the Cloudflare Worker (/signup, /stats); a second port speaks plain SMTP and
+accepts everything. Latency (milliseconds) and error rates (0-1) are set per
+service: nominatim, geocodio, worker, smtp, sheets. The Worker enforces a
+unique email like the real one: a repeat gets 409 unless it carries the
+Idempotency-Key of the signup that stored it.
+
+There is no Google Sheets endpoint to fake (gspread talks to Google
+directly), so FakeWorksheet is an in-process stand-in that load_test.py
+installs as backup_service's worksheet handle. pick_address() plays the
+address searchbox for AppTest-driven scripts.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SERVICES = ("nominatim", "geocodio", "worker", "smtp", "sheets")
+DISTRICTS = [("IL", 13, "Nikki", "Budzinski"), ("NY", 14, "Alexandria", "Ocasio-Cortez"), ("CA", 12, "Lateefah", "Simon"),
+             ("TX", 7, "Lizzie", "Fletcher"), ("OH", 3, "Joyce", "Beatty")]
+
+
+def parse_profile(text, cast=float):
+    # "worker=80,smtp=150" -> {"worker": 80.0, "smtp": 150.0}
+    profile = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            if name.strip() not in SERVICES:
+                raise ValueError(f"unknown service '{name.strip()}' (expected one of {', '.join(SERVICES)})")
+            profile[name.strip()] = cast(value)
+    return profile
+
+
+class Behavior:
+    # Shared, thread-safe knobs and counters for all the fakes.
+    def __init__(self, latency_ms=None, error_rate=None, seed=None):
+        self.latency_ms = dict(latency_ms or {})
+        self.error_rate = dict(error_rate or {})
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.signups = {}   # email -> idempotency key that stored it
+        self.calls = {name: 0 for name in SERVICES}
+        self.errors = {name: 0 for name in SERVICES}
+        self.conflicts = 0
+
+    def hit(self, service):
+        # Sleeps for the service's latency; returns True if this call should fail.
+        with self.lock:
+            self.calls[service] += 1
+            failed = self.random.random() < self.error_rate.get(service, 0.0)
+            if failed:
+                self.errors[service] += 1
+        delay = self.latency_ms.get(service, 0.0) / 1000
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def signup(self, email, key):
+        # Returns (HTTP status, the Idempotency-Key the email is stored under).
+        with self.lock:
+            stored = self.signups.get(email)
+            if stored is None:
+                self.signups[email] = key
+                return 200, key
+            if key and stored == key:
+                return 200, key
+            self.conflicts += 1
+            return 409, stored
+
+    def report(self):
+        with self.lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors), "signups": len(self.signups), "conflicts": self.conflicts}
+
+
+def _district_for(text):
+    return DISTRICTS[int(hashlib.sha1(text.lower().encode()).hexdigest(), 16) % len(DISTRICTS)]
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    behavior = None
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._send(200)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/search":
+            if self.behavior.hit("nominatim"):
+                return self._send(503, {"error": "fake outage"})
+            q = query.get("q", "")
+            results = [
+                {"display_name": f"{q}, Springfield, {_district_for(q + str(i))[0]}, United States",
+                 "lat": f"{39.78 + i / 100:.4f}", "lon": f"{-89.65 - i / 100:.4f}"}
+                for i in range(3)
+            ]
+            return self._send(200, results)
+        if url.path.endswith("/geocode"):
+            if self.behavior.hit("geocodio"):
+                return self._send(503, {"error": "fake outage"})
+            state, number, first, last = _district_for(query.get("q", ""))
+            result = {
+                "address_components": {"state": state},
+                "fields": {"congressional_districts": [{
+                    "district_number": number,
+                    "current_legislators": [{"type": "representative", "bio": {"first_name": first, "last_name": last}}],
+                }]},
+            }
+            return self._send(200, {"results": [result]})
+        if url.path == "/stats":
+            if self.behavior.hit("worker"):
+                return self._send(503, {"error": "fake outage"})
+            total = self.behavior.report()["signups"]
+            etag = f'"{total}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, {"total_signups": total}, {"ETag": etag})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if url.path != "/signup":
+            return self._send(404, {"error": "not found"})
+        if self.behavior.hit("worker"):
+            return self._send(503, {"error": "fake outage"})
+        try:
+            email = json.loads(body or b"{}").get("email", "").strip().lower()
+        except ValueError:
+            return self._send(400, {"error": "bad json"})
+        status, stored_key = self.behavior.signup(email, self.headers.get("Idempotency-Key"))
+        self._send(status, {"ok": status == 200}, {"Idempotency-Key": stored_key} if stored_key else None)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSmtpHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib.SMTP: EHLO, MAIL, RCPT, DATA, NOOP, QUIT.
+    behavior = None
+
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self._reply("220 fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 fake-smtp")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self._reply("250 OK")
+            elif command.startswith("DATA"):
+                self._reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                if self.behavior.hit("smtp"):
+                    self._reply("451 4.3.0 fake temporary failure")
+                else:
+                    self._reply("250 OK queued")
+            elif command.startswith("QUIT"):
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("502 not implemented")
+
+
+class FakeSmtpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeWorksheet:
+    # Stands in for a gspread worksheet: append_row and col_values only.
+    def __init__(self, behavior):
+        self.behavior = behavior
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def append_row(self, values, **kwargs):
+        if self.behavior.hit("sheets"):
+            raise RuntimeError("fake Sheets quota exceeded")
+        with self.lock:
+            self.rows.append(list(values))
+
+    def col_values(self, col):
+        with self.lock:
+            return ["header"] + [row[col - 1] for row in self.rows]
+
+
+def pick_address(at, term, searchbox_key="address_searchbox"):
+    # Stands in for the browser side of the address searchbox, which AppTest
+    # can't drive: runs the lookup its search callback would, then stores
+    # the first suggestion as the picked result and reruns. Returns False
+    # when nothing was found.
+    import address_service
+
+    results = address_service.search(term, at.session_state.search_session_id, timeout=30)
+    if not results:
+        return False
+    state = dict(at.session_state[searchbox_key])
+    state.update(search=term, result=results[0])
+    at.session_state[searchbox_key] = state
+    at.run()
+    return True
+
+
+def start(behavior, host="127.0.0.1", port=0, smtp_port=0):
+    # Starts both servers on daemon threads; returns (http_base_url, smtp_port).
+    handler = type("Handler", (FakeHandler,), {"behavior": behavior})
+    http_server = ThreadingHTTPServer((host, port), handler)
+    http_server.daemon_threads = True
+    smtp_handler = type("SmtpHandler", (FakeSmtpHandler,), {"behavior": behavior})
+    smtp_server = FakeSmtpServer((host, smtp_port), smtp_handler)
+    for server in (http_server, smtp_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://{host}:{http_server.server_address[1]}", smtp_server.server_address[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local fakes of Nominatim, Geocodio, the Worker and SMTP.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--smtp-port", type=int, default=8925)
+    parser.add_argument("--latency", default="", help="per-service milliseconds, e.g. worker=80,smtp=150")
+    parser.add_argument("--errors", default="", help="per-service error rate, e.g. worker=0.02")
+    args = parser.parse_args()
+
+    try:
+        behavior = Behavior(parse_profile(args.latency), parse_profile(args.errors))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    base, smtp_port = start(behavior, port=args.port, smtp_port=args.smtp_port)
+    print(f"HTTP fakes on {base} (NOMINATIM_URL={base}/search GEOCODIO_URL={base}/v1.7/geocode WORKER_BASE_URL={base})")
+    print(f"SMTP fake on 127.0.0.1:{smtp_port} (ssl = false)")
+    try:
+        while True:
+            time.sleep(10)
+            print(behavior.report())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Drive simulated signers through the whole pledge flow against local fakes.
+Usage: python scripts/load_test.py [--sessions 50] [--processes 8] [--latency worker=80,smtp=150] [--errors worker=0.02] [--duplicate-rate 0.1]
+
+Every session is a Streamlit AppTest running 80percentapp.py: name, email and
+address on step 1, pick a suggestion, Continue, enter the emailed code on
+step 2, land on step 3. Nominatim, Geocodio, the Worker and SMTP are served
+by scripts/fake_services.py from this process; the vault is an in-memory
+FakeWorksheet with the same latency/error knobs.
+
+AppTest swaps process-wide globals on every run, so two sessions can't run
+in one process at the same time. Concurrency therefore comes from
+--processes worker processes, each running its share of sessions back to
+back alongside the app's own background threads (outbox drainer, mail
+scheduler). They share one outbox and geocode cache in a temp directory,
+like several server processes on one host would.
+
+Reports sessions per second, p50/p99 per step, outcomes (signed, duplicate,
+error) and what each fake saw. --duplicate-rate reuses an earlier signer's
+email to exercise the duplicate filter and the Worker's 409.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import fake_services
+
+APP_PATH = str(ROOT / "80percentapp.py")
+STEPS = ("load", "search", "continue", "verify", "total")
+STEP3_WAIT_SECONDS = 10
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def run_session(secrets, name, email, address):
+    # Returns {"outcome": ..., "steps": {step: ms}}; steps stop where the session did.
+    from streamlit.testing.v1 import AppTest
+
+    steps = {}
+    started = time.perf_counter()
+
+    def timed(step, fn):
+        t = time.perf_counter()
+        fn()
+        steps[step] = (time.perf_counter() - t) * 1000
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.secrets.update(secrets)
+    try:
+        timed("load", at.run)
+
+        def search():
+            at.text_input[0].input(name)
+            at.text_input[1].input(email)
+            at.run()
+            return fake_services.pick_address(at, address)
+        found = []
+        timed("search", lambda: found.append(search()))
+        if not found[0]:
+            return {"outcome": "error: no address suggestions", "steps": steps}
+
+        def cont():
+            button(at, "Continue").click()
+            at.run()
+        timed("continue", cont)
+        if any("already signed" in e.value for e in at.error):
+            return {"outcome": "duplicate", "steps": steps}
+        if at.session_state.step != 2:
+            return {"outcome": "error: stuck on step 1", "steps": steps}
+
+        def verify():
+            if at.session_state.verification_code is not None:
+                at.text_input[0].input(at.session_state.verification_code)
+                button(at, "Verify and Sign").click()
+            at.run()
+            deadline = time.monotonic() + STEP3_WAIT_SECONDS
+            while at.session_state.step != 3 and not at.error and time.monotonic() < deadline:
+                time.sleep(0.2)
+                at.run()
+        timed("verify", verify)
+    except Exception as e:
+        return {"outcome": f"error: {type(e).__name__}: {e}", "steps": steps}
+
+    steps["total"] = (time.perf_counter() - started) * 1000
+    if at.exception:
+        return {"outcome": f"error: {at.exception[0].message}", "steps": steps}
+    if at.session_state.step == 3:
+        return {"outcome": "signed", "steps": steps}
+    if any("already signed" in e.value for e in at.error):
+        return {"outcome": "duplicate", "steps": steps}
+    return {"outcome": "error: did not reach step 3", "steps": steps}
+
+
+def run_worker(plans, base, smtp_port, workdir, sheets_latency_ms, sheets_error_rate, seed):
+    # One worker process: points the app at the fakes, then runs its sessions in turn.
+    os.environ["NOMINATIM_URL"] = f"{base}/search"
+    os.environ["GEOCODIO_URL"] = f"{base}/v1.7/geocode"
+
+    import backup_service
+    import geocode_cache
+    import mail_service
+    import metrics
+    import outbox_service
+
+    outbox_service.OUTBOX_PATH = os.path.join(workdir, "pledge_outbox.db")
+    geocode_cache.CACHE_PATH = os.path.join(workdir, "geocode_cache.db")
+    mail_service.SEND_LOG_PATH = os.path.join(workdir, "mail_sends.db")
+    metrics.start_exporter(os.path.join(workdir, f"metrics-{os.getpid()}.prom"))
+    sheets = fake_services.Behavior({"sheets": sheets_latency_ms}, {"sheets": sheets_error_rate}, seed=seed)
+    backup_service._worksheet = fake_services.FakeWorksheet(sheets)
+
+    secrets = {
+        "WORKER_BASE_URL": base,
+        "GEOCODIO_API_KEY": "fake",
+        "EMAIL_PASSWORD": "fake",
+        "mail_transports": [{
+            "name": "fake-smtp", "host": "127.0.0.1", "port": smtp_port, "username": "pledge@loadtest.example",
+            "password": "", "ssl": False, "daily_quota": 1000000,
+        }],
+    }
+    results = []
+    for plan in plans:
+        started = time.time()
+        result = run_session(secrets, *plan)
+        result["window"] = (started, time.time())
+        results.append(result)
+    return {
+        "results": results,
+        "dependencies": metrics.snapshot()["dependencies"],
+        "sheets": sheets.report(),
+    }
+
+
+def plan_sessions(count, addresses, duplicate_rate, rng):
+    plans = []
+    for i in range(count):
+        email = f"signer{i}@loadtest.example"
+        if plans and rng.random() < duplicate_rate:
+            email = rng.choice(plans)[1]
+        plans.append((f"Signer {i}", email, f"{100 + i % addresses} Main Street"))
+    return plans
+
+
+def summarize(results, wall_seconds, fakes):
+    outcomes = {}
+    for r in results:
+        kind = "error" if r["outcome"].startswith("error") else r["outcome"]
+        outcomes[kind] = outcomes.get(kind, 0) + 1
+    steps = {}
+    for step in STEPS:
+        values = [r["steps"][step] for r in results if step in r["steps"]]
+        steps[step] = {"n": len(values), "p50_ms": percentile(values, 0.5), "p99_ms": percentile(values, 0.99)}
+    return {
+        "sessions": len(results),
+        "wall_seconds": round(wall_seconds, 2),
+        "sessions_per_second": round(len(results) / wall_seconds, 2) if wall_seconds else None,
+        "outcomes": outcomes,
+        "error_rate": round(outcomes.get("error", 0) / len(results), 4) if results else 0.0,
+        "steps": steps,
+        "error_samples": sorted({r["outcome"] for r in results if r["outcome"].startswith("error")})[:5],
+        "fakes": fakes,
+    }
+
+
+def merge_dependencies(snapshots):
+    # Call counts and outcomes add up; percentiles are per process, so the
+    # worst one is reported.
+    merged = {}
+    for snapshot in snapshots:
+        for name, entry in snapshot.items():
+            into = merged.setdefault(name, {})
+            for key, value in entry.items():
+                if value is None:
+                    continue
+                if key.endswith("_ms"):
+                    into[key] = max(into.get(key, 0.0), value)
+                else:
+                    into[key] = into.get(key, 0) + value
+    return merged
+
+
+def print_report(report, dependencies):
+    print(f"\n{report['sessions']} sessions in {report['wall_seconds']}s = {report['sessions_per_second']} sessions/s")
+    print(f"outcomes: {report['outcomes']}  (error rate {report['error_rate']:.1%})")
+    print(f"{'step':<10}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for step, s in report["steps"].items():
+        if s["n"]:
+            print(f"{step:<10}{s['n']:>6}{s['p50_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+    for sample in report["error_samples"]:
+        print(f"  {sample}")
+    print("dependencies as the app saw them (p99: worst process):")
+    for name, d in sorted(dependencies.items()):
+        outcomes = ", ".join(f"{k} {v}" for k, v in d.items() if k != "count" and not k.endswith("_ms"))
+        print(f"  {name:<14} {d['count']:>5} calls  p50 {d.get('p50_ms', 0):7.1f} ms  p99 {d.get('p99_ms', 0):7.1f} ms  ({outcomes})")
+    print(f"fakes: {report['fakes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of the pledge flow against local fakes.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=min(8, os.cpu_count() or 1), help="sessions in flight at once")
+    parser.add_argument("--latency", default="nominatim=150,geocodio=120,worker=80,smtp=200,sheets=300",
+                        help="per-service milliseconds")
+    parser.add_argument("--errors", default="", help="per-service error rate, e.g. worker=0.02,smtp=0.01")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of sessions reusing an earlier email")
+    parser.add_argument("--addresses", type=int, default=20, help="distinct addresses the sessions type")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="also write the report here")
+    args = parser.parse_args()
+
+    try:
+        latency = fake_services.parse_profile(args.latency)
+        errors = fake_services.parse_profile(args.errors)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    behavior = fake_services.Behavior(latency, errors, seed=args.seed)
+    base, smtp_port = fake_services.start(behavior)
+    workdir = tempfile.mkdtemp(prefix="pledge-load-")
+
+    plans = plan_sessions(args.sessions, max(1, args.addresses), args.duplicate_rate, random.Random(args.seed))
+    processes = max(1, min(args.processes, len(plans)))
+    shares = [plans[i::processes] for i in range(processes)]
+    print(f"Running {len(plans)} sessions in {processes} processes against {base} (work dir {workdir})")
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(run_worker, share, base, smtp_port, workdir,
+                        latency.get("sheets", 0.0), errors.get("sheets", 0.0), args.seed + i)
+            for i, share in enumerate(shares)
+        ]
+        outputs = [f.result() for f in futures]
+    results = [r for output in outputs for r in output["results"]]
+    # Measured from the first session's start, not counting process spawn.
+    wall = max(r["window"][1] for r in results) - min(r["window"][0] for r in results)
+
+    fakes = behavior.report()
+    for output in outputs:
+        fakes["calls"]["sheets"] += output["sheets"]["calls"]["sheets"]
+        fakes["errors"]["sheets"] += output["sheets"]["errors"]["sheets"]
+    report = summarize(results, wall, fakes)
+
+    print_report(report, merge_dependencies(output["dependencies"] for output in outputs))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Rebuild data/roster.json, the district -> representative table used by district_service.py.
+Usage: python scripts/refresh_roster.py [--source legislators-current.json] [--overrides overrides.json] [--out data/roster.json]
+
+By default the source is the bulk dataset published by the
+@unitedstates/congress-legislators project. Every seat in the current
+apportionment gets an entry; a seat with no sitting member is "Vacant".
+
+Overrides are a JSON object of district code -> name (or "Vacant") and win
+over the dataset. Use them for special elections and for members-elect the
+dataset hasn't picked up yet.
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from apportionment import APPORTIONMENT, DELEGATES, all_seats
+
+LEGISLATORS_URL = "https://unitedstates.github.io/congress-legislators/legislators-current.json"
+
+
+def current_reps(legislators, today):
+    reps = {}
+    for person in legislators:
+        term = person["terms"][-1]
+        if term.get("type") != "rep" or term.get("end", "9999") < today:
+            continue
+        state = term["state"]
+        district = 98 if state in DELEGATES else int(term.get("district", 0))
+        name = person["name"].get("official_full") or f"{person['name'].get('first', '')} {person['name'].get('last', '')}".strip()
+        reps[f"{state}-{district}"] = name
+    return reps
+
+
+def load_source(source):
+    if source:
+        with open(source) as f:
+            return json.load(f)
+    response = requests.get(LEGISLATORS_URL, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the district -> representative roster.")
+    parser.add_argument("--source", type=Path, help="local copy of legislators-current.json (default: download)")
+    parser.add_argument("--overrides", type=Path, help="JSON object of district code -> rep name or \"Vacant\"")
+    parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent.parent / "data" / "roster.json")
+    args = parser.parse_args()
+
+    assert sum(APPORTIONMENT.values()) == 435
+
+    today = date.today().isoformat()
+    reps = current_reps(load_source(args.source), today)
+    overrides = json.loads(args.overrides.read_text()) if args.overrides else {}
+
+    seats = all_seats()
+    unknown = sorted(set(reps) - set(seats))
+    if unknown:
+        print(f"Warning: members for seats outside the apportionment table: {', '.join(unknown)}")
+
+    districts = {code: overrides.get(code, reps.get(code, "Vacant")) for code in seats}
+    vacant = sorted(code for code, name in districts.items() if name == "Vacant")
+    if len(vacant) > 10:
+        print(f"Error: {len(vacant)} vacancies; the source data looks wrong. Keeping the old roster.")
+        sys.exit(1)
+
+    if args.out.exists() and json.loads(args.out.read_text()).get("districts") == districts:
+        print(f"{args.out} is already current ({len(vacant)} vacant)")
+        return
+
+    roster = {"generated": today, "districts": districts}
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(roster, indent=0, sort_keys=True, ensure_ascii=False))
+    print(f"Wrote {args.out}: {len(districts)} seats, {len(vacant)} vacant{': ' + ', '.join(vacant) if vacant else ''}")
+
+
+if __name__ == "__main__":
+    main()
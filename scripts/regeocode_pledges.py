@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Re-geocode stored pledges after redistricting or a change of representatives.
+Usage: python scripts/regeocode_pledges.py vault.csv corrected.csv [--write-vault] [--run ID] [--checkpoint regeocode.db] [--chunk-size 5000] [--concurrency 4]
+
+Works on a CSV export of the vault (or pledges.csv) in three streaming passes,
+so memory stays flat no matter how many rows there are:
+
+  1. collect  - distinct addresses go into a SQLite checkpoint file, keyed by
+                their canonical form; the text sent to Geocodio is the
+                address as the signer picked it
+  2. geocode  - pending addresses go to Geocodio's batch endpoint in chunks,
+                a few chunks in flight at a time; each finished chunk is
+                committed, so an interrupted run resumes where it stopped
+  3. rewrite  - the input is streamed again and District/Rep are corrected
+
+The corrected CSV is always written. With --write-vault the changed
+District/Rep cells are also written back to the vault sheet in batched
+updates; the vault is append-only, so export row N is still sheet row N + 1,
+and a row is only updated if its Email still matches. Nothing is written to
+the Worker, which has no update endpoint: apply the CSV there by hand.
+
+The checkpoint belongs to one run: by default the input file plus the
+current Congress and district index version, or --run to name it. Starting
+a different run clears the previous run's answers, so a checkpoint from
+before a redistricting is never reused.
+
+The app writes each pledge's selected address to the vault's Address column.
+Rows without one (manual district entries, and pledges from before that
+column existed) keep their District and only get Rep refreshed from
+data/roster.json. Point --geocodio-url at a local mock to test without quota.
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+import district_service
+from geocode_cache import canonical_address
+
+BATCH_LIMIT = 10000  # Geocodio's maximum addresses per batch request
+
+
+VAULT_WRITE_BATCH = 500  # cell ranges per Sheets batch_update call
+
+
+def default_run_id(input_path):
+    # District answers are only good for this export and this Congress and
+    # index build (the same generation geocode_cache keys on).
+    stat = Path(input_path).stat()
+    return f"{Path(input_path).resolve()}:{stat.st_size}:{int(stat.st_mtime)}:{district_service.cache_generation()}"
+
+
+def open_checkpoint(path, run_id=""):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS addresses ("
+        "address TEXT PRIMARY KEY, query TEXT, district TEXT, rep TEXT, done INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS run (id TEXT NOT NULL)")
+    previous = conn.execute("SELECT id FROM run").fetchone()
+    if previous is None or previous[0] != run_id:
+        if previous is not None:
+            print(f"Checkpoint {path} belongs to another run; starting over.")
+        conn.execute("DELETE FROM addresses")
+        conn.execute("DELETE FROM run")
+        conn.execute("INSERT INTO run (id) VALUES (?)", (run_id,))
+        conn.commit()
+    return conn
+
+
+def collect(conn, input_path, address_column):
+    seen = 0
+    with open(input_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if address_column not in (reader.fieldnames or []):
+            print(f"No '{address_column}' column in {input_path}; only Rep will be refreshed.")
+            return 0
+        batch = []
+        for row in reader:
+            text = (row.get(address_column) or "").strip()
+            address = canonical_address(text)
+            if address:
+                batch.append((address, text))
+                seen += 1
+            if len(batch) >= 10000:
+                conn.executemany("INSERT OR IGNORE INTO addresses (address, query) VALUES (?, ?)", batch)
+                conn.commit()
+                batch = []
+        conn.executemany("INSERT OR IGNORE INTO addresses (address, query) VALUES (?, ?)", batch)
+        conn.commit()
+    return seen
+
+
+def geocode_chunk(session, url, api_key, queries, retries=3):
+    for attempt in range(retries):
+        try:
+            response = session.post(url, params={"api_key": api_key, "fields": "cd"}, json=queries, timeout=600)
+            if response.status_code == 200:
+                answers = response.json().get("results", [])
+                return [
+                    district_service.parse_geocodio_results(answer.get("response", {}).get("results", []))
+                    for answer in answers
+                ]
+            if response.status_code < 500 and response.status_code != 429:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        except requests.RequestException as e:
+            print(f"  chunk attempt {attempt + 1} failed: {e}")
+        time.sleep(2 ** attempt)
+    raise RuntimeError(f"giving up on a chunk of {len(queries)} addresses")
+
+
+def pending_chunks(conn, chunk_size):
+    # Keyset pagination keeps each read small and stable while chunks finish.
+    # Yields [(canonical address, text to send)].
+    last = ""
+    while True:
+        rows = conn.execute(
+            "SELECT address, query FROM addresses WHERE done = 0 AND address > ? ORDER BY address LIMIT ?",
+            (last, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield [(address, query or address) for address, query in rows]
+
+
+def geocode(conn, url, api_key, chunk_size, concurrency):
+    total = conn.execute("SELECT COUNT(*) FROM addresses WHERE done = 0").fetchone()[0]
+    print(f"Geocoding {total} pending addresses in chunks of {chunk_size} ({concurrency} in flight)")
+    done = 0
+    session = requests.Session()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+        chunks = pending_chunks(conn, chunk_size)
+        while True:
+            while len(in_flight) < concurrency:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                queries = [query for _, query in chunk]
+                in_flight[pool.submit(geocode_chunk, session, url, api_key, queries)] = chunk
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = in_flight.pop(future)
+                results = future.result()
+                conn.executemany(
+                    "UPDATE addresses SET district = ?, rep = ?, done = 1 WHERE address = ?",
+                    [(dist, rep, address) for (address, _), (dist, rep) in zip(chunk, results)],
+                )
+                conn.commit()
+                done += len(chunk)
+                print(f"  {done}/{total}")
+
+
+def rewrite(conn, input_path, output_path, address_column, on_change=None):
+    # `on_change((sheet_row, email, district, rep))` is called for every
+    # row whose District or Rep changed.
+    stats = {"rows": 0, "district_changed": 0, "rep_changed": 0, "unresolved": 0}
+    with open(input_path, newline="", encoding="utf-8") as src, open(output_path, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            stats["rows"] += 1
+            district = row.get("District") or ""
+            geocoded_rep = None
+            address = canonical_address(row.get(address_column) or "")
+            if address:
+                found = conn.execute(
+                    "SELECT district, rep FROM addresses WHERE address = ? AND done = 1", (address,)
+                ).fetchone()
+                if found and found[0]:
+                    district, geocoded_rep = found
+                elif found:
+                    stats["unresolved"] += 1
+            rep = (district_service.lookup_rep(district) if district else None) or geocoded_rep
+            changed = False
+            if district != (row.get("District") or ""):
+                stats["district_changed"] += 1
+                row["District"] = district
+                changed = True
+            if rep and rep != row.get("Rep"):
+                stats["rep_changed"] += 1
+                row["Rep"] = rep
+                changed = True
+            if changed and on_change is not None:
+                # Row 1 of the sheet is the header.
+                on_change((stats["rows"] + 1, row.get("Email") or "", row["District"], row.get("Rep") or ""))
+            writer.writerow(row)
+    return stats
+
+
+def _column(name):
+    # 1-based vault column number and its A1 letter.
+    import backup_service
+
+    index = backup_service.VAULT_COLUMNS.index(name)
+    return index + 1, chr(ord("A") + index)
+
+
+def write_vault(worksheet, changes, batch_size=VAULT_WRITE_BATCH):
+    # `changes` is [(sheet_row, email, district, rep)]. One read of the
+    # Email column guards against writing to a row that isn't the one
+    # exported; then District/Rep go out in batched range updates.
+    emails = worksheet.col_values(_column("Email")[0])
+    first, last = _column("District")[1], _column("Rep")[1]
+    updates, skipped = [], 0
+    for sheet_row, email, district, rep in changes:
+        current = emails[sheet_row - 1] if sheet_row - 1 < len(emails) else ""
+        if current.strip().lower() != email.strip().lower():
+            skipped += 1
+            continue
+        updates.append({"range": f"{first}{sheet_row}:{last}{sheet_row}", "values": [[district, rep]]})
+    for i in range(0, len(updates), batch_size):
+        worksheet.batch_update(updates[i:i + batch_size])
+    return len(updates), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-geocode stored pledges in bulk.")
+    parser.add_argument("input", type=Path, help="CSV export with Timestamp,Name,Email,District,Rep,Address")
+    parser.add_argument("output", type=Path, help="where to write the corrected CSV")
+    parser.add_argument("--address-column", default="Address")
+    parser.add_argument("--checkpoint", type=Path, default=Path("regeocode.db"), help="resumable progress file")
+    parser.add_argument("--run", help="run id the checkpoint belongs to (default: input file + Congress + index version)")
+    parser.add_argument("--write-vault", action="store_true", help="also write changed District/Rep cells back to the vault sheet")
+    parser.add_argument("--chunk-size", type=int, default=5000, help=f"addresses per batch request (max {BATCH_LIMIT})")
+    parser.add_argument("--concurrency", type=int, default=4, help="batch requests in flight at once")
+    parser.add_argument("--geocodio-url", default=district_service.GEOCODIO_URL)
+    parser.add_argument("--api-key", default=os.environ.get("GEOCODIO_API_KEY"))
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"Error: File not found: {args.input}")
+        sys.exit(1)
+    if district_service.load_roster() is None:
+        print("Warning: data/roster.json not found; Rep values will come from Geocodio only.")
+
+    conn = open_checkpoint(args.checkpoint, args.run or default_run_id(args.input))
+    seen = collect(conn, args.input, args.address_column)
+    if seen:
+        if not args.api_key:
+            print("Error: set GEOCODIO_API_KEY or pass --api-key")
+            sys.exit(1)
+        geocode(conn, args.geocodio_url, args.api_key, min(args.chunk_size, BATCH_LIMIT), args.concurrency)
+
+    changes = []
+    stats = rewrite(conn, args.input, args.output, args.address_column, changes.append if args.write_vault else None)
+    print(
+        f"Wrote {args.output}: {stats['rows']} rows, {stats['district_changed']} districts changed, "
+        f"{stats['rep_changed']} reps changed, {stats['unresolved']} addresses unresolved"
+    )
+    if args.write_vault:
+        import backup_service
+
+        worksheet = backup_service.get_vault_worksheet()
+        if worksheet is None:
+            print("Error: BACKUP_URL is not set in .streamlit/secrets.toml; nothing written to the vault.")
+            sys.exit(1)
+        written, skipped = write_vault(worksheet, changes)
+        print(f"Vault: {written} rows updated, {skipped} skipped (Email no longer matches the export)")
+    else:
+        print("The vault and Worker are unchanged; pass --write-vault to update the vault sheet.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import types
+
+# What each browser session costs in server memory, for sizing instances.
+#
+# Every open tab keeps its st.session_state alive for as long as its
+# websocket is connected. report() walks each live session's state (the
+# keys the app and its widgets set) and adds up everything the values
+# reference, counting an object shared inside one session once. Strings
+# shared between sessions are counted in each, so the total is an upper
+# bound.
+#
+# Streamlit has no public API for other sessions' state, so the session
+# list comes from the runtime's session manager; where that isn't there
+# (AppTest, bare mode) only the calling session is reported. Walking
+# thousands of sessions takes a moment, so the admin panel runs this on
+# request rather than on every rerun.
+
+TOP_KEYS = 5
+
+# Referenced from state but owned by the process, not the session.
+_NOT_WALKED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+_LEAVES = (str, bytes, bytearray, int, float, bool, type(None))
+
+
+def deep_sizeof(obj, seen=None):
+    # sys.getsizeof of obj plus everything reachable through containers,
+    # __dict__ and __slots__; anything already in `seen` is skipped.
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _NOT_WALKED):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, _LEAVES):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            attrs = getattr(o, "__dict__", None)
+            if isinstance(attrs, dict):
+                stack.append(attrs)
+            for cls in type(o).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(o, slot):
+                        stack.append(getattr(o, slot))
+    return total
+
+
+def session_bytes(state):
+    # (total bytes, {key: bytes}) for one session's state dict.
+    seen = set()
+    per_key = {key: deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in state.items()}
+    return sum(per_key.values()), per_key
+
+
+def _live_states():
+    # Each live session's state as a dict, or None outside a real server.
+    try:
+        from streamlit.runtime import Runtime
+
+        infos = Runtime.instance()._session_mgr.list_active_sessions()
+    except Exception:
+        return None
+    states = []
+    for info in infos:
+        try:
+            states.append(dict(info.session.session_state.filtered_state))
+        except Exception:
+            # Its script changed the state while we read it; skip this one.
+            states.append(None)
+    return states
+
+
+def report(current_state):
+    # `current_state` is the calling session's st.session_state.to_dict().
+    current, per_key = session_bytes(current_state)
+    states = _live_states()
+    live = states is not None and len(states) > 0
+    sizes = [session_bytes(s)[0] for s in states if s is not None] if live else [current]
+    return {
+        "scope": "live sessions" if live else "this session only",
+        "sessions": len(sizes),
+        "skipped": sum(1 for s in states if s is None) if live else 0,
+        "total_bytes": sum(sizes),
+        "mean_bytes": sum(sizes) / len(sizes) if sizes else 0,
+        "max_bytes": max(sizes, default=0),
+        "current_bytes": current,
+        "current_top": sorted(per_key.items(), key=lambda kv: kv[1], reverse=True)[:TOP_KEYS],
+    }
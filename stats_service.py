@@ -0,0 +1,108 @@
+import threading
+import time
+
+import http_client
+import worker_client
+
+# Live signature counts for the public page.
+#
+# One background thread per process polls the Worker's /stats with
+# If-None-Match, so an unchanged total costs a 304 with no body. Every
+# session reads the shared snapshot; no session ever calls /stats itself.
+# Between polls, signups made on this instance are added locally so people
+# see the counter move the moment they sign; the next poll replaces the
+# numbers with the Worker's. Per-district counts only exist when the Worker
+# sends them (a "districts" or "by_district" field); local signups never
+# invent them.
+
+POLL_SECONDS = 30
+ERROR_BACKOFF_SECONDS = 120   # between polls while the Worker is failing
+
+_snapshot = {"total": None, "districts": {}, "has_districts": False, "fetched_at": None}
+_etag = None
+_lock = threading.Lock()
+_poller = None
+_poller_lock = threading.Lock()
+_stats = {"polls": 0, "not_modified": 0, "errors": 0}
+
+
+def _parse_districts(raw):
+    # Accepts {"NY-14": 12, ...} or [{"district": "NY-14", "count": 12}, ...].
+    if isinstance(raw, dict):
+        return {str(k): int(v) for k, v in raw.items()}
+    if isinstance(raw, list):
+        return {str(r["district"]): int(r.get("count", 0)) for r in raw if isinstance(r, dict) and r.get("district")}
+    return {}
+
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+
+def poll_once():
+    global _etag
+    headers = {"If-None-Match": _etag} if _etag else {}
+    _count("polls")
+    response = http_client.get(
+        "worker", f"{worker_client.base_url()}/stats", headers=headers, ok=(200, 304), timeout=8, metric="worker_stats"
+    )
+    now = time.time()
+    if response.status_code == 304:
+        with _lock:
+            _stats["not_modified"] += 1
+            _snapshot["fetched_at"] = now
+        return False
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise http_client.HttpError("worker", "invalid", f"bad JSON: {e}", response.status_code) from e
+    with _lock:
+        _snapshot["total"] = int(data.get("total_signups", 0))
+        raw = data.get("districts", data.get("by_district"))
+        _snapshot["has_districts"] = raw is not None
+        _snapshot["districts"] = _parse_districts(raw)
+        _snapshot["fetched_at"] = now
+        _etag = response.headers.get("ETag")
+    return True
+
+
+def _poll_forever():
+    while True:
+        delay = POLL_SECONDS
+        if worker_client.breaker.available():
+            try:
+                poll_once()
+            except Exception as e:
+                _count("errors")
+                print(f"⚠️ Stats poll failed: {e}")
+                delay = ERROR_BACKOFF_SECONDS
+        time.sleep(delay)
+
+
+def start_poller():
+    global _poller
+    if _poller is not None and _poller.is_alive():
+        return
+    with _poller_lock:
+        if _poller is None or not _poller.is_alive():
+            _poller = threading.Thread(target=_poll_forever, name="stats-poller", daemon=True)
+            _poller.start()
+
+
+def record_signup(district):
+    with _lock:
+        if _snapshot["total"] is not None:
+            _snapshot["total"] += 1
+        if district and _snapshot["has_districts"]:
+            _snapshot["districts"][district] = _snapshot["districts"].get(district, 0) + 1
+
+
+def snapshot():
+    with _lock:
+        return {"total": _snapshot["total"], "districts": dict(_snapshot["districts"]), "fetched_at": _snapshot["fetched_at"]}
+
+
+def poll_stats():
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+
+@pytest.fixture
+def app(tmp_path):
+    # The app under AppTest with local stand-ins for every service. The
+    # searchbox is a custom component AppTest can't drive, so its browser
+    # side is played by patching the component call: set app.component["state"].
+    import bench_reruns
+    from streamlit.testing.v1 import AppTest
+
+    patches = bench_reruns.isolate(tmp_path)
+    component = {"state": None}
+    patches.append(mock.patch("streamlit_searchbox._get_react_component", lambda **kwargs: component["state"]))
+    patches[-1].start()
+    at = AppTest.from_file(bench_reruns.APP_PATH, default_timeout=30)
+    at.secrets.update(bench_reruns.SECRETS)
+    at.component = component
+    try:
+        yield at
+    finally:
+        for p in patches:
+            p.stop()
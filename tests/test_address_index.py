@@ -0,0 +1,107 @@
+import csv
+import sys
+from array import array
+
+import address_index
+import build_address_index
+
+ROWS = [
+    # LON, LAT, NUMBER, STREET, UNIT, CITY, REGION, POSTCODE
+    ("-89.65", "39.78", "123", "MAIN ST", "", "SPRINGFIELD", "IL", "62701"),
+    ("-89.64", "39.79", "12", "OAK AVE", "", "SPRINGFIELD", "", ""),
+    ("-87.62", "41.88", "123", "MAIN ST", "", "CHICAGO", "IL", ""),
+    ("-89.65", "39.78", "", "NO NUMBER RD", "", "SPRINGFIELD", "IL", ""),
+    ("-89.66", "39.77", "1230", "ELM ST", "APT 2", "SPRINGFIELD", "IL", ""),
+    # The first row again in another chunk, spaced differently.
+    ("-89.65", "39.78", "123", "MAIN  ST", "", "SPRINGFIELD", "il", "62701"),
+    ("-89.60", "39.70", "9", "ZINC LN", "", "SPRINGFIELD", "IL", ""),
+]
+
+
+def build(tmp_path, name="address_index.bin"):
+    source = tmp_path / "addresses.csv"
+    with open(source, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["LON", "LAT", "NUMBER", "STREET", "UNIT", "CITY", "REGION", "POSTCODE"])
+        writer.writerows(ROWS)
+    out = tmp_path / name
+    # Two rows per chunk, so the merge sees four sorted runs.
+    return out, build_address_index.build([source], out, default_state="IL", chunk_rows=2)
+
+
+def test_chunks_are_merged_in_key_order_with_duplicates_dropped(tmp_path):
+    out, (count, skipped) = build(tmp_path)
+    assert (count, skipped) == (5, 1)
+
+    index = address_index.AddressIndex(str(out))
+    keys = [index._key(i) for i in range(index.count)]
+    assert keys == sorted(keys)
+    assert keys == [
+        b"12 oak ave springfield il",
+        b"123 main st chicago il",
+        b"123 main st springfield il 62701",
+        b"1230 elm st apt 2 springfield il",
+        b"9 zinc ln springfield il",
+    ]
+
+
+def test_header_points_at_the_offsets_and_records(tmp_path):
+    out, (count, _) = build(tmp_path)
+    raw = out.read_bytes()
+
+    assert raw[:8] == address_index.MAGIC
+    assert int.from_bytes(raw[8:16], "little") == count
+    data = int.from_bytes(raw[16:24], "little")
+    assert data == address_index.HEADER_SIZE + 8 * count
+    offsets = array("Q", raw[address_index.HEADER_SIZE:data])
+    assert offsets[0] == 0
+    # Each offset lands on the start of a record.
+    assert all(raw[data + o - 1:data + o] == b"\n" for o in offsets[1:])
+    assert raw.endswith(b"\n")
+
+
+def test_offsets_are_written_little_endian_on_a_big_endian_host(tmp_path, monkeypatch):
+    out, _ = build(tmp_path)
+    native = out.read_bytes()
+    with monkeypatch.context() as m:
+        m.setattr(sys, "byteorder", "big")
+        swapped_out, _ = build(tmp_path, "swapped.bin")
+    swapped = swapped_out.read_bytes()
+
+    data = address_index.HEADER_SIZE + 8 * 5
+    offsets = array("Q", native[address_index.HEADER_SIZE:data])
+    offsets.byteswap()
+    assert swapped[address_index.HEADER_SIZE:data] == offsets.tobytes()
+    assert swapped[:address_index.HEADER_SIZE] == native[:address_index.HEADER_SIZE]
+    assert swapped[data:] == native[data:]
+
+
+def test_prefix_lookup(tmp_path):
+    out, _ = build(tmp_path)
+    index = address_index.AddressIndex(str(out))
+
+    assert index.suggest("123 main", 5) == [
+        ("123 Main St, Chicago, IL", "41.880000", "-87.620000"),
+        ("123 Main St, Springfield, IL 62701", "39.780000", "-89.650000"),
+    ]
+    # "123" is also a prefix of "1230", and the limit cuts the run short.
+    assert [r[0] for r in index.suggest("123", 5)][-1] == "1230 Elm St Apt 2, Springfield, IL"
+    assert len(index.suggest("123", 2)) == 2
+    # --state fills in the missing region.
+    assert index.suggest("12 oak", 5) == [("12 Oak Ave, Springfield, IL", "39.790000", "-89.640000")]
+    assert index.suggest("9 zinc ln springfield il", 5)[0][0] == "9 Zinc Ln, Springfield, IL"
+    assert index.suggest("zzz", 5) == []
+    assert index.suggest("0", 5) == []
+
+
+def test_module_suggest_counts_queries_and_hits(tmp_path, monkeypatch):
+    out, _ = build(tmp_path)
+    monkeypatch.setattr(address_index, "_index", None)
+    monkeypatch.setattr(address_index, "_index_loaded", False)
+    monkeypatch.setattr(address_index, "_stats", {"queries": 0, "hits": 0, "load_ms": None})
+    address_index.load(str(out))
+
+    assert len(address_index.suggest("123 main", 5)) == 2
+    assert address_index.suggest("zzz", 5) == []
+    stats = address_index.index_stats()
+    assert (stats["queries"], stats["hits"], stats["addresses"], stats["loaded"]) == (2, 1, 5, True)
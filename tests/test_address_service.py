@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+import pytest
+
+import address_service
+from address_service import Suggestion
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(address_service, "_cache", OrderedDict())
+    monkeypatch.setattr(address_service, "_stats", dict.fromkeys(address_service._stats, 0))
+    monkeypatch.setattr(address_service.address_index, "suggest", lambda key, limit: None)
+    clock = [1000.0]
+    monkeypatch.setattr(address_service.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def store(query, *names):
+    key = address_service.normalize_query(query)
+    address_service._cache_put(key, [Suggestion(n, "1", "2") for n in names], address_service.time.monotonic())
+
+
+def lookup(query):
+    results = address_service.cached(query)
+    return None if results is None else [r.display_name for r in results]
+
+
+def test_hit_miss_and_normalized_spelling():
+    store("123 Main St, Springfield", "123 Main St, Springfield, IL")
+    assert lookup("  123 MAIN st,springfield ") == ["123 Main St, Springfield, IL"]
+    assert lookup("9 Elm St") is None
+    assert lookup("123") is None   # too short to look up at all
+    stats = address_service.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_entries_expire_after_the_ttl(cache):
+    store("123 Main St", "123 Main St, Springfield, IL")
+    cache[0] += address_service.CACHE_TTL_SECONDS - 1
+    assert lookup("123 Main St") is not None
+    cache[0] += 2
+    assert lookup("123 Main St") is None
+    assert address_service.cache_stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(address_service, "CACHE_MAX_ENTRIES", 2)
+    store("1 Oak St", "1 Oak St")
+    store("2 Oak St", "2 Oak St")
+    assert lookup("1 Oak St")   # now more recent than "2 Oak St"
+    store("3 Oak St", "3 Oak St")
+    assert list(address_service._cache) == ["1 oak st", "3 oak st"]
+
+
+def test_short_complete_answer_is_narrowed_locally():
+    store("123 Main", "123 Main St, Springfield, IL", "123 Main Ave, Peoria, IL")
+    assert lookup("123 main st spr") == ["123 Main St, Springfield, IL"]
+    assert address_service.cache_stats()["prefix_hits"] == 1
+
+
+def test_full_answer_is_not_narrowed():
+    names = [f"123 Main St, Town {n}, IL" for n in range(address_service.RESULT_LIMIT)]
+    store("123 Main", *names)
+    assert lookup("123 main st town 1") is None
+
+
+def test_prefix_that_cuts_a_word_is_not_trusted():
+    # Nominatim matched "mai" as a whole word: not an answer for "main".
+    store("123 mai", "123 Mai Rd, Somewhere, IL")
+    assert lookup("123 main") is None
+    store("123 mai", "123 Main St, Springfield, IL")
+    assert lookup("123 main st") is None
+
+
+def test_narrowing_that_matches_nothing_is_a_miss():
+    store("123 Main", "123 Main St, Springfield, IL")
+    assert lookup("123 main ave") is None
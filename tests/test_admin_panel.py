@@ -0,0 +1,36 @@
+from unittest import mock
+
+import geocode_cache
+
+
+def captions(app):
+    return [c.value for c in app.caption]
+
+
+def test_server_stats_only_run_when_asked_for(app):
+    with mock.patch.object(geocode_cache, "cache_stats", wraps=geocode_cache.cache_stats) as cache_stats:
+        app.run()
+        app.run()
+        assert cache_stats.call_count == 0
+        assert not any(c.startswith("Geocode cache") for c in captions(app))
+
+        app.sidebar.toggle[0].set_value(True).run()
+        assert cache_stats.call_count == 1
+        assert any(c.startswith("Geocode cache") for c in captions(app))
+    assert not app.exception
+
+
+def buttons(app):
+    return [b.label for b in app.sidebar.button]
+
+
+def test_memory_report_needs_the_profile_token(app):
+    app.secrets["PROFILE_TOKEN"] = "s3cret"
+    app.run()
+    app.sidebar.toggle[0].set_value(True).run()
+    assert "Memory report" not in buttons(app)
+
+    app.query_params["profile"] = "s3cret"
+    app.run()
+    assert "Memory report" in buttons(app)
+    assert not app.exception
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+import district_service
+from singleflight import SingleFlight
+import refresh_roster
+
+
+@pytest.fixture
+def roster(monkeypatch):
+    seats = {seat: f"Rep {seat}" for seat in refresh_roster.all_seats()}
+    monkeypatch.setattr(district_service, "_roster", {"generated": "test", "districts": seats})
+    monkeypatch.setattr(district_service, "_roster_loaded", True)
+    return seats
+
+
+@pytest.mark.parametrize("typed", ["AK-AL", "ak-al", "AK-1", "AK-01", "AK-00", "AK 0", "AK"])
+def test_at_large_seats_resolve_however_they_are_typed(roster, typed):
+    assert district_service.resolve_manual_district(typed) == ("AK-0", "Rep AK-0")
+
+
+@pytest.mark.parametrize("typed", ["DC", "DC-AL", "dc-0", "DC-98"])
+def test_delegate_seats_resolve(roster, typed):
+    assert district_service.resolve_manual_district(typed) == ("DC-98", "Rep DC-98")
+
+
+@pytest.mark.parametrize("typed,code", [("NY-14", "NY-14"), ("ny 7", "NY-7"), ("IL-01", "IL-1"), ("AL-1", "AL-1")])
+def test_numbered_seats(roster, typed, code):
+    assert district_service.resolve_manual_district(typed)[0] == code
+
+
+@pytest.mark.parametrize("typed", ["NY", "AL", "NY-AL", "NY-0", "NY-99", "", "14"])
+def test_unknown_seats_are_rejected(roster, typed):
+    assert district_service.resolve_manual_district(typed) == (None, None)
+
+
+@pytest.fixture
+def no_roster(monkeypatch):
+    monkeypatch.setattr(district_service, "_roster", None)
+    monkeypatch.setattr(district_service, "_roster_loaded", True)
+    monkeypatch.setattr(district_service, "_rep_by_district", {})
+
+
+@pytest.mark.parametrize("typed", ["ZZ-99", "ZZ", "NY-99", "NY-0", "NY"])
+def test_without_a_roster_seats_outside_the_apportionment_are_rejected(no_roster, typed):
+    assert district_service.resolve_manual_district(typed) == (None, None)
+
+
+def test_without_a_roster_real_seats_resolve(no_roster):
+    district_service._rep_by_district["IL-13"] = "Rep IL-13"
+    assert district_service.resolve_manual_district("ny 14") == ("NY-14", "Unknown")
+    assert district_service.resolve_manual_district("AK-AL") == ("AK-0", "Unknown")
+    assert district_service.resolve_manual_district("DC") == ("DC-98", "Unknown")
+    # A rep Geocodio has already named is used.
+    assert district_service.resolve_manual_district("IL-13") == ("IL-13", "Rep IL-13")
+
+
+@pytest.fixture
+def geocodio(monkeypatch):
+    # A slow Geocodio and an empty cache; returns the addresses it was asked for.
+    asked = []
+
+    def fetch(address):
+        asked.append(address)
+        time.sleep(0.2)
+        return "IL-13", "Rep IL-13"
+
+    monkeypatch.setattr(district_service, "_geocodio_district", fetch)
+    monkeypatch.setattr(district_service.geocode_cache, "get", lambda address, generation: None)
+    monkeypatch.setattr(district_service.geocode_cache, "put", lambda *args: None)
+    monkeypatch.setattr(district_service, "_flight", SingleFlight())
+    monkeypatch.setattr(district_service, "_stats", dict.fromkeys(district_service._stats, 0))
+    monkeypatch.setattr(district_service, "_rep_by_district", {})
+    return asked
+
+
+def test_coalesced_lookups_count_one_geocodio_call(roster, geocodio):
+    threads = [threading.Thread(target=district_service.get_district, args=("123 Main St, Springfield, IL",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = district_service.lookup_stats()
+    assert len(geocodio) == 1
+    assert stats["geocodio"] == 1
+    assert stats["coalesced"] == 4
+
+
+@pytest.fixture
+def index(monkeypatch):
+    # One 1x1 degree cell split between two districts, with a strip on the
+    # east side that neither covers.
+    def square(x0, x1):
+        return [district_service._prepare_ring([(x0, 0), (x1, 0), (x1, 1), (x0, 1)])]
+
+    monkeypatch.setattr(district_service, "_index", {
+        "version": "test", "cell_size": 1, "cells": {"0,0": ["IL-13", "IL-15"]},
+        "districts": {"IL-13": square(0, 0.5), "IL-15": square(0.5, 0.9)},
+    })
+    monkeypatch.setattr(district_service, "_index_loaded", True)
+
+
+def test_points_outside_the_index_are_not_counted_as_ambiguous(roster, geocodio, index):
+    assert district_service.get_district("inside", 0.5, 0.25) == ("IL-13", "Rep IL-13")
+    district_service.get_district("on the line", 0.5, 0.5001)
+    district_service.get_district("east strip", 0.5, 0.95)
+    district_service.get_district("no cell", 5.5, 5.5)
+
+    stats = district_service.lookup_stats()
+    assert (stats["offline"], stats["ambiguous"], stats["outside_index"]) == (1, 1, 2)
+    assert stats["geocodio"] == 3
+
+
+def test_index_district_is_kept_when_no_roster_names_the_rep(geocodio, index, monkeypatch):
+    monkeypatch.setattr(district_service, "_roster", None)
+    monkeypatch.setattr(district_service, "_roster_loaded", True)
+    monkeypatch.setattr(district_service, "_rep_by_district", {})
+
+    # Geocodio (IL-13 in the fixture) only supplies the rep for its district.
+    assert district_service.get_district("inside", 0.5, 0.25) == ("IL-13", "Rep IL-13")
+    assert district_service.get_district("east side", 0.5, 0.75) == ("IL-15", "Unknown")
+    # Once learned, the rep comes from memory and Geocodio isn't asked.
+    assert district_service.get_district("also inside", 0.5, 0.3) == ("IL-13", "Rep IL-13")
+    assert geocodio == ["inside", "east side"]
@@ -0,0 +1,68 @@
+import threading
+from array import array
+
+import pytest
+
+import duplicate_filter
+
+
+@pytest.fixture(autouse=True)
+def empty_filter(monkeypatch):
+    monkeypatch.setattr(duplicate_filter, "_sorted", array("Q"))
+    monkeypatch.setattr(duplicate_filter, "_recent", set())
+    monkeypatch.setattr(duplicate_filter, "_loaded", False)
+    monkeypatch.setattr(duplicate_filter, "_stats", {"known": 0, "checks": 0, "rejected": 0, "load_ms": None})
+
+
+def test_load_takes_only_confirmed_signups(monkeypatch):
+    monkeypatch.setattr(duplicate_filter.outbox_service, "signed_emails", lambda: ["a@example.com", "b@example.com"])
+    assert duplicate_filter.load() == 2
+    assert duplicate_filter.contains(" A@Example.com ")
+    assert not duplicate_filter.contains("queued@example.com")
+    stats = duplicate_filter.filter_stats()
+    assert (stats["known"], stats["checks"], stats["rejected"], stats["loaded"]) == (2, 2, 1, True)
+
+
+def test_add_is_seen_at_once_and_folded_in_later(monkeypatch):
+    monkeypatch.setattr(duplicate_filter, "MERGE_AT", 3)
+    for n in range(5):
+        duplicate_filter.add(f"s{n}@example.com")
+    duplicate_filter.add("s0@example.com")
+
+    assert all(duplicate_filter.contains(f"s{n}@example.com") for n in range(5))
+    assert len(duplicate_filter._sorted) == 3 and len(duplicate_filter._recent) == 2
+    assert duplicate_filter.filter_stats()["known"] == 5
+    assert not duplicate_filter.contains("")
+
+
+def test_adds_during_load_survive_the_swap(monkeypatch):
+    # Signups keep arriving while load() reads the outbox; none may be lost
+    # when it swaps in the new array.
+    monkeypatch.setattr(duplicate_filter, "MERGE_AT", 16)
+    reading = threading.Event()
+    release = threading.Event()
+
+    def signed_emails():
+        reading.set()
+        release.wait(5)
+        return [f"old{n}@example.com" for n in range(100)] + ["new0@example.com"]
+
+    monkeypatch.setattr(duplicate_filter.outbox_service, "signed_emails", signed_emails)
+    loader = threading.Thread(target=duplicate_filter.load)
+    loader.start()
+    reading.wait(5)
+
+    adders = [
+        threading.Thread(target=lambda t=t: [duplicate_filter.add(f"new{n}@example.com") for n in range(t, 200, 4)])
+        for t in range(4)
+    ]
+    for t in adders:
+        t.start()
+    release.set()
+    for t in adders:
+        t.join()
+    loader.join()
+
+    assert all(duplicate_filter.contains(f"new{n}@example.com") for n in range(200))
+    assert all(duplicate_filter.contains(f"old{n}@example.com") for n in range(100))
+    assert len(duplicate_filter._sorted) + len(duplicate_filter._recent) == 300
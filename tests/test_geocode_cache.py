@@ -0,0 +1,93 @@
+import datetime
+import threading
+
+import pytest
+
+import geocode_cache
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocode_cache, "CACHE_PATH", str(tmp_path / "geocode_cache.db"))
+    monkeypatch.setattr(geocode_cache, "_puts", 0)
+    monkeypatch.setattr(geocode_cache, "_stats", dict.fromkeys(geocode_cache._stats, 0))
+
+
+def set_clock(monkeypatch, now):
+    monkeypatch.setattr(geocode_cache.time, "time", lambda: now)
+
+
+@pytest.mark.parametrize("typed", [
+    "123 Main Street, Springfield, IL, United States",
+    "123 main st springfield il",
+    "123 MAIN ST., Springfield, IL, USA",
+    "  123 Main Street Springfield IL United States of America ",
+])
+def test_spellings_of_one_address_share_a_key(typed):
+    assert geocode_cache.canonical_address(typed) == "123 MAIN ST SPRINGFIELD IL"
+
+
+def test_country_name_alone_is_kept():
+    assert geocode_cache.canonical_address("US") == "US"
+    assert geocode_cache.canonical_address("") == ""
+
+
+@pytest.mark.parametrize("day,congress", [("2025-01-02", 118), ("2025-01-03", 119), ("2026-10-18", 119), ("2027-01-03", 120)])
+def test_congress_turns_over_on_january_3_of_odd_years(day, congress):
+    assert geocode_cache.current_congress(datetime.date.fromisoformat(day)) == congress
+
+
+def test_hit_then_miss_on_a_new_generation():
+    geocode_cache.put("123 Main Street, Springfield, IL", "IL-13", "Rep", "119:v1")
+    assert geocode_cache.get("123 main st springfield il", "119:v1") == ("IL-13", "Rep")
+    assert geocode_cache.get("123 main st springfield il", "119:v2") is None
+    # The stale row is gone, so even the old generation misses now.
+    assert geocode_cache.get("123 main st springfield il", "119:v1") is None
+    stats = geocode_cache.cache_stats()
+    assert (stats["hits"], stats["stale"], stats["misses"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_entries_expire_after_max_age(monkeypatch):
+    set_clock(monkeypatch, 1000.0)
+    geocode_cache.put("1 Oak St", "IL-13", "Rep", "g")
+    set_clock(monkeypatch, 1000.0 + geocode_cache.MAX_AGE_SECONDS - 1)
+    assert geocode_cache.get("1 Oak St", "g") == ("IL-13", "Rep")
+    set_clock(monkeypatch, 1000.0 + geocode_cache.MAX_AGE_SECONDS + 1)
+    assert geocode_cache.get("1 Oak St", "g") is None
+
+
+def test_eviction_drops_old_generations_then_least_recently_used(monkeypatch):
+    monkeypatch.setattr(geocode_cache, "MAX_ENTRIES", 10)
+    monkeypatch.setattr(geocode_cache, "EVICT_CHECK_EVERY", 1000)
+    monkeypatch.setattr(geocode_cache, "TOUCH_AFTER_SECONDS", 0)
+    set_clock(monkeypatch, 100.0)
+    geocode_cache.put("old generation", "IL-1", "Rep", "old")
+    for n in range(12):
+        set_clock(monkeypatch, 200.0 + n)
+        geocode_cache.put(f"{n} Elm St", "IL-13", "Rep", "g")
+    set_clock(monkeypatch, 300.0)
+    assert geocode_cache.get("0 Elm St", "g") is not None   # touched: now the most recent
+
+    geocode_cache._evict(geocode_cache._connect(), "g", 301.0)
+    keys = {row[0] for row in geocode_cache._connect().execute("SELECT key FROM geocode")}
+    # 12 current entries, down to 90% of 10; the oldest-used go first.
+    assert keys == {"0 ELM ST"} | {f"{n} ELM ST" for n in range(4, 12)}
+    assert geocode_cache.cache_stats()["evicted"] == 1 + 3
+
+
+def test_eviction_runs_once_per_interval_across_threads(monkeypatch):
+    monkeypatch.setattr(geocode_cache, "EVICT_CHECK_EVERY", 50)
+    checks = []
+    monkeypatch.setattr(geocode_cache, "_evict", lambda conn, generation, now: checks.append(1))
+
+    def put_many(t):
+        for n in range(100):
+            geocode_cache.put(f"{t}-{n} Pine St", "IL-13", "Rep", "g")
+
+    threads = [threading.Thread(target=put_many, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(checks) == 400 // 50
+    assert geocode_cache.cache_stats()["entries"] == 400
@@ -0,0 +1,26 @@
+import pytest
+from urllib3.exceptions import NewConnectionError
+
+import http_client
+
+
+def test_worker_posts_get_exactly_one_connect_attempt(monkeypatch):
+    # worker_client owns the retries; a second layer here would multiply
+    # them and hide attempts from its circuit breaker.
+    attempts = []
+
+    def new_conn(self):
+        attempts.append(1)
+        raise NewConnectionError(self, "connection refused")
+
+    monkeypatch.setattr("urllib3.connection.HTTPConnection._new_conn", new_conn)
+    monkeypatch.setattr(http_client, "_sessions", {})
+    with pytest.raises(http_client.HttpError) as error:
+        http_client.post("worker", "http://127.0.0.1:9/signup", json={}, timeout=1)
+    assert error.value.kind == "connection"
+    assert len(attempts) == 1
+
+
+def test_worker_session_has_no_transport_retries():
+    adapter = http_client._build_session("worker").get_adapter("https://worker.test")
+    assert adapter.max_retries.total == 0 and adapter.max_retries.connect == 0
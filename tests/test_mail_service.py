@@ -0,0 +1,134 @@
+import smtplib
+import time
+
+import pytest
+
+import mail_service
+
+
+class FakeConnection:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def send(self, to_email, message):
+        self.sent.append(to_email)
+        if self.error is not None:
+            raise self.error
+
+    def ensure_open(self):
+        pass
+
+
+def transport(name, quota=5, error=None):
+    t = mail_service.Transport(name, "smtp.test", 465, f"{name}@example.com", "", quota)
+    t.connection = FakeConnection(error)
+    return t
+
+
+def job(to="signer@example.com"):
+    return {"ticket": 0, "to": to, "subject": "s", "body": "b", "created": time.monotonic()}
+
+
+@pytest.fixture(autouse=True)
+def send_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(mail_service, "SEND_LOG_PATH", str(tmp_path / "mail_sends.db"))
+    monkeypatch.setattr(mail_service, "_transports", [])
+
+
+def test_refused_recipient_fails_once_and_keeps_quota(monkeypatch):
+    refused = smtplib.SMTPRecipientsRefused({"not-an-email": (553, b"5.1.3 bad address")})
+    a, b = transport("a", error=refused), transport("b", error=refused)
+    monkeypatch.setattr(mail_service, "_transports", [a, b])
+
+    assert mail_service._deliver(job("not-an-email")) == mail_service.FAILED
+    assert len(a.connection.sent) + len(b.connection.sent) == 1
+    assert (a.remaining(), b.remaining()) == (5, 5)
+
+
+def test_permanent_5xx_after_data_is_refused():
+    assert mail_service._is_refused(smtplib.SMTPDataError(554, b"5.7.1 rejected"))
+    assert not mail_service._is_refused(smtplib.SMTPAuthenticationError(535, b"bad credentials"))
+    assert not mail_service._is_refused(smtplib.SMTPDataError(451, b"try again later"))
+
+
+def test_transport_error_moves_on_and_returns_the_send(monkeypatch):
+    broken, healthy = transport("broken", quota=10, error=smtplib.SMTPServerDisconnected("gone")), transport("healthy", quota=5)
+    monkeypatch.setattr(mail_service, "_transports", [broken, healthy])
+
+    assert mail_service._deliver(job()) == mail_service.SENT
+    assert broken.connection.sent and healthy.connection.sent
+    assert (broken.remaining(), healthy.remaining()) == (10, 4)
+
+
+def test_every_transport_failing_is_a_failure_not_a_delay(monkeypatch):
+    monkeypatch.setattr(mail_service, "_transports", [transport("a", error=OSError("reset"))])
+    assert mail_service._deliver(job()) == mail_service.FAILED
+
+
+def test_quota_error_cools_down_and_tries_the_next(monkeypatch):
+    full = transport("full", quota=10, error=mail_service.QuotaExceeded("550 5.4.5 limit"))
+    spare = transport("spare")
+    monkeypatch.setattr(mail_service, "_transports", [full, spare])
+
+    assert mail_service._deliver(job()) == mail_service.SENT
+    assert not full.ready(time.monotonic())
+
+
+def test_no_capacity_returns_none_without_sending(monkeypatch):
+    t = transport("a", quota=1)
+    monkeypatch.setattr(mail_service, "_transports", [t])
+    assert mail_service._deliver(job()) == mail_service.SENT
+    assert mail_service._deliver(job()) is None
+    assert t.connection.sent == ["signer@example.com"]
+    assert mail_service._next_capacity_in(time.monotonic()) > 0
+
+
+def test_quota_is_a_rolling_window_that_survives_restarts(monkeypatch):
+    first = transport("gmail", quota=2)
+    assert first.reserve() is not None
+    assert first.reserve() is not None
+    assert first.reserve() is None
+
+    # A new process sees the same sends; they age out after the window.
+    again = transport("gmail", quota=2)
+    assert again.remaining() == 0
+    monkeypatch.setattr(mail_service, "QUOTA_WINDOW_SECONDS", 0.05)
+    time.sleep(0.1)
+    assert again.remaining() == 2
+
+
+def wait_for(ticket, states, timeout=5):
+    deadline = time.monotonic() + timeout
+    while mail_service.status(ticket) not in states and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return mail_service.status(ticket)
+
+
+def test_refused_resend_is_not_requeued(monkeypatch):
+    refused = smtplib.SMTPRecipientsRefused({"x@invalid": (550, b"no such user")})
+    t = transport("a", error=refused)
+    monkeypatch.setattr(mail_service, "_transports", [t])
+
+    ticket = mail_service.send_message("x@invalid", "s", "b", priority=mail_service.LOW)
+    assert wait_for(ticket, (mail_service.FAILED, mail_service.SENT)) == mail_service.FAILED
+    time.sleep(0.3)
+    assert len(t.connection.sent) == 1
+
+
+def test_address_without_at_fails_before_queueing(monkeypatch):
+    t = transport("a")
+    monkeypatch.setattr(mail_service, "_transports", [t])
+    ticket = mail_service.send_message("not-an-email", "s", "b")
+    assert mail_service.status(ticket) == mail_service.FAILED
+    assert t.connection.sent == []
+
+
+def test_high_priority_fails_fast_without_capacity(monkeypatch):
+    t = transport("a", quota=0)
+    monkeypatch.setattr(mail_service, "_transports", [t])
+    monkeypatch.setattr(mail_service, "HIGH_PRIORITY_MAX_WAIT_SECONDS", 0)
+
+    ticket = mail_service.send_message("signer@example.com", "s", "b")
+    assert wait_for(ticket, (mail_service.FAILED, mail_service.SENT)) == mail_service.FAILED
+    assert t.connection.sent == []
@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import outbox_service
+
+
+@pytest.fixture(autouse=True)
+def outbox(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_service, "OUTBOX_PATH", str(tmp_path / "pledge_outbox.db"))
+    monkeypatch.setattr(outbox_service, "_schema_path", None)
+
+
+def enqueue(n, key=None):
+    return outbox_service.enqueue(f"Signer {n}", f"signer{n}@example.com", "IL-13", "Rep", key)
+
+
+def claimed_ids():
+    return [row[0] for row in outbox_service._claim_batch()]
+
+
+def test_same_idempotency_key_queues_once():
+    first = enqueue(1, "submit-1")
+    assert enqueue(1, "submit-1") == first
+    assert enqueue(2, "submit-2") != first
+    assert outbox_service.counts() == {outbox_service.PENDING: 2}
+
+
+def test_claimed_rows_are_hidden_until_the_lease_expires(monkeypatch):
+    monkeypatch.setattr(outbox_service, "LEASE_SECONDS", 0.2)
+    ids = [enqueue(n) for n in range(3)]
+
+    assert claimed_ids() == ids
+    assert claimed_ids() == []
+    late = enqueue(3)
+    assert claimed_ids() == [late]
+
+    # A drainer that died mid-send leaves its rows to the next one.
+    time.sleep(0.25)
+    assert claimed_ids() == ids + [late]
+
+
+def test_claims_are_capped_at_the_batch_size(monkeypatch):
+    monkeypatch.setattr(outbox_service, "BATCH_SIZE", 2)
+    ids = [enqueue(n) for n in range(3)]
+    assert claimed_ids() == ids[:2]
+    assert claimed_ids() == ids[2:]
+
+
+def test_concurrent_drainers_never_claim_the_same_row():
+    for n in range(40):
+        enqueue(n)
+    claims = []
+
+    def drain():
+        while True:
+            batch = claimed_ids()
+            if not batch:
+                return
+            claims.extend(batch)
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claims) == list(range(1, 41))
+
+
+def test_results_settle_or_reschedule_rows(monkeypatch):
+    monkeypatch.setattr(outbox_service, "MAX_ATTEMPTS", 3)
+    ok, dup, retry, give_up = (enqueue(n) for n in range(4))
+    outbox_service._record([
+        (ok, 1, outbox_service.OK),
+        (dup, 1, outbox_service.DUPLICATE),
+        (retry, 1, "error: Worker timeout"),
+        (give_up, 3, "error: Worker timeout"),
+    ])
+
+    assert [outbox_service.status(i) for i in (ok, dup, retry, give_up)] == [
+        outbox_service.OK, outbox_service.DUPLICATE, outbox_service.PENDING, outbox_service.FAILED,
+    ]
+    # The retry is backed off, not claimable right away.
+    assert claimed_ids() == []
+    assert sorted(outbox_service.signed_emails()) == ["signer0@example.com", "signer1@example.com"]
+
+
+def test_a_send_that_raises_fails_only_its_own_row():
+    ids = [enqueue(n) for n in range(3)]
+
+    def send(payload):
+        if payload["email"] == "signer1@example.com":
+            raise RuntimeError("boom")
+        return outbox_service.OK
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert outbox_service._drain_batch(pool, send)
+    assert [outbox_service.status(i) for i in ids] == [outbox_service.OK, outbox_service.PENDING, outbox_service.OK]
+    row = outbox_service._connect().execute("SELECT attempts, last_error FROM outbox WHERE id = ?", (ids[1],)).fetchone()
+    assert row == (1, "error: boom")
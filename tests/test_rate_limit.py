@@ -0,0 +1,57 @@
+import threading
+import time
+
+from rate_limit import TokenBucket
+
+
+def timed_acquire(bucket, *args, **kwargs):
+    start = time.monotonic()
+    ok = bucket.acquire(*args, **kwargs)
+    return ok, time.monotonic() - start
+
+
+def test_burst_up_to_capacity_then_waits():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert timed_acquire(bucket, 0)[0]
+    assert timed_acquire(bucket, 0)[0]
+    ok, took = timed_acquire(bucket, 1)
+    assert ok and took >= 0.08
+
+
+def test_gives_up_up_front_when_the_wait_exceeds_the_timeout():
+    bucket = TokenBucket(rate=0.1, capacity=1, tokens=0)   # next token in 10 s
+    ok, took = timed_acquire(bucket, 5)
+    assert not ok
+    assert took < 1   # it knew without sleeping out the timeout
+    assert bucket.tokens > -0.5   # and booked nothing
+
+
+def test_cancelled_waiter_hands_its_token_back():
+    bucket = TokenBucket(rate=0.5, capacity=1, tokens=0)   # next token in 2 s
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    ok, took = timed_acquire(bucket, 5, cancelled=cancel.is_set)
+    assert not ok and took < 1.5
+    assert bucket.tokens > -0.5
+
+
+def test_waiters_are_paced_at_rate_and_sleep_outside_the_lock():
+    bucket = TokenBucket(rate=5, capacity=1, tokens=0)
+    done = []
+
+    def take():
+        bucket.acquire(timeout=2)
+        done.append(time.monotonic())
+
+    threads = [threading.Thread(target=take) for _ in range(4)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    # Everyone has booked a slot 0.2 s apart; none holds the lock meanwhile.
+    assert bucket.lock.acquire(timeout=0.1)
+    bucket.lock.release()
+    for t in threads:
+        t.join()
+    assert len(done) == 4
+    assert max(done) - start >= 0.75   # 4 tokens at 5/s, none banked
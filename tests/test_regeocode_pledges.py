@@ -0,0 +1,113 @@
+import csv
+
+import backup_service
+import regeocode_pledges
+
+
+def write_export(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(backup_service.VAULT_COLUMNS)
+        writer.writerows(rows)
+
+
+def test_vault_rows_carry_the_address():
+    row = backup_service.vault_row("Jane", "jane@example.com", "IL-13", "Rep", "123 Main St, Springfield, IL")
+    assert dict(zip(backup_service.VAULT_COLUMNS, row))["Address"] == "123 Main St, Springfield, IL"
+
+
+def test_addresses_from_a_vault_export_are_regeocoded(tmp_path, monkeypatch):
+    monkeypatch.setattr(regeocode_pledges.district_service, "lookup_rep", lambda code: None)
+    export = tmp_path / "vault.csv"
+    write_export(export, [
+        backup_service.vault_row("Jane", "jane@example.com", "IL-13", "Old Rep", "123 Main Street, Springfield, IL, United States"),
+        backup_service.vault_row("Joe", "joe@example.com", "IL-13", "Old Rep", "123 main st springfield il"),
+        backup_service.vault_row("Manual", "m@example.com", "NY-14", "Someone", ""),
+    ])
+    conn = regeocode_pledges.open_checkpoint(str(tmp_path / "checkpoint.db"))
+
+    assert regeocode_pledges.collect(conn, export, "Address") == 2
+    # Both spellings share one canonical key, so Geocodio sees one address.
+    assert conn.execute("SELECT address FROM addresses").fetchall() == [("123 MAIN ST SPRINGFIELD IL",)]
+
+    conn.execute("UPDATE addresses SET district = 'IL-15', rep = 'New Rep', done = 1")
+    stats = regeocode_pledges.rewrite(conn, export, tmp_path / "out.csv", "Address")
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert [r["District"] for r in rows] == ["IL-15", "IL-15", "NY-14"]
+    assert stats["district_changed"] == 2
+
+
+class GeocodioBatch:
+    # Stands in for requests.Session against the batch endpoint.
+    def __init__(self):
+        self.sent = []
+
+    def post(self, url, params=None, json=None, timeout=None):
+        self.sent.extend(json)
+        answer = {"response": {"results": [{
+            "address_components": {"state": "IL"},
+            "fields": {"congressional_districts": [{"district_number": 15, "current_legislators": []}]},
+        }]}}
+        response = type("Response", (), {"status_code": 200, "json": lambda self: {"results": [answer] * len(json)}})()
+        return response
+
+
+def test_geocodio_gets_the_address_as_picked(tmp_path, monkeypatch):
+    batch = GeocodioBatch()
+    monkeypatch.setattr(regeocode_pledges.requests, "Session", lambda: batch)
+    export = tmp_path / "vault.csv"
+    write_export(export, [backup_service.vault_row("Jane", "jane@example.com", "IL-13", "Rep", "123 Main Street, Springfield, IL")])
+    conn = regeocode_pledges.open_checkpoint(str(tmp_path / "checkpoint.db"))
+    regeocode_pledges.collect(conn, export, "Address")
+
+    regeocode_pledges.geocode(conn, "http://geocodio.test", "key", 10, 1)
+    assert batch.sent == ["123 Main Street, Springfield, IL"]
+    assert conn.execute("SELECT address, district, done FROM addresses").fetchall() == [("123 MAIN ST SPRINGFIELD IL", "IL-15", 1)]
+
+
+def test_checkpoint_answers_only_carry_over_within_a_run(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    conn = regeocode_pledges.open_checkpoint(path, "run-1")
+    conn.execute("INSERT INTO addresses (address, query, district, done) VALUES ('A', 'a', 'IL-13', 1)")
+    conn.commit()
+    conn.close()
+
+    assert regeocode_pledges.open_checkpoint(path, "run-1").execute("SELECT COUNT(*) FROM addresses").fetchone() == (1,)
+    assert regeocode_pledges.open_checkpoint(path, "run-2").execute("SELECT COUNT(*) FROM addresses").fetchone() == (0,)
+
+
+class Sheet:
+    def __init__(self, rows):
+        self.rows = [list(backup_service.VAULT_COLUMNS)] + [list(r) for r in rows]
+        self.updates = []
+
+    def col_values(self, col):
+        return [row[col - 1] for row in self.rows]
+
+    def batch_update(self, data):
+        self.updates.append(data)
+
+
+def test_changed_rows_are_written_back_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(regeocode_pledges.district_service, "lookup_rep", lambda code: None)
+    rows = [
+        backup_service.vault_row("Jane", "jane@example.com", "IL-13", "Old Rep", "123 Main St, Springfield, IL"),
+        backup_service.vault_row("Joe", "joe@example.com", "IL-13", "Old Rep", "9 Elm St, Springfield, IL"),
+        backup_service.vault_row("Ann", "ann@example.com", "IL-13", "Old Rep", "1 Oak St, Springfield, IL"),
+    ]
+    export = tmp_path / "vault.csv"
+    write_export(export, rows)
+    conn = regeocode_pledges.open_checkpoint(str(tmp_path / "checkpoint.db"))
+    regeocode_pledges.collect(conn, export, "Address")
+    conn.execute("UPDATE addresses SET district = 'IL-15', rep = 'New Rep', done = 1 WHERE address LIKE '%MAIN%' OR address LIKE '%ELM%'")
+
+    changes = []
+    regeocode_pledges.rewrite(conn, export, tmp_path / "out.csv", "Address", changes.append)
+    assert [c[:2] for c in changes] == [(2, "jane@example.com"), (3, "joe@example.com")]
+
+    sheet = Sheet(rows)
+    sheet.rows[2][2] = "someone-else@example.com"   # the sheet moved on since the export
+    assert regeocode_pledges.write_vault(sheet, changes, batch_size=1) == (1, 1)
+    assert sheet.updates == [[{"range": "D2:E2", "values": [["IL-15", "New Rep"]]}]]
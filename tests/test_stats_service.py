@@ -0,0 +1,59 @@
+import pytest
+
+import stats_service
+
+
+class Response:
+    def __init__(self, status_code, payload=None, etag=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    # Each poll gets the next queued response; the headers sent are recorded.
+    queue, sent = [], []
+
+    def get(service, url, headers=None, **kwargs):
+        sent.append(headers or {})
+        return queue.pop(0)
+
+    monkeypatch.setattr(stats_service.http_client, "get", get)
+    monkeypatch.setattr(stats_service.worker_client, "base_url", lambda: "http://worker.test")
+    monkeypatch.setattr(stats_service, "_etag", None)
+    monkeypatch.setattr(stats_service, "_snapshot", {"total": None, "districts": {}, "has_districts": False, "fetched_at": None})
+    return queue, sent
+
+
+def test_local_signups_never_invent_district_counts(worker):
+    queue, _ = worker
+    queue.append(Response(200, {"total_signups": 10}))
+    stats_service.poll_once()
+
+    stats_service.record_signup("NY-14")
+    snap = stats_service.snapshot()
+    assert snap["total"] == 11
+    assert snap["districts"] == {}
+
+
+def test_local_signups_add_to_worker_district_counts(worker):
+    queue, _ = worker
+    queue.append(Response(200, {"total_signups": 10, "by_district": [{"district": "NY-14", "count": 4}]}))
+    stats_service.poll_once()
+
+    stats_service.record_signup("NY-14")
+    stats_service.record_signup("CA-12")
+    assert stats_service.snapshot()["districts"] == {"NY-14": 5, "CA-12": 1}
+
+
+def test_unchanged_stats_cost_a_304(worker):
+    queue, sent = worker
+    queue.extend([Response(200, {"total_signups": 3, "districts": {}}, etag='"3"'), Response(304)])
+    assert stats_service.poll_once() is True
+    assert stats_service.poll_once() is False
+    assert sent[1] == {"If-None-Match": '"3"'}
+    assert stats_service.snapshot()["total"] == 3
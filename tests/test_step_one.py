@@ -0,0 +1,91 @@
+import time
+import uuid
+
+import address_service
+import bench_reruns
+
+# Step 1 under AppTest (the `app` fixture is in conftest.py).
+
+
+def slow_fetch(seconds):
+    def fetch(search_term):
+        time.sleep(seconds)
+        return [address_service.Suggestion(f"{search_term}, Springfield, IL", "39.80", "-89.65")]
+    return fetch
+
+
+def test_slow_lookup_lands_in_the_searchbox_without_crashing(app, monkeypatch):
+    monkeypatch.setattr(address_service, "_fetch", slow_fetch(0.5))
+    term = f"{uuid.uuid4().hex[:8]} Main St"
+    app.run()
+
+    # What the browser-side search step leaves behind when the lookup is slow:
+    # the searchbox remembers the term, the app is waiting on the lookup.
+    assert address_service.search(term, app.session_state.search_session_id, timeout=0.01) is None
+    box = dict(app.session_state["address_searchbox"])
+    box["search"] = term
+    app.session_state["address_searchbox"] = box
+    app.session_state.address_search_pending = term
+    app.component["state"] = {"interaction": "search", "value": term}
+
+    deadline = time.monotonic() + 5
+    while not app.session_state["address_searchbox"].get("options_py") and time.monotonic() < deadline:
+        time.sleep(0.1)
+        app.run()   # the refresh fragment's run_every tick
+        assert not app.exception, app.exception[0].message
+
+    options = app.session_state["address_searchbox"]["options_py"]
+    assert [o.display_name for o in options] == [f"{term}, Springfield, IL"]
+    assert app.session_state.address_search_pending is None
+
+
+def test_picked_suggestion_reaches_step_two(app):
+    import fake_services
+
+    app.run()
+    app.text_input[0].input("Test Signer")
+    app.text_input[1].input(f"{uuid.uuid4().hex[:8]}@example.com")
+    app.run()
+    assert fake_services.pick_address(app, "123 Main")
+    bench_reruns.button(app, "Continue").click()
+    app.run()
+
+    assert not app.exception
+    assert app.session_state.step == 2
+    assert app.session_state.pledge.district == "IL-13"
+
+
+def test_continue_without_an_address_stays_on_step_one(app):
+    app.run()
+    app.text_input[0].input("Test Signer")
+    app.text_input[1].input("someone@example.com")
+    bench_reruns.button(app, "Continue").click()
+    app.run()
+
+    assert app.session_state.step == 1
+    assert [e.value for e in app.error] == ["Please select your address from the suggestions."]
+
+
+def test_unknown_manual_district_gets_its_own_message(app):
+    app.run()
+    app.text_input[0].input("Test Signer")
+    app.text_input[1].input("someone@example.com")
+    app.text_input[2].input("ZZ")
+    bench_reruns.button(app, "Continue").click()
+    app.run()
+
+    assert app.session_state.step == 1
+    assert [e.value for e in app.error] == ["'ZZ' is not a district we know. Use your state and district number, e.g. NY-14 or AK-AL."]
+
+
+def test_searchbox_state_is_what_the_refresh_writes_into(app):
+    # address_search_refresh depends on these internals of the pinned
+    # streamlit-searchbox; an upgrade that moves them should fail here.
+    from streamlit_searchbox import _list_to_options_js, _list_to_options_py
+
+    app.run()
+    box = app.session_state["address_searchbox"]
+    assert {"search", "options_js"} <= set(box)
+    suggestion = address_service.Suggestion("1 Main St", "1", "2")
+    assert _list_to_options_py([("1 Main St", suggestion)]) == [suggestion]
+    assert _list_to_options_js([("1 Main St", suggestion)]) == [{"label": "1 Main St", "value": 0}]
@@ -0,0 +1,69 @@
+import time
+import uuid
+from unittest import mock
+
+import bench_reruns
+import fake_services
+import mail_service
+
+# Step 2 under AppTest (the `app` fixture is in conftest.py).
+
+
+def reach_step_two(app):
+    app.run()
+    app.text_input[0].input("Test Signer")
+    app.text_input[1].input(f"{uuid.uuid4().hex[:8]}@example.com")
+    app.run()
+    assert fake_services.pick_address(app, "123 Main")
+    bench_reruns.button(app, "Continue").click()
+    app.run()
+    assert app.session_state.step == 2
+
+
+def test_mail_status_stops_polling_once_sent(app):
+    reach_step_two(app)
+    deadline = time.monotonic() + 5
+    while app.session_state.email_delivery is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+        app.run()   # the status fragment's run_every tick
+    assert app.session_state.email_delivery == mail_service.SENT
+
+    with mock.patch.object(mail_service, "status", wraps=mail_service.status) as status:
+        app.run()
+        app.run()
+    assert status.call_count == 0
+    assert any(c.value.startswith("📧 Code sent to") for c in app.caption)
+    assert not app.exception
+
+
+def test_verify_click_survives_the_mail_landing_in_the_same_run(app):
+    reach_step_two(app)
+    deadline = time.monotonic() + 5
+    while mail_service.status(app.session_state.email_ticket) != mail_service.SENT and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert app.session_state.email_delivery is None
+
+    app.text_input[0].input(app.session_state.verification_code)
+    bench_reruns.button(app, "Verify and Sign").click()
+    app.run()
+    deadline = time.monotonic() + 5
+    while app.session_state.step != 3 and time.monotonic() < deadline:
+        time.sleep(0.1)
+        app.run()
+    assert app.session_state.step == 3
+
+
+def test_step_three_stops_polling_the_outbox_once_settled(app):
+    import outbox_service
+
+    test_verify_click_survives_the_mail_landing_in_the_same_run(app)
+    deadline = time.monotonic() + 5
+    while app.session_state.pledge_delivery is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+        app.run()
+    assert app.session_state.pledge_delivery == outbox_service.OK
+
+    with mock.patch.object(outbox_service, "status_for_email", wraps=outbox_service.status_for_email) as status:
+        app.run()
+    assert status.call_count == 0
+    assert not app.exception
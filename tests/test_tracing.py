@@ -0,0 +1,25 @@
+import types
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def request_with(monkeypatch):
+    def set_up(query, secrets):
+        monkeypatch.setattr(tracing, "st", types.SimpleNamespace(query_params=query, secrets=secrets))
+    return set_up
+
+
+def test_profiling_needs_the_token(request_with):
+    request_with({"profile": "s3cret"}, {"PROFILE_TOKEN": "s3cret"})
+    assert tracing.enabled()
+    request_with({"profile": "1"}, {"PROFILE_TOKEN": "s3cret"})
+    assert not tracing.enabled()
+
+
+@pytest.mark.parametrize("value", ["1", "", "None"])
+def test_profiling_is_off_without_a_token(request_with, value):
+    request_with({"profile": value}, {})
+    assert not tracing.enabled()
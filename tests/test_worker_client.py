@@ -0,0 +1,87 @@
+import pytest
+
+import http_client
+import worker_client
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def timeout():
+    return http_client.HttpError("worker", "timeout", "read timed out")
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    # Each attempt gets the next queued outcome: a Response or an HttpError.
+    queue, calls = [], []
+
+    def post(service, url, **kwargs):
+        calls.append(kwargs["headers"])
+        outcome = queue.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(worker_client.http_client, "post", post)
+    monkeypatch.setattr(worker_client, "base_url", lambda: "http://worker.test")
+    monkeypatch.setattr(worker_client, "breaker", worker_client.CircuitBreaker(failure_threshold=3, open_seconds=0))
+    monkeypatch.setattr(worker_client, "BACKOFF_BASE_SECONDS", 0)
+    return queue, calls
+
+
+def test_a_failed_signup_is_one_breaker_failure(worker):
+    queue, calls = worker
+    queue.extend([timeout()] * 3)
+    assert worker_client.signup({"email": "a@example.com"}, "k1").startswith("error:")
+    assert len(calls) == 3
+    assert worker_client.breaker.snapshot() == {"state": worker_client.CLOSED, "failures": 1, "short_circuited": 0}
+
+
+def test_retry_that_lands_resets_the_breaker(worker):
+    queue, _ = worker
+    queue.extend([timeout(), Response(200)])
+    assert worker_client.signup({"email": "a@example.com"}, "k1") == "ok"
+    assert worker_client.breaker.snapshot()["failures"] == 0
+
+
+def test_409_after_our_timeout_is_ours_only_if_the_key_matches(worker):
+    queue, _ = worker
+    queue.extend([timeout(), Response(409, {"Idempotency-Key": "k1"})])
+    assert worker_client.signup({"email": "a@example.com"}, "k1") == "ok"
+
+    queue.extend([timeout(), Response(409, {"Idempotency-Key": "someone-else"})])
+    assert worker_client.signup({"email": "a@example.com"}, "k2") == "duplicate"
+
+    queue.extend([timeout(), Response(409)])
+    assert worker_client.signup({"email": "a@example.com"}, "k3") == "duplicate"
+
+
+def test_client_errors_do_not_count_against_the_worker(worker):
+    queue, calls = worker
+    queue.append(http_client.HttpError("worker", "status", "400 Bad Request", status=400))
+    assert worker_client.signup({}, "k1").startswith("error:")
+    assert len(calls) == 1
+    assert worker_client.breaker.snapshot()["failures"] == 0
+
+
+def test_open_circuit_probes_once_then_closes(worker):
+    queue, calls = worker
+    queue.extend([timeout()] * 9)
+    for _ in range(3):
+        worker_client.signup({}, "k")
+    assert worker_client.breaker.snapshot()["state"] == worker_client.OPEN
+    assert len(calls) == 9
+
+    # The probe gets a single attempt; failing it reopens the circuit.
+    queue.append(timeout())
+    assert worker_client.signup({}, "k").startswith("error:")
+    assert len(calls) == 10
+    assert worker_client.breaker.snapshot()["state"] == worker_client.OPEN
+
+    queue.append(Response(200))
+    assert worker_client.signup({}, "k") == "ok"
+    assert worker_client.breaker.snapshot()["state"] == worker_client.CLOSED
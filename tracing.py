@@ -0,0 +1,173 @@
+import functools
+import hmac
+import html
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import streamlit as st
+
+# Opt-in per-rerun tracing.
+#
+# With ?profile=<PROFILE_TOKEN> in the URL, each script run records nested
+# spans for the page sections, helper calls and upstream HTTP requests;
+# without that secret, profiling is off. The last few runs are kept in the
+# session, so a run cut short by st.rerun() shows up next to the run it
+# triggered. render_waterfall() draws them at the bottom of the page and
+# offers a Chrome trace-event JSON download (chrome://tracing, Perfetto).
+#
+# Spans are no-ops unless a trace is active, so leaving them in place costs
+# one ContextVar lookup per call for everyone else. Script runs (and
+# fragment runs) each get a fresh thread, so a trace never leaks into the
+# next run.
+
+PROFILE_PARAM = "profile"
+MAX_TRACES = 5
+
+_current = ContextVar("trace", default=None)
+_depth = ContextVar("trace_depth", default=0)
+
+
+def enabled():
+    value = st.query_params.get(PROFILE_PARAM)
+    if not value:
+        return False
+    return authorized(value)
+
+
+def authorized(value):
+    # True when `value` is the PROFILE_TOKEN secret; never without one.
+    try:
+        token = st.secrets.get("PROFILE_TOKEN")
+    except Exception:
+        token = None
+    return bool(token) and hmac.compare_digest(str(value), str(token))
+
+
+def begin(name):
+    # Call at the top of the script. Returns None when profiling is off.
+    if not enabled():
+        return None
+    now = time.perf_counter()
+    traces = st.session_state.setdefault("_profile_traces", [])
+    if traces and traces[-1]["end"] is None:
+        # The previous run never reached end(): st.rerun() (or an error) cut it short.
+        traces[-1]["end"] = max([traces[-1]["start"]] + [s["end"] for s in traces[-1]["spans"]])
+        traces[-1]["ended_by"] = traces[-1]["ended_by"] or "interrupted"
+    trace = {"name": name, "start": now, "end": None, "ended_by": None, "spans": []}
+    traces.append(trace)
+    del traces[:-MAX_TRACES]
+    _current.set(trace)
+    _depth.set(0)
+    return trace
+
+
+def end():
+    trace = _current.get()
+    if trace is None:
+        return None
+    trace["end"] = time.perf_counter()
+    trace["ended_by"] = trace["ended_by"] or "end of script"
+    _current.set(None)
+    return trace
+
+
+@contextmanager
+def span(name, **args):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    start = time.perf_counter()
+    note = None
+    try:
+        yield
+    except BaseException as e:
+        # st.rerun() and st.stop() unwind the script with control-flow exceptions.
+        note = "st.rerun" if type(e).__name__ == "RerunException" else type(e).__name__
+        if depth == 0 and note == "st.rerun":
+            trace["ended_by"] = "st.rerun"
+        raise
+    finally:
+        _depth.reset(token)
+        trace["spans"].append(
+            {"name": name, "start": start, "end": time.perf_counter(), "depth": depth, "args": args, "note": note}
+        )
+
+
+def traced(name=None):
+    # Decorator form of span(). A fragment rerun skips the top of the script,
+    # so a decorated fragment starts its own trace when none is active.
+    def wrap(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _current.get() is None and begin(f"fragment: {label}") is not None:
+                try:
+                    with span(label):
+                        return fn(*args, **kwargs)
+                finally:
+                    end()
+            with span(label):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def chrome_trace(traces):
+    # Trace-event format: one complete ("X") event per span, one lane per run.
+    if not traces:
+        return json.dumps({"traceEvents": []})
+    origin = traces[0]["start"]
+    events = []
+    for lane, trace in enumerate(traces, start=1):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": f"run {lane}: {trace['name']}"}})
+        events.append({
+            "name": trace["name"], "cat": "run", "ph": "X", "pid": 1, "tid": lane,
+            "ts": (trace["start"] - origin) * 1e6, "dur": ((trace["end"] or trace["start"]) - trace["start"]) * 1e6,
+            "args": {"ended_by": trace["ended_by"]},
+        })
+        for s in trace["spans"]:
+            events.append({
+                "name": s["name"], "cat": "span", "ph": "X", "pid": 1, "tid": lane,
+                "ts": (s["start"] - origin) * 1e6, "dur": (s["end"] - s["start"]) * 1e6,
+                "args": {**{k: str(v) for k, v in s["args"].items()}, **({"note": s["note"]} if s["note"] else {})},
+            })
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+def _waterfall_html(trace):
+    total = max((trace["end"] or trace["start"]) - trace["start"], 1e-6)
+    rows = []
+    for s in sorted(trace["spans"], key=lambda s: (s["start"], s["depth"])):
+        left = (s["start"] - trace["start"]) / total * 100
+        width = max((s["end"] - s["start"]) / total * 100, 0.3)
+        label = html.escape(s["name"] + (f" ({s['note']})" if s["note"] else ""))
+        rows.append(
+            f'<div style="display:flex;align-items:center;font:12px monospace;height:18px">'
+            f'<div style="width:38%;padding-left:{s["depth"] * 12}px;white-space:nowrap;overflow:hidden">{label}</div>'
+            f'<div style="width:50%;position:relative;height:10px;background:#eee">'
+            f'<div style="position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:10px;background:#0C2340"></div></div>'
+            f'<div style="width:12%;text-align:right">{(s["end"] - s["start"]) * 1000:.1f} ms</div></div>'
+        )
+    return "".join(rows)
+
+
+def render_waterfall():
+    # Call after end(), at the very bottom of the page.
+    traces = st.session_state.get("_profile_traces")
+    if not enabled() or not traces:
+        return
+    st.divider()
+    st.subheader("Profile")
+    for number, trace in reversed(list(enumerate(traces, start=1))):
+        duration = ((trace["end"] or time.perf_counter()) - trace["start"]) * 1000
+        st.caption(f"Run {number}: {trace['name']}, {duration:.1f} ms, ended by {trace['ended_by'] or 'still running'}")
+        st.markdown(_waterfall_html(trace), unsafe_allow_html=True)
+    st.download_button("Download Chrome trace", chrome_trace(traces), file_name="trace.json", mime="application/json")
@@ -0,0 +1,76 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import address_index
+import address_service
+import district_service
+import duplicate_filter
+import http_client
+
+# Boot-time warm-up, once per process.
+#
+# A cold container otherwise pays for the first TLS handshakes, the SMTP
+# login and the district and address index loads inside the first visitor's
+# session. This runs all of that on a background thread right after the
+# first render starts, so keep_alive.yml only has to keep the container up,
+# not warm.
+# The duplicate filter is bootstrapped here too.
+
+_started = False
+_lock = threading.Lock()
+_timings = {}   # step -> milliseconds, or None if it failed
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _step(name, fn):
+    start = time.perf_counter()
+    try:
+        ok = fn() is not False
+    except Exception as e:
+        print(f"⚠️ Warm-up step {name} failed: {e}")
+        ok = False
+    _timings[name] = round((time.perf_counter() - start) * 1000, 1) if ok else None
+
+
+def _mail():
+    import mail_service
+
+    mail_service.warm_up()
+
+
+def _vault_module():
+    import backup_service  # noqa: F401
+
+
+def run(worker_base_url):
+    _step("district_index", lambda: district_service.load_index() is not None)
+    _step("address_index", lambda: address_index.load() is not None)
+    _step("roster", lambda: district_service.load_roster() is not None)
+    _step("nominatim", lambda: http_client.warm("nominatim", _origin(address_service.NOMINATIM_URL)))
+    _step("geocodio", lambda: http_client.warm("geocodio", _origin(district_service.GEOCODIO_URL)))
+    _step("worker", lambda: http_client.warm("worker", f"{worker_base_url}/"))
+    _step("mail", _mail)
+    _step("vault_module", _vault_module)
+    # Last: reading the vault's Email column is the slowest step.
+    _step("duplicate_filter", duplicate_filter.load)
+    print(f"🕒 Warm-up finished: {_timings}")
+
+
+def start(worker_base_url):
+    global _started
+    if _started:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+        threading.Thread(target=run, args=(worker_base_url,), name="warm-up", daemon=True).start()
+
+
+def timings():
+    return dict(_timings)
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+
+import streamlit as st
+
+import http_client
+
+# Client for the Cloudflare Worker that fronts the pledge database.
+#
+# Every signup carries an Idempotency-Key, so a retry of a request whose
+# response was lost can't record the pledge twice. Failed calls are retried
+# a couple of times with jittered exponential backoff. A circuit breaker
+# counts consecutive failed signups (one outcome per signup, however many
+# attempts it took): once it opens, calls fail in microseconds
+# instead of waiting on timeouts, and the outbox keeps the pledges until a
+# probe request finds the Worker healthy again.
+
+SIGNUP_TIMEOUT = (3.05, 5)     # connect, read
+SIGNUP_RETRIES = 2             # extra attempts after the first
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 2.0
+
+FAILURE_THRESHOLD = 5          # consecutive failures that open the circuit
+OPEN_SECONDS = 30              # how long to fail fast before probing again
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, open_seconds=OPEN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.short_circuited = 0
+
+    def allow(self):
+        # While open, one caller at a time is let through as a probe once
+        # open_seconds have passed; everyone else fails fast.
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def available(self):
+        # Like allow(), without claiming the probe.
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            return time.monotonic() - self._opened_at >= self.open_seconds and not self._probing
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print("✅ Worker circuit closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"⚠️ Worker circuit opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self._state, "failures": self._failures, "short_circuited": self.short_circuited}
+
+
+breaker = CircuitBreaker()
+
+
+def base_url():
+    return st.secrets["WORKER_BASE_URL"].rstrip("/")
+
+
+def _retryable(error):
+    # Network trouble, 5xx and 429 are the Worker's problem; other 4xx are ours.
+    return error.kind in ("timeout", "connection") or (error.status or 0) >= 500 or error.status == 429
+
+
+def _backoff(attempt):
+    # "Full jitter": spreads retries from many sessions over the window.
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _post_signup(payload, headers, retries):
+    # One signup with its retries; the breaker is told about the outcome by
+    # the caller. Returns (response or None, error or None).
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            return http_client.post(
+                "worker", f"{base_url()}/signup", json=payload, headers=headers,
+                ok=(200, 409), timeout=SIGNUP_TIMEOUT, metric="worker_signup",
+            ), None
+        except http_client.HttpError as e:
+            last_error = e
+            if not _retryable(e):
+                return None, e
+            if attempt < retries:
+                time.sleep(_backoff(attempt))
+    return None, last_error
+
+
+def signup(payload, idempotency_key):
+    # Returns "ok", "duplicate" or "error: ...".
+    if not breaker.allow():
+        return "error: Worker circuit open"
+    # A half-open probe gets a single attempt, so a still-sick Worker holds
+    # the probe for one timeout rather than three.
+    retries = SIGNUP_RETRIES if breaker.snapshot()["state"] == CLOSED else 0
+    r, error = _post_signup(payload, {"Idempotency-Key": idempotency_key}, retries)
+    if error is not None:
+        if _retryable(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()   # the Worker answered; the request was bad
+        return f"error: {error}"
+    breaker.record_success()
+    if r.status_code == 409:
+        # The email is taken. It is only our own pledge (an earlier attempt
+        # whose response we lost) if the Worker says it was stored under
+        # this key; otherwise someone really signed with it before.
+        return "ok" if r.headers.get("Idempotency-Key") == idempotency_key else "duplicate"
+    return "ok"
+
+
+def get_stats():
+    return http_client.get_json("worker", f"{base_url()}/stats", timeout=8, metric="worker_stats")